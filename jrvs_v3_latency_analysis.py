@@ -2,7 +2,7 @@
 """
 JRVS V3 Conversational Latency Analysis
 ========================================
-Pulls the last 10 Maya JRVS conversations >= 5 minutes, extracts per-turn
+Pulls the last N (default 10) Maya JRVS conversations >= 5 minutes, extracts per-turn
 timing data, cross-references each turn with the active node and assigned LLM.
 
 Step 0 findings (schema inspection):
@@ -17,27 +17,357 @@ Step 0 findings (schema inspection):
 - Duplicate turns at same time_in_call_secs = tool-call prep turns — deduplicated
   by keeping the turn with the highest-priority content (speech > tool-only > empty)
 
+Usage:
+  python jrvs_v3_latency_analysis.py [--max-conversations N] [--concurrency N]
+
+  Steps 2–4 run as a pipeline: qualifying conversations are handed to a
+  bounded thread pool of detail downloads (--concurrency, default 8) as each
+  list page arrives, and extracted as details arrive. At most --window
+  conversations (default 32) are in flight; paging pauses while the window is
+  full. Output order always follows the conversation list, so results match a
+  sequential (--concurrency 1) run.
+
+  The API base URL comes from --base-url or $ELEVENLABS_API_BASE_URL (default
+  the public ConvAI API), so runs can target jrvs_v3_latency_mock_server.py.
+  Non-default hosts get their own cache namespace.
+
+  All API calls go through one pooled keep-alive client and one shared pacing
+  budget: a token bucket plus an AIMD in-flight limit that grows while
+  responses are fast and halves on 429/5xx or rising latency (--max-rps caps
+  the rate, --concurrency the parallelism, --no-adaptive pins both). 429/5xx
+  responses and transport errors are retried with exponential backoff (a
+  Retry-After pauses every request, not just the throttled one);
+  a conversation that still fails is skipped and listed under "Failed
+  Conversations" in the summary and `failed_conversations` in the raw JSON.
+
+  Agent config and finished conversation details are cached under
+  .jrvs_latency_cache/ (gzip, content-addressed, LRU-bounded by --cache-max-mb).
+  Use --refresh to bypass cached copies or --no-cache to disable the cache.
+
+  --incremental reads the watermark stored in the existing raw JSON (newest
+  analyzed start_time_unix_secs, processed and pending conversation ids), stops
+  paging at the first already-covered conversation, analyzes only new finished
+  conversations, and merges their turns into the existing dataset before the
+  summary is rebuilt. Suitable for frequent cron runs.
+
+  --sketch-report FILE [FILE ...] merges saved quantile sketches and prints
+  per-node/per-LLM percentiles and a daily P95 trend without raw data or API
+  access (--since/--until restrict the day range).
+
+  --raw-format jsonl [--compress gzip|zstd] streams the raw dataset as one
+  compact JSON line per conversation and per turn (between a header and a
+  footer record) while conversations are extracted, instead of building one
+  indented document in memory. RawReader iterates either format
+  conversation by conversation.
+
+  --replay RAW_PATH rebuilds the summary and sketches fully offline (no API key)
+  from a saved raw JSON/JSONL file. Conversations whose detail payload was kept
+  with --save-details DIR (or is in the response cache) are re-extracted with
+  the current extract_turns; pass --details-dir DIR to use them. Combine with
+  --outlier-threshold-ms / --summary-out to iterate on the report locally.
+
+  --sqlite DB upserts every analyzed conversation and its turns into a local
+  SQLite turn index (keyed on conversation_id, turn_index; indexed by node,
+  LLM, time and LLM TTFB), during live runs and --replay alike.
+  --index-report nodes|llms|outliers --sqlite DB answers ad-hoc questions with
+  indexed SQL, filtered by --since/--until, --node, --llm and --tools-only.
+
+  Every live or replay run writes jrvs_v3_latency_metrics.json (--metrics-out):
+  wall/CPU time per stage, per-endpoint HTTP latency histograms, status
+  counts, bytes on the wire and decoded, JSON decode time, per-conversation
+  extraction time and peak RSS. --profile PSTATS_PATH adds a cProfile capture
+  and --trace-memory adds tracemalloc peaks and top allocation sites.
+
+  Each turn's perceived latency is decomposed into LLM TTFB, LLM→first
+  sentence, TTS TTFB and an unexplained residual (llm_to_sentence_ms,
+  critical_path_ms, perceived_latency_ms, residual_ms; derived on load, not
+  stored in the raw files); the summary attributes the critical-path share
+  and the P95 budget per node.
+
+  Tool-call prep turns (including the same-second ones deduplication drops)
+  are paired with the reply that follows them (prep_tool_names,
+  prep_llm_ttfb_ms, tool_round_trip_ms); the summary's Tool-Call Overhead
+  section reports the millisecond-resolution delay (prep LLM TTFB and
+  post-tool excess against matched no-tool replies) per tool and per node,
+  and the coarse prep→reply gap separately, in whole seconds.
+
+  The summary's Node Transitions section counts workflow node transfers per
+  conversation (transition matrix), reports LLM TTFB and perceived latency of
+  the first turn after each transition, and compares the first
+  --transition-window N turns after a transfer (default 3) with steady-state
+  turns in the same node, including the share of outliers that follow a
+  transfer.
+
+  Each raw turn records prior_transcript_chars, the characters of user and
+  agent messages before it. The summary's TTFB Model section fits LLM TTFB
+  against reply length, tool calls, interruption, time in call, that
+  context size (prior agent speech only, for raw files written without it)
+  and node by least squares and reports each factor's marginal cost with
+  95% intervals and a collinearity caveat; it also profiles TTFB by minutes
+  into the call and the per-conversation drift by call length (<20, 20–40,
+  40–60, ≥60 min).
+
+  --compare BASELINE CANDIDATE compares two raw datasets offline (each PATH
+  or PATH@SINCE..UNTIL, UTC days) overall, per node and per LLM: deltas of
+  mean, median and P95 (--compare-metric, default llm_ttfb_ms) with
+  confidence intervals, and a Mann–Whitney distribution-shift
+  test. It exits 1 when any delta is a significant regression of at least
+  --min-delta-ms, so a deploy pipeline can gate on it.
+
+  --tail follows in-progress conversations live: it polls the newest
+  conversation list page and each active call's detail with conditional
+  requests (If-None-Match, so unchanged calls cost a 304), runs each new
+  transcript tail through the same dedup and extraction, and prints every
+  settled agent turn with its node's rolling P50/P95 over the last
+  --tail-window turns. When --alert-breaches outlier breaches on one node
+  fall within --alert-window-secs of call time it prints an ALERT (and
+  appends it to --alert-log as JSON lines).
+
+  --agents ID [ID ...] and/or --workers N analyze a corpus: each agent's
+  qualifying conversations are split into N contiguous shards processed in
+  a process pool (each worker with its own API client, a 1/N share of
+  --concurrency and --max-rps, and its own raw JSONL + sketch shard under
+  --shard-dir/<agent_id>/). The parent merges the partial aggregates into a
+  summary and sketches per agent and a cross-agent summary whose per-LLM
+  section compares each model across agents. Merged output is identical to
+  a single-process run.
+
 Output:
   jrvs_v3_latency_raw.json       — per-turn records for all analyzed conversations
+                                   (jrvs_v3_latency_raw.jsonl[.gz|.zst] with --raw-format jsonl)
   jrvs_v3_latency_summary.md     — statistics by node, by LLM, overall, outlier list
+  jrvs_v3_latency_sketches.json  — mergeable quantile sketches (LLM/TTS TTFB,
+                                   first sentence) by day × node/LLM
+  jrvs_v3_latency_metrics.json   — run telemetry (stage timings, HTTP, memory)
 """
 
+import argparse
+import bisect
+import copy
+import cProfile
+import email.utils
+import gzip
+import hashlib
+import heapq
+import http.client
+import io
 import json
 import os
+import pstats
+import queue
+import random
+import sqlite3
 import sys
 import statistics
 import math
+import threading
+import time
+import tracemalloc
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
-from typing import Optional
-import urllib.request
-import urllib.error
+from typing import Callable, Iterable, Iterator, Optional
+import urllib.parse
 
 AGENT_ID = os.environ.get("MJRVS_ELEVENLABS_AGENT_ID", "").strip()
-BASE_URL = "https://api.elevenlabs.io/v1/convai"
+DEFAULT_BASE_URL = "https://api.elevenlabs.io/v1/convai"
+BASE_URL = os.environ.get("ELEVENLABS_API_BASE_URL", "").strip() or DEFAULT_BASE_URL
 MIN_DURATION_SECS = 300  # 5 minutes
 MAX_CONVERSATIONS = 10
+FETCH_CONCURRENCY = 8  # parallel conversation-detail requests
+PIPELINE_WINDOW = 32  # conversations listed but not yet extracted before paging pauses
 OUTLIER_THRESHOLD_MS = 3000
+TRANSITION_WINDOW = 3  # turns after a node transfer compared against steady state
+COMPARE_BOOTSTRAP_SAMPLES = 2000
+COMPARE_CONFIDENCE = 0.95
+COMPARE_MIN_DELTA_MS = 100  # smaller shifts are never flagged, however significant
+COMPARE_MIN_SAMPLES = 20  # per group and side, below which a group is not tested
+COMPARE_SEED = 1729
+TAIL_POLL_SECS = 5.0
+TAIL_LIST_PAGE_SIZE = 30  # newest conversations checked for in-progress calls each poll
+TAIL_WINDOW_TURNS = 50  # rolling window per node
+TAIL_ALERT_BREACHES = 3  # outlier breaches on one node ...
+TAIL_ALERT_WINDOW_SECS = 120  # ... within this much call time raise an alert
+FINAL_STATUSES = {"done", "failed"}
+HTTP_TIMEOUT_SECS = 30
+HTTP_MAX_RETRIES = 5
+HTTP_BACKOFF_BASE_SECS = 0.5
+HTTP_BACKOFF_MAX_SECS = 60
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+SCHED_INITIAL_CONCURRENCY = 4  # adaptive scheduler starting point, grows toward --concurrency
+SCHED_INITIAL_RPS = 10.0
+SCHED_MAX_RPS = 100.0
+SCHED_MIN_RPS = 0.5
+SCHED_RATE_STEP = 0.25  # rps added per fast success
+SCHED_EWMA_ALPHA = 0.2
+SCHED_LATENCY_BACKOFF_RATIO = 2.0  # latency EWMA this far above its best → shrink concurrency
+SCHED_LATENCY_SLACK_MS = 100.0  # ...and at least this much above it, so jitter on fast responses is ignored
+SCHED_MIN_COOLDOWN_SECS = 1.0
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jrvs_latency_cache")
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+AGENT_CONFIG_CACHE_TTL_SECS = 24 * 3600  # agent config reused for a day unless --refresh
 ANALYSIS_DATE = "2026-03-01"
+NAN = float("nan")
+
+
+# ---------------------------------------------------------------------------
+# Run telemetry: stage timings, HTTP latency histograms, memory
+# ---------------------------------------------------------------------------
+
+HTTP_LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf]
+SLOWEST_EXTRACTIONS = 10
+PROFILE_TOP_N = 25
+
+
+def endpoint_name(path: str) -> str:
+    """Collapse ids out of an API path: /conversations/conv_123 → /conversations/{id}."""
+    parts = path.split("?", 1)[0].strip("/").split("/")
+    return "/" + "/".join(p if i % 2 == 0 else "{id}" for i, p in enumerate(parts))
+
+
+class RunMetrics:
+    """
+    Self-telemetry for one analysis run, written as JSON next to the outputs.
+
+    Stages are sequential laps (begin() ends the previous one) with wall and
+    process CPU time; CPU time covers every thread, so a pipelined stage can
+    show more CPU than wall. HTTP attempts are recorded per endpoint from any
+    worker thread: a latency histogram plus percentiles, status counts, bytes
+    on the wire and after decompression, and JSON decode time. Extraction
+    time is recorded per conversation. Peak RSS comes from getrusage where
+    the platform provides it.
+
+    While tracemalloc is tracing (--trace-memory), each stage also records
+    its peak traced bytes, and the top allocation sites are snapshotted at
+    the end of whichever stage holds the most memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.stages: dict[str, dict] = {}
+        self._current: Optional[tuple[str, float, float]] = None
+        self.http: dict[str, dict] = {}
+        self.counters: dict[str, float] = {}
+        self.extractions: list[tuple[float, str, int, int]] = []  # (ms, cid, raw turns, agent turns)
+        self.extra: dict = {}
+        self.memory_snapshot: Optional[dict] = None
+
+    def begin(self, stage: str) -> None:
+        self.end()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._current = (stage, time.perf_counter(), time.process_time())
+
+    def end(self) -> None:
+        if self._current is None:
+            return
+        stage, w0, c0 = self._current
+        self._current = None
+        entry = self.stages.setdefault(stage, {"wall_secs": 0.0, "cpu_secs": 0.0})
+        entry["wall_secs"] += time.perf_counter() - w0
+        entry["cpu_secs"] += time.process_time() - c0
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            entry["traced_peak_bytes"] = max(entry.get("traced_peak_bytes", 0), peak)
+            if self.memory_snapshot is None or current > self.memory_snapshot["traced_bytes"]:
+                self.memory_snapshot = {
+                    "stage": stage,
+                    "traced_bytes": current,
+                    "top_lines": [
+                        {"location": str(stat.traceback[0]), "size_bytes": stat.size, "blocks": stat.count}
+                        for stat in tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_TOP_N]
+                    ],
+                }
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_http(self, path: str, status: Optional[int], secs: float, wire_bytes: int, decoded_bytes: int) -> None:
+        ep = endpoint_name(path)
+        with self._lock:
+            entry = self.http.get(ep)
+            if entry is None:
+                entry = self.http[ep] = {
+                    "attempts": 0, "status": {}, "latency_ms": [], "histogram": [0] * len(HTTP_LATENCY_BUCKETS_MS),
+                    "bytes_wire": 0, "bytes_decoded": 0, "json_decode_secs": 0.0,
+                }
+            ms = secs * 1000
+            entry["attempts"] += 1
+            key = str(status) if status is not None else "error"
+            entry["status"][key] = entry["status"].get(key, 0) + 1
+            entry["latency_ms"].append(ms)
+            entry["histogram"][bisect.bisect_right(HTTP_LATENCY_BUCKETS_MS, ms)] += 1
+            entry["bytes_wire"] += wire_bytes
+            entry["bytes_decoded"] += decoded_bytes
+
+    def record_json_decode(self, path: str, secs: float) -> None:
+        with self._lock:
+            entry = self.http.get(endpoint_name(path))
+            if entry is not None:
+                entry["json_decode_secs"] += secs
+
+    def record_extraction(self, cid: str, secs: float, raw_turns: int, agent_turns: int) -> None:
+        self.extractions.append((secs * 1000, cid, raw_turns, agent_turns))
+
+    @staticmethod
+    def peak_rss_bytes() -> Optional[int]:
+        try:
+            import resource
+        except ImportError:  # Windows
+            return None
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024  # Linux reports KiB
+
+    def to_dict(self) -> dict:
+        self.end()
+        http = {}
+        for ep, e in self.http.items():
+            labels = [f"<{int(edge)}ms" for edge in HTTP_LATENCY_BUCKETS_MS[:-1]]
+            labels.append(f"≥{int(HTTP_LATENCY_BUCKETS_MS[-2])}ms")
+            http[ep] = {
+                "attempts": e["attempts"],
+                "status": e["status"],
+                "latency_ms": stats(e["latency_ms"]),
+                "histogram": dict(zip(labels, e["histogram"])),
+                "bytes_wire": e["bytes_wire"],
+                "bytes_decoded": e["bytes_decoded"],
+                "json_decode_secs": round(e["json_decode_secs"], 4),
+            }
+        extract_ms = [x[0] for x in self.extractions]
+        slowest = sorted(self.extractions, reverse=True)[:SLOWEST_EXTRACTIONS]
+        return {
+            "started_at": self.started_at,
+            "wall_secs": round(time.perf_counter() - self._t0, 4),
+            "cpu_secs": round(time.process_time() - self._cpu0, 4),
+            "peak_rss_bytes": self.peak_rss_bytes(),
+            "stages": {
+                name: {k: round(v, 4) if isinstance(v, float) else v for k, v in s.items()}
+                for name, s in self.stages.items()
+            },
+            "http": http,
+            "extraction": {
+                "conversations": len(extract_ms),
+                "ms": stats(extract_ms),
+                "total_secs": round(sum(extract_ms) / 1000, 4),
+                "slowest": [
+                    {"conversation_id": cid, "ms": round(ms, 2), "raw_turns": raw, "agent_turns": n}
+                    for ms, cid, raw, n in slowest
+                ],
+            },
+            "counters": {k: round(v, 4) if isinstance(v, float) else v for k, v in self.counters.items()},
+            **self.extra,
+        }
+
+    def print_stages(self) -> None:
+        self.end()
+        print("\n[Metrics] Stage timings:")
+        for name, s in self.stages.items():
+            print(f"  {name:<20} wall {s['wall_secs']:8.2f}s  cpu {s['cpu_secs']:8.2f}s")
 
 
 # ---------------------------------------------------------------------------
@@ -51,37 +381,524 @@ def get_api_key() -> str:
     return key
 
 
-def api_get(path: str, api_key: str, params: dict = None) -> dict:
-    url = f"{BASE_URL}{path}"
-    if params:
-        qs = "&".join(f"{k}={v}" for k, v in params.items())
-        url = f"{url}?{qs}"
-    req = urllib.request.Request(url, headers={"xi-api-key": api_key})
+class ApiError(Exception):
+    """
+    Structured failure from an API call, raised once retries are exhausted or
+    the error is not retryable. `status` is the HTTP status code, or None for
+    transport failures (timeouts, resets, DNS).
+    """
+
+    def __init__(self, url: str, status: Optional[int], message: str, attempts: int):
+        super().__init__(f"HTTP {status if status is not None else 'error'} on {url}: {message}")
+        self.url = url
+        self.status = status
+        self.message = message
+        self.attempts = attempts
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "status": self.status,
+            "error": self.message[:500],
+            "attempts": self.attempts,
+        }
+
+
+class RequestScheduler:
+    """
+    One pacing budget shared by every API call (list pages, conversation
+    details, agent config).
+
+    A token bucket caps the request rate and an in-flight limit caps
+    parallelism. With `adaptive=True` both follow AIMD. Each fast success
+    adds 1/limit to the in-flight limit (about +1 per round trip) and a
+    small step to the rate. A 429, 5xx or transport error halves both; a
+    rising latency (EWMA above SCHED_LATENCY_BACKOFF_RATIO × the best EWMA
+    seen, and at least SCHED_LATENCY_SLACK_MS above it) trims the limit
+    alone. Decreases are rate-limited to one per cooldown so a burst of 429s
+    from one window counts once. A Retry-After pauses the whole bucket, not
+    just the request that received it.
+
+    With `adaptive=False` the limit stays at `max_concurrency` and the rate
+    at `max_rate`; Retry-After pauses still apply.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = FETCH_CONCURRENCY,
+        max_rate: float = SCHED_MAX_RPS,
+        adaptive: bool = True,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_rate = max_rate
+        self.adaptive = adaptive
+        if adaptive:
+            self.limit = float(min(self.max_concurrency, SCHED_INITIAL_CONCURRENCY))
+            self.rate = min(max_rate, SCHED_INITIAL_RPS)
+        else:
+            self.limit = float(self.max_concurrency)
+            self.rate = max_rate
+        self._cond = threading.Condition()
+        self._tokens = float(self.max_concurrency)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._ewma_ms: Optional[float] = None
+        self._baseline_ms: Optional[float] = None
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.decreases = 0
+        self.wait_secs = 0.0
+        self.peak_limit = self.limit
+        self.peak_rate = self.rate
+
+    def acquire(self) -> None:
+        """Block until a token and an in-flight slot are both available."""
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(float(self.max_concurrency), self._tokens + (now - self._refilled) * self.rate)
+                self._refilled = now
+                if now < self._paused_until:
+                    timeout = self._paused_until - now
+                elif self._in_flight >= int(self.limit):
+                    timeout = None  # woken by release()
+                elif self._tokens < 1:
+                    timeout = (1 - self._tokens) / self.rate
+                else:
+                    self._tokens -= 1
+                    self._in_flight += 1
+                    self.requests += 1
+                    self.wait_secs += now - started
+                    return
+                self._cond.wait(timeout)
+
+    def release(self, status: Optional[int], latency_secs: float, retry_after: Optional[float] = None) -> None:
+        """Return the slot and adapt to how the request went."""
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            congested = status is None or status == 429 or status >= 500
+            if status == 429:
+                self.throttled += 1
+            elif congested:
+                self.errors += 1
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + min(retry_after, HTTP_BACKOFF_MAX_SECS))
+            if self.adaptive:
+                self._adapt(now, congested, latency_secs * 1000)
+            self._cond.notify_all()
+
+    def _adapt(self, now: float, congested: bool, latency_ms: float) -> None:
+        cooldown = max(SCHED_MIN_COOLDOWN_SECS, 2 * (self._ewma_ms or 0) / 1000)
+        can_decrease = now - self._last_decrease >= cooldown
+        if congested:
+            if can_decrease:
+                self.limit = max(1.0, self.limit * 0.5)
+                self.rate = max(SCHED_MIN_RPS, self.rate * 0.5)
+                self._last_decrease = now
+                self.decreases += 1
+            return
+
+        ewma = latency_ms if self._ewma_ms is None else self._ewma_ms + SCHED_EWMA_ALPHA * (latency_ms - self._ewma_ms)
+        self._ewma_ms = ewma
+        # Best EWMA seen, drifting up slowly so a lasting shift becomes the new normal
+        self._baseline_ms = ewma if self._baseline_ms is None else min(ewma, self._baseline_ms * 1.001)
+        if ewma > max(self._baseline_ms * SCHED_LATENCY_BACKOFF_RATIO, self._baseline_ms + SCHED_LATENCY_SLACK_MS):
+            if can_decrease:
+                self.limit = max(1.0, self.limit * 0.8)
+                self._last_decrease = now
+                self.decreases += 1
+            return
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        self.rate = min(self.max_rate, self.rate + SCHED_RATE_STEP)
+        self.peak_limit = max(self.peak_limit, self.limit)
+        self.peak_rate = max(self.peak_rate, self.rate)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "adaptive": self.adaptive,
+                "requests": self.requests,
+                "throttled_429": self.throttled,
+                "errors": self.errors,
+                "decreases": self.decreases,
+                "concurrency_limit": int(self.limit),
+                "peak_concurrency_limit": int(self.peak_limit),
+                "rate_rps": round(self.rate, 2),
+                "peak_rate_rps": round(self.peak_rate, 2),
+                "latency_ewma_ms": round(self._ewma_ms, 1) if self._ewma_ms is not None else None,
+                "wait_secs": round(self.wait_secs, 3),
+            }
+
+
+class ApiClient:
+    """
+    Thread-safe ElevenLabs API client with persistent keep-alive connections.
+
+    Connections are pooled (at most `pool_size` open at once) and reused across
+    requests, so paging through thousands of conversations pays for one TLS
+    handshake per pooled connection instead of one per request. Every attempt
+    goes through one RequestScheduler (adaptive by default, capped at
+    `pool_size` in flight). 429/5xx and transport errors are retried with
+    exponential backoff plus jitter; a `Retry-After` header, when present,
+    overrides the computed delay.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        pool_size: int = FETCH_CONCURRENCY,
+        timeout: float = HTTP_TIMEOUT_SECS,
+        max_retries: int = HTTP_MAX_RETRIES,
+        metrics: Optional[RunMetrics] = None,
+        scheduler: Optional[RequestScheduler] = None,
+    ):
+        base_url = base_url or BASE_URL
+        parsed = urllib.parse.urlsplit(base_url)
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.metrics = metrics
+        self._scheme = parsed.scheme
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._base_path = parsed.path.rstrip("/")
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self.scheduler = scheduler or RequestScheduler(pool_size)
+
+    def __enter__(self) -> "ApiClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+        return cls(self._host, self._port, timeout=self.timeout)
+
+    def _checkout(self) -> tuple[http.client.HTTPConnection, bool]:
+        """Return (connection, reused)."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(), False
+
+    def _checkin(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.append(conn)
+
+    def _request_once(self, target: str, etag: Optional[str] = None) -> tuple[int, dict, bytes, int]:
+        """Return (status, headers, decoded body, bytes on the wire)."""
+        headers = {"xi-api-key": self.api_key, "Accept-Encoding": "gzip"}
+        if etag:
+            headers["If-None-Match"] = etag
+        # A pooled connection may have been closed by the server while idle;
+        # that failure says nothing about the API, so retry it immediately
+        # on a fresh connection.
+        for _ in range(2):
+            conn, reused = self._checkout()
+            try:
+                conn.request("GET", target, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(conn)
+            wire_bytes = len(body)
+            if resp.getheader("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+            return resp.status, dict(resp.getheaders()), body, wire_bytes
+        raise http.client.RemoteDisconnected("connection closed by server")
+
+    def get(self, path: str, params: Optional[dict] = None) -> dict:
+        return self._get(path, params)[0]
+
+    def get_if_changed(
+        self, path: str, etag: Optional[str], params: Optional[dict] = None,
+    ) -> tuple[Optional[dict], Optional[str]]:
+        """
+        Conditional GET: sends If-None-Match when `etag` is set. Returns
+        (None, etag) on 304 Not Modified, else (payload, the response's ETag,
+        which is None when the server does not send one).
+        """
+        data, headers = self._get(path, params, etag)
+        return data, headers.get("ETag") or headers.get("etag") or (etag if data is None else None)
+
+    def _get(self, path: str, params: Optional[dict] = None, etag: Optional[str] = None) -> tuple[Optional[dict], dict]:
+        target = f"{self._base_path}{path}"
+        if params:
+            target = f"{target}?{urllib.parse.urlencode(params)}"
+        url = f"{self._scheme}://{self._host}{':' + str(self._port) if self._port else ''}{target}"
+
+        attempt = 0
+        while True:
+            attempt += 1
+            retry_after = None
+            self.scheduler.acquire()
+            started = time.perf_counter()
+            status = None
+            try:
+                try:
+                    status, headers, body, wire_bytes = self._request_once(target, etag)
+                except (OSError, http.client.HTTPException) as e:
+                    status, headers, body, wire_bytes = None, {}, str(e).encode(), 0
+                latency = time.perf_counter() - started
+                if status is not None and status not in range(200, 300) and status != 304:
+                    retry_after = parse_retry_after(headers.get("Retry-After") or headers.get("retry-after"))
+            finally:
+                self.scheduler.release(status, time.perf_counter() - started, retry_after)
+            if self.metrics:
+                self.metrics.record_http(path, status, latency, wire_bytes, len(body) if status else 0)
+            if status == 304 and etag:
+                return None, headers
+            if status is not None and 200 <= status < 300:
+                started = time.perf_counter()
+                try:
+                    data = json.loads(body)
+                except ValueError as e:
+                    raise ApiError(url, status, f"invalid JSON: {e}", attempt) from None
+                if self.metrics:
+                    self.metrics.record_json_decode(path, time.perf_counter() - started)
+                return data, headers
+
+            message = body.decode("utf-8", "replace")
+            if status is not None and status not in RETRYABLE_STATUS:
+                raise ApiError(url, status, message, attempt)
+            if attempt > self.max_retries:
+                raise ApiError(url, status, message, attempt)
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            time.sleep(min(delay, HTTP_BACKOFF_MAX_SECS))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP-date."""
+    if not value:
+        return None
+    value = value.strip()
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            return json.loads(resp.read().decode())
-    except urllib.error.HTTPError as e:
-        body = e.read().decode()
-        sys.exit(f"HTTP {e.code} on {url}: {body}")
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempt-1) scaled by [0.5, 1)."""
+    delay = HTTP_BACKOFF_BASE_SECS * (2 ** (attempt - 1))
+    return min(delay, HTTP_BACKOFF_MAX_SECS) * random.uniform(0.5, 1.0)
+
+
+# ---------------------------------------------------------------------------
+# Local response cache
+# ---------------------------------------------------------------------------
+
+class DetailCache:
+    """
+    On-disk cache for API payloads that do not change between runs.
+
+    Payloads are stored content-addressed as gzip-compressed JSON under
+    objects/<digest[:2]>/<digest>.json.gz, where digest is the SHA-256 of the
+    compact JSON (key order preserved, so cached payloads replay exactly).
+    index.json maps logical keys (``conversation:<id>``, ``agent:<id>``) to
+    digests and tracks per-object size and last access; once the total size
+    exceeds `max_bytes`, least-recently-used objects and the keys pointing at
+    them are evicted.
+
+    With `refresh=True` reads always miss, but fresh payloads are still stored,
+    so a --refresh run repopulates the cache.
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, cache_dir: str, max_bytes: int = CACHE_MAX_BYTES, refresh: bool = False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self._index = {"refs": {}, "objects": {}}
+        index_path = os.path.join(cache_dir, self.INDEX_NAME)
+        if os.path.exists(index_path):
+            try:
+                with open(index_path) as f:
+                    loaded = json.load(f)
+                self._index["refs"] = loaded.get("refs", {})
+                self._index["objects"] = loaded.get("objects", {})
+            except (OSError, ValueError):
+                print(f"  WARNING: cache index {index_path} unreadable — starting empty")
+
+    def __enter__(self) -> "DetailCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "objects", digest[:2], f"{digest}.json.gz")
+
+    def get(self, key: str, max_age_secs: Optional[float] = None) -> Optional[dict]:
+        """Return the cached payload for `key`, or None on miss/expiry/refresh."""
+        with self._lock:
+            ref = None if self.refresh else self._index["refs"].get(key)
+            if ref is not None and max_age_secs is not None and time.time() - ref["stored_at"] > max_age_secs:
+                ref = None
+            if ref is None:
+                self.misses += 1
+                return None
+            digest = ref["digest"]
+        try:
+            with gzip.open(self._object_path(digest), "rb") as f:
+                payload = json.loads(f.read())
+        except (OSError, ValueError, EOFError):
+            with self._lock:
+                self._drop_object(digest)
+                self.misses += 1
+            return None
+        with self._lock:
+            if digest in self._index["objects"]:
+                self._index["objects"][digest]["last_access"] = time.time()
+                self._dirty = True
+            self.hits += 1
+        return payload
+
+    def put(self, key: str, payload: dict) -> str:
+        """Store `payload` under `key`; returns its content digest."""
+        data = json.dumps(payload, separators=(",", ":")).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        with self._lock:
+            known = digest in self._index["objects"] and os.path.exists(path)
+        if not known:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            self._index["objects"][digest] = {"size": os.path.getsize(path), "last_access": now}
+            self._index["refs"][key] = {"digest": digest, "stored_at": now}
+            self._dirty = True
+            self._evict()
+        return digest
+
+    def _drop_object(self, digest: str) -> None:
+        self._index["objects"].pop(digest, None)
+        for key in [k for k, r in self._index["refs"].items() if r["digest"] == digest]:
+            del self._index["refs"][key]
+        try:
+            os.remove(self._object_path(digest))
+        except OSError:
+            pass
+        self._dirty = True
+
+    def _evict(self) -> None:
+        objects = self._index["objects"]
+        total = sum(o["size"] for o in objects.values())
+        if total <= self.max_bytes:
+            return
+        for digest, meta in sorted(objects.items(), key=lambda kv: kv[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= meta["size"]
+            self._drop_object(digest)
+
+    def index_snapshot(self) -> dict:
+        """Copy of the key/object index, for absorb() in the process that owns the cache."""
+        with self._lock:
+            return copy.deepcopy(self._index)
+
+    def absorb(self, index: dict, hits: int = 0, misses: int = 0) -> None:
+        """
+        Fold in the index of another instance over the same directory (a
+        worker process, which must not close() its own): the newer entry
+        wins per key and per object. Only this instance writes index.json.
+        """
+        with self._lock:
+            refs, objects = self._index["refs"], self._index["objects"]
+            for key, ref in index["refs"].items():
+                if key not in refs or ref["stored_at"] > refs[key]["stored_at"]:
+                    refs[key] = ref
+            for digest, meta in index["objects"].items():
+                if digest not in objects or meta["last_access"] > objects[digest]["last_access"]:
+                    objects[digest] = meta
+            self.hits += hits
+            self.misses += misses
+            self._dirty = True
+
+    def close(self) -> None:
+        with self._lock:
+            self._evict()
+            if not self._dirty:
+                return
+            index_path = os.path.join(self.cache_dir, self.INDEX_NAME)
+            tmp = f"{index_path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._index, f, separators=(",", ":"))
+            os.replace(tmp, index_path)
+            self._dirty = False
 
 
 # ---------------------------------------------------------------------------
 # Step 1: Agent config → Node→LLM map
 # ---------------------------------------------------------------------------
 
-def build_node_llm_map(api_key: str) -> tuple[dict, str]:
+def build_node_llm_map(
+    client: ApiClient, cache: Optional[DetailCache] = None, agent_id: Optional[str] = None,
+) -> tuple[dict, str]:
     """
     Returns (node_map, root_llm) where node_map is:
       node_id -> {label, llm_model, llm_type, is_inherited}
+    for `agent_id` (default AGENT_ID).
     """
+    agent_id = agent_id or AGENT_ID
     print("[Step 1] Fetching agent config...")
-    config = api_get(f"/agents/{AGENT_ID}", api_key)
+    cache_key = f"agent:{agent_id}"
+    config = cache.get(cache_key, max_age_secs=AGENT_CONFIG_CACHE_TTL_SECS) if cache else None
+    if config is not None:
+        print("  (from cache)")
+    else:
+        config = client.get(f"/agents/{agent_id}")
+        if cache:
+            digest = cache.put(cache_key, config)
+            print(f"  Cached agent config {digest[:12]}")
 
     root_llm = (
         config.get("conversation_config", {})
         .get("agent", {})
         .get("prompt", {})
-        .get("llm", "unknown")
+        .get("llm") or "unknown"
     )
     print(f"  Root LLM: {root_llm}")
 
@@ -95,7 +912,7 @@ def build_node_llm_map(api_key: str) -> tuple[dict, str]:
         if ntype == "start":
             continue  # start_node has no LLM config
 
-        label = node.get("label", node_id)
+        label = node.get("label") or node_id
         # Check for per-node LLM override in config.agent.prompt.llm
         node_prompt = (
             node.get("config", {}) or {}
@@ -127,53 +944,230 @@ def build_node_llm_map(api_key: str) -> tuple[dict, str]:
 # Step 2: Fetch conversations — filter for >= 5 minutes
 # ---------------------------------------------------------------------------
 
-def fetch_qualifying_conversations(api_key: str) -> list[dict]:
-    """Fetch paginated conversation list, return up to 10 with duration >= 300s."""
-    print(f"\n[Step 2] Fetching conversations for agent {AGENT_ID}...")
-    qualifying = []
+def conversation_entry(conv: dict) -> dict:
+    """Trim a /conversations list item to the fields recorded in the raw JSON."""
+    return {
+        "conversation_id": conv["conversation_id"],
+        "start_time": conv.get("start_time_unix_secs"),
+        "duration_seconds": conv.get("call_duration_secs", 0) or 0,
+        "status": conv.get("status", "unknown"),
+        "call_successful": conv.get("call_successful"),
+        "message_count": conv.get("message_count", 0),
+    }
+
+
+def iter_conversation_pages(client: ApiClient, agent_id: Optional[str] = None):
+    """Yield each page of the agent's (default AGENT_ID) conversation list, newest first."""
     cursor = None
     page = 0
-
-    while len(qualifying) < MAX_CONVERSATIONS:
+    while True:
         params = {
-            "agent_id": AGENT_ID,
+            "agent_id": agent_id or AGENT_ID,
             "page_size": 100,
         }
         if cursor:
             params["cursor"] = cursor
 
-        data = api_get("/conversations", api_key, params)
+        data = client.get("/conversations", params)
         conversations = data.get("conversations", [])
         page += 1
         print(f"  Page {page}: {len(conversations)} conversations retrieved")
-
-        for conv in conversations:
-            duration = conv.get("call_duration_secs", 0) or 0
-            if duration >= MIN_DURATION_SECS:
-                qualifying.append({
-                    "conversation_id": conv["conversation_id"],
-                    "start_time": conv.get("start_time_unix_secs"),
-                    "duration_seconds": duration,
-                    "status": conv.get("status", "unknown"),
-                    "call_successful": conv.get("call_successful"),
-                    "message_count": conv.get("message_count", 0),
-                })
-                if len(qualifying) >= MAX_CONVERSATIONS:
-                    break
+        yield conversations
 
         has_more = data.get("has_more", False)
         cursor = data.get("next_cursor")
         if not has_more or not cursor:
-            break
+            return
 
-    print(f"  Found {len(qualifying)} qualifying conversations (>= {MIN_DURATION_SECS}s)")
+
+def print_conversations(qualifying: list[dict]) -> None:
     for c in qualifying:
         dt = datetime.fromtimestamp(c["start_time"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M") if c["start_time"] else "?"
         print(f"    {c['conversation_id']}  {dt}  {c['duration_seconds']}s  msgs={c['message_count']}")
 
+
+def iter_qualifying_conversations(
+    client: ApiClient, limit: int = MAX_CONVERSATIONS, agent_id: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Yield up to `limit` conversations with duration >= 300s as each list page
+    arrives, so detail downloads can start before pagination finishes.
+    """
+    found = 0
+    for conversations in iter_conversation_pages(client, agent_id):
+        for conv in conversations:
+            duration = conv.get("call_duration_secs", 0) or 0
+            if duration >= MIN_DURATION_SECS:
+                yield conversation_entry(conv)
+                found += 1
+                if found >= limit:
+                    return
+
+
+def fetch_qualifying_conversations(client: ApiClient, limit: int = MAX_CONVERSATIONS) -> list[dict]:
+    """Fetch paginated conversation list, return up to `limit` with duration >= 300s."""
+    print(f"\n[Step 2] Fetching conversations for agent {AGENT_ID}...")
+    qualifying = list(iter_qualifying_conversations(client, limit))
+
+    print(f"  Found {len(qualifying)} qualifying conversations (>= {MIN_DURATION_SECS}s)")
+    print_conversations(qualifying)
+
     return qualifying
 
 
+# ---------------------------------------------------------------------------
+# Turn records: compact in-memory form of one extracted agent turn
+# ---------------------------------------------------------------------------
+
+BASE_TURN_FIELDS = (
+    "conversation_id", "turn_index", "time_in_call_secs", "role", "active_node_id", "active_node",
+    "active_llm", "llm_type", "llm_ttfb_ms", "tts_ttfb_ms", "ttf_first_sentence_ms",
+    "response_latency_secs_coarse", "turn_duration_ms", "response_word_count", "response_char_count",
+    "has_tool_calls", "tool_names", "interrupted", "node_attribution_method",
+)
+# Derived by latency_budget() from the base fields, in memory only: raw files
+# never need them, and loading recomputes them.
+BUDGET_FIELDS = ("llm_to_sentence_ms", "critical_path_ms", "perceived_latency_ms", "residual_ms")
+# Tool-call prep turns paired with this (speech) turn by extract_turns; empty /
+# None when the turn followed no tool call, and exported only when it did.
+PREP_FIELDS = ("prep_tool_names", "prep_llm_ttfb_ms", "tool_round_trip_ms")
+# Characters of the whole transcript (user and agent messages) before this
+# turn, counted by extract_turns — the conversation length the LLM context
+# grows with. None for turns read from raw files written without it.
+CONTEXT_FIELDS = ("prior_transcript_chars",)
+TURN_FIELDS = BASE_TURN_FIELDS + BUDGET_FIELDS + PREP_FIELDS + CONTEXT_FIELDS
+TURN_FIELD_SET = frozenset(TURN_FIELDS)
+ATTRIBUTION_METHOD = "Approach A (workflow_node_id in agent_metadata)"
+
+
+class TurnRecord:
+    """
+    One extract_turns record in __slots__ form: no per-turn dict, repeated
+    strings (node ids and labels, LLM ids, llm_type, role, attribution
+    method, tool names) interned so every turn shares one copy, and
+    tool_names held as a tuple. The latency budget fields are derived in the
+    constructor, so they never disagree with the metrics they split. The
+    prep fields describe the tool-call prep turns that preceded a speech turn,
+    and prior_transcript_chars the conversation so far (see extract_turns).
+
+    Records read like the dicts they replace (t["llm_ttfb_ms"], t.get(...),
+    keys(), ** unpacking), so aggregation, sketches and the SQLite index
+    accept either form. to_dict() is the explicit export step: measured
+    fields only, in the original key order with list-typed tool names (a
+    turn without prep carries exactly the baseline raw-JSON keys), so the
+    raw files stay no larger than before the budget and prep fields existed.
+    """
+
+    __slots__ = TURN_FIELDS
+
+    def __init__(
+        self, conversation_id, turn_index, time_in_call_secs, role, active_node_id, active_node,
+        active_llm, llm_type, llm_ttfb_ms, tts_ttfb_ms, ttf_first_sentence_ms,
+        response_latency_secs_coarse, turn_duration_ms, response_word_count, response_char_count,
+        has_tool_calls, tool_names, interrupted, node_attribution_method=ATTRIBUTION_METHOD,
+        prep_tool_names=(), prep_llm_ttfb_ms=None, tool_round_trip_ms=None, prior_transcript_chars=None,
+    ):
+        intern = sys.intern
+        self.conversation_id = conversation_id
+        self.turn_index = turn_index
+        self.time_in_call_secs = time_in_call_secs
+        # Payload strings may be null; intern() only takes str
+        self.role = intern(role or "")
+        self.active_node_id = intern(active_node_id or "")
+        self.active_node = intern(active_node or "")
+        self.active_llm = intern(active_llm or "")
+        self.llm_type = intern(llm_type or "")
+        self.llm_ttfb_ms = llm_ttfb_ms
+        self.tts_ttfb_ms = tts_ttfb_ms
+        self.ttf_first_sentence_ms = ttf_first_sentence_ms
+        self.response_latency_secs_coarse = response_latency_secs_coarse
+        self.turn_duration_ms = turn_duration_ms
+        self.response_word_count = response_word_count
+        self.response_char_count = response_char_count
+        self.has_tool_calls = has_tool_calls
+        self.tool_names = tuple(intern(n or "") for n in tool_names) if tool_names else ()
+        self.interrupted = interrupted
+        self.node_attribution_method = intern(node_attribution_method or "")
+        (
+            self.llm_to_sentence_ms,
+            self.critical_path_ms,
+            self.perceived_latency_ms,
+            self.residual_ms,
+        ) = latency_budget(llm_ttfb_ms, ttf_first_sentence_ms, tts_ttfb_ms, response_latency_secs_coarse)
+        self.prep_tool_names = tuple(intern(n or "") for n in prep_tool_names) if prep_tool_names else ()
+        self.prep_llm_ttfb_ms = prep_llm_ttfb_ms
+        self.tool_round_trip_ms = tool_round_trip_ms
+        self.prior_transcript_chars = prior_transcript_chars
+
+    # Mapping-style reads, with dict semantics: unknown keys raise KeyError
+    # (get() returns the default), and methods are not keys.
+    def __getitem__(self, key: str):
+        if key not in TURN_FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in TURN_FIELD_SET else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in TURN_FIELD_SET
+
+    def keys(self) -> tuple[str, ...]:
+        return TURN_FIELDS
+
+    def __repr__(self) -> str:
+        return f"TurnRecord({self.conversation_id!r}, {self.turn_index})"
+
+    def to_dict(self) -> dict:
+        d = {name: getattr(self, name) for name in BASE_TURN_FIELDS}
+        d["tool_names"] = list(self.tool_names)
+        if self.prior_transcript_chars is not None:
+            d["prior_transcript_chars"] = self.prior_transcript_chars
+        if self.prep_tool_names:
+            d.update((name, getattr(self, name)) for name in PREP_FIELDS)
+            d["prep_tool_names"] = list(self.prep_tool_names)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "TurnRecord":
+        """
+        Compact a raw-file turn dict. Keys are matched by name in any order:
+        every BASE_TURN_FIELDS key is required, PREP_FIELDS and CONTEXT_FIELDS
+        are taken when present, and anything else (budget fields are
+        recomputed) is ignored.
+        Raises ValueError naming the conversation when a base field is missing.
+        """
+        missing = [k for k in BASE_TURN_FIELDS if k not in d]
+        if missing:
+            raise ValueError(
+                f"turn {d.get('turn_index')} of conversation {d.get('conversation_id')} "
+                f"is missing raw fields: {', '.join(missing)}"
+            )
+        return cls(
+            *[d[k] for k in BASE_TURN_FIELDS],
+            **{k: d[k] for k in PREP_FIELDS + CONTEXT_FIELDS if k in d},
+        )
+
+
+def export_turn(turn) -> dict:
+    """Explicit export step: the dict written to raw JSON/JSONL for a turn in either form."""
+    return turn.to_dict() if isinstance(turn, TurnRecord) else turn
+
+
+def raw_json_default(obj):
+    """json.dump hook: serialize TurnRecords as their exported dicts while encoding."""
+    if isinstance(obj, TurnRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def compact_turn_hook(obj: dict):
+    """json object_hook: compact turn dicts as they are parsed, so a whole raw file never holds them."""
+    if "turn_index" in obj:  # only turns carry it (conversations, failures and the header do not)
+        return TurnRecord.from_dict(obj)
+    return obj
+
+
 # ---------------------------------------------------------------------------
 # Step 3 & 4: Per-turn latency extraction + node attribution
 # ---------------------------------------------------------------------------
@@ -191,18 +1185,21 @@ def turn_priority(turn: dict) -> int:
     return TURN_PRIORITY["empty"]
 
 
-def deduplicate_turns(transcript: list[dict]) -> list[dict]:
+def deduplicate_turns(transcript: list[dict], collapsed: Optional[dict[int, list[dict]]] = None) -> list[dict]:
     """
     Agent turns can have duplicate time_in_call_secs entries (tool-call prep
     turns alongside the speech turn). Group by time and keep highest-priority.
     User turns are not duplicated.
-    """
-    from itertools import groupby
 
-    # Preserve order, group consecutive same-time agent turns
+    When `collapsed` is a dict, every group of two or more same-time agent
+    turns (survivor included) is stored under the survivor's index in the
+    result — the side channel extract_turns reads tool-call prep timing from.
+    """
+    # Preserve order, collapse consecutive same-time agent turns in one pass
     cleaned = []
+    n = len(transcript)
     i = 0
-    while i < len(transcript):
+    while i < n:
         turn = transcript[i]
         if turn["role"] != "agent":
             cleaned.append(turn)
@@ -210,42 +1207,173 @@ def deduplicate_turns(transcript: list[dict]) -> list[dict]:
             continue
 
         t = turn["time_in_call_secs"]
-        # Collect all consecutive agent turns at this timestamp
-        group = [turn]
+        # Keep the first highest-priority turn among consecutive agent turns at this timestamp
+        best = turn
+        best_priority = turn_priority(turn)
         j = i + 1
-        while j < len(transcript) and transcript[j]["role"] == "agent" and transcript[j]["time_in_call_secs"] == t:
-            group.append(transcript[j])
+        while j < n and transcript[j]["role"] == "agent" and transcript[j]["time_in_call_secs"] == t:
+            priority = turn_priority(transcript[j])
+            if priority > best_priority:
+                best, best_priority = transcript[j], priority
             j += 1
 
-        # Keep highest priority
-        best = max(group, key=turn_priority)
+        if collapsed is not None and j - i > 1:
+            collapsed[len(cleaned)] = transcript[i:j]
         cleaned.append(best)
         i = j
 
     return cleaned
 
 
-def extract_turns(conv_id: str, transcript: list[dict], node_map: dict, root_llm: str) -> list[dict]:
+def next_later_times(cleaned: list[dict]) -> list[Optional[int]]:
     """
-    Extract per-agent-turn records with latency and node attribution.
-    Returns list of turn dicts.
+    For each turn, the first time_in_call_secs after it that is strictly
+    greater than its own (None if there is none). Computed right-to-left with
+    a monotonic stack, so the whole transcript costs O(n) instead of one
+    forward scan per turn.
     """
-    cleaned = deduplicate_turns(transcript)
+    result: list[Optional[int]] = [None] * len(cleaned)
+    stack: list[int] = []  # later times; strictly increasing from top to bottom
+    for idx in range(len(cleaned) - 1, -1, -1):
+        t = cleaned[idx].get("time_in_call_secs", 0)
+        if t is None:
+            continue
+        while stack and stack[-1] <= t:
+            stack.pop()
+        result[idx] = stack[-1] if stack else None
+        # Turns without a timestamp never count as "the next time"
+        if "time_in_call_secs" in cleaned[idx]:
+            stack.append(t)
+    return result
+
+
+def prep_timing(pending: list[dict], speech: dict) -> dict:
+    """
+    Tool-call prep timing for `speech`, from the agent turns collected since
+    the previous speech turn (an empty dict when none called a tool):
+
+      prep_tool_names    — tools called, in order;
+      prep_llm_ttfb_ms   — summed LLM TTFB of the prep turns (the extra LLM
+                           call(s) that decided on the tool call);
+      tool_round_trip_ms — first prep turn → speech turn, from
+                           time_in_call_secs (whole seconds, so ±1 s; 0 when
+                           the prep shares the reply's second).
+
+    The payloads seen so far report no per-tool execution time, so the
+    round trip is the only measure of the tool call itself.
+    """
+    speech_time = speech.get("time_in_call_secs", 0)
+    names = []
+    prep_ttfb = None
+    first_time = None
+    for t in pending:
+        if t is speech:
+            continue
+        calls = t.get("tool_calls") or []
+        if not calls:
+            continue
+        names.extend(tc.get("tool_name") or "" for tc in calls)
+        if first_time is None:
+            first_time = t.get("time_in_call_secs", speech_time)
+        metrics = (t.get("conversation_turn_metrics") or {}).get("metrics", {}) or {}
+        ttfb = metrics.get("convai_llm_service_ttfb")
+        if ttfb:
+            prep_ttfb = (prep_ttfb or 0) + round(ttfb.get("elapsed_time", 0) * 1000)
+    if not names:
+        return {}
+    return {
+        "prep_tool_names": names,
+        "prep_llm_ttfb_ms": prep_ttfb,
+        "tool_round_trip_ms": (speech_time - first_time) * 1000,
+    }
+
+
+def latency_budget(
+    llm_ttfb_ms: Optional[int],
+    ttf_sentence_ms: Optional[int],
+    tts_ttfb_ms: Optional[int],
+    gap_secs: Optional[int],
+) -> tuple[Optional[int], Optional[int], Optional[int], Optional[int]]:
+    """
+    Split one turn's perceived latency into its serial components.
+
+    The agent's critical path to first audio is LLM first byte → first
+    complete sentence (the first chunk TTS can start on) → TTS first byte:
+        critical_path = llm_ttfb + llm_to_sentence + tts_ttfb
+    perceived is the coarse gap from the preceding user turn start, and the
+    residual is whatever it holds beyond the critical path — the user still
+    speaking, end-of-turn detection, transport and second-level rounding
+    (clamped at 0 when rounding puts the gap below the critical path).
+    Returns (llm_to_sentence, critical_path, perceived, residual); the
+    components are None unless all three service metrics were reported.
+    """
+    perceived = gap_secs * 1000 if gap_secs is not None else None
+    if llm_ttfb_ms is None or ttf_sentence_ms is None or tts_ttfb_ms is None:
+        return None, None, perceived, None
+    to_sentence = max(ttf_sentence_ms - llm_ttfb_ms, 0)
+    critical = llm_ttfb_ms + to_sentence + tts_ttfb_ms
+    residual = max(perceived - critical, 0) if perceived is not None else None
+    return to_sentence, critical, perceived, residual
+
+
+def extract_turns(conv_id: str, transcript: list[dict], node_map: dict, root_llm: str) -> list[TurnRecord]:
+    """
+    Extract per-agent-turn records with latency, node attribution and the
+    latency budget decomposition (see latency_budget). Returns a list of
+    TurnRecords (export_turn gives the raw-JSON dict).
+
+    Tool-call prep turns — tool-only agent turns, whether deduplicate_turns
+    dropped them (same second as the reply) or kept them (own second) — are
+    paired with the next speech turn, which records their tools, the prep
+    LLM TTFB and the coarse prep→speech round trip (see prep_timing). A user
+    turn in between abandons the pairing.
+
+    prior_transcript_chars counts the characters of every user and agent
+    message before the turn, same-second duplicates included: the
+    conversation length the LLM context grows with (system prompt and tool
+    results come on top and are not in the payload).
+    """
+    collapsed: dict[int, list[dict]] = {}
+    cleaned = deduplicate_turns(transcript, collapsed)
+    next_times = next_later_times(cleaned)
     records = []
     turn_index = 0
+    prev_user_time = None
+    pending: list[dict] = []  # agent turns since the last speech turn (prep side channel)
+    transcript_chars = 0
 
     for idx, turn in enumerate(cleaned):
+        group = collapsed.get(idx)  # same-second turns, this one included
+        prior_chars = transcript_chars
+        for t in group or (turn,):
+            transcript_chars += len(t.get("message") or "")
+
         if turn["role"] != "agent":
+            if turn["role"] == "user":
+                prev_user_time = turn.get("time_in_call_secs", 0)
+                pending = []
             continue
 
+        if group:
+            pending.extend(group)
+
         # Skip turns with no content at all (pure empty artifacts)
         msg = turn.get("message") or ""
         tool_calls = turn.get("tool_calls") or []
-        if not msg.strip() and not tool_calls:
+        spoken = bool(msg.strip())
+        if not spoken and not tool_calls:
             continue
 
+        prep = {}
+        if spoken:
+            if pending:
+                prep = prep_timing(pending, turn)
+                pending = []
+        elif not group:
+            pending.append(turn)
+
         # ---- Node attribution (Approach A) ----
-        node_id = (turn.get("agent_metadata") or {}).get("workflow_node_id", "unknown")
+        node_id = (turn.get("agent_metadata") or {}).get("workflow_node_id") or "unknown"
         node_info = node_map.get(node_id, {
             "label": f"unknown:{node_id[:20]}",
             "llm_model": root_llm,
@@ -268,56 +1396,341 @@ def extract_turns(conv_id: str, transcript: list[dict], node_map: dict, root_llm
         # Response latency = time from end of previous user turn to this agent turn start.
         # Only second-level resolution from time_in_call_secs.
         agent_time = turn.get("time_in_call_secs", 0)
-        prev_user_time = None
-        for prev in reversed(cleaned[:idx]):
-            if prev["role"] == "user":
-                prev_user_time = prev.get("time_in_call_secs", 0)
-                break
         gap_secs = (agent_time - prev_user_time) if prev_user_time is not None else None
-        response_latency_ms = gap_secs * 1000 if gap_secs is not None else None
 
         # Turn duration: seconds until next turn starts
-        next_time = None
-        for nxt in cleaned[idx + 1:]:
-            next_time_val = nxt.get("time_in_call_secs")
-            if next_time_val is not None and next_time_val > agent_time:
-                next_time = next_time_val
-                break
+        next_time = next_times[idx]
         turn_duration_ms = (next_time - agent_time) * 1000 if next_time is not None else None
 
         # Content counts
         words = len(msg.split()) if msg.strip() else 0
         chars = len(msg)
 
-        # Timestamp ISO
-        timestamp_iso = None  # absolute timestamp not available per turn; use conv start + offset
-
-        records.append({
-            "conversation_id": conv_id,
-            "turn_index": turn_index,
-            "time_in_call_secs": agent_time,
-            "role": "agent",
-            "active_node_id": node_id,
-            "active_node": node_info["label"],
-            "active_llm": node_info["llm_model"],
-            "llm_type": node_info["llm_type"],
-            "llm_ttfb_ms": llm_ttfb_ms,                # LLM component only (high-precision)
-            "tts_ttfb_ms": tts_ttfb_ms,                # TTS component
-            "ttf_first_sentence_ms": ttf_sentence_ms,  # time to first complete sentence
-            "response_latency_secs_coarse": gap_secs,  # full gap (second-level only)
-            "turn_duration_ms": turn_duration_ms,
-            "response_word_count": words,
-            "response_char_count": chars,
-            "has_tool_calls": bool(tool_calls),
-            "tool_names": [tc.get("tool_name", "") for tc in tool_calls] if tool_calls else [],
-            "interrupted": turn.get("interrupted", False),
-            "node_attribution_method": "Approach A (workflow_node_id in agent_metadata)",
-        })
+        records.append(TurnRecord(
+            conv_id,
+            turn_index,
+            agent_time,
+            "agent",
+            node_id,
+            node_info["label"],
+            node_info["llm_model"],
+            node_info["llm_type"],
+            llm_ttfb_ms,       # LLM component only (high-precision)
+            tts_ttfb_ms,       # TTS component
+            ttf_sentence_ms,   # time to first complete sentence
+            gap_secs,          # response_latency_secs_coarse: full gap (second-level only)
+            turn_duration_ms,
+            words,
+            chars,
+            bool(tool_calls),
+            [tc.get("tool_name") or "" for tc in tool_calls] if tool_calls else (),
+            turn.get("interrupted", False),
+            prior_transcript_chars=prior_chars,
+            **prep,
+        ))
         turn_index += 1
 
     return records
 
 
+def fetch_and_extract_all(
+    qualifying: Iterable[dict],
+    client: ApiClient,
+    node_map: dict,
+    root_llm: str,
+    concurrency: int = FETCH_CONCURRENCY,
+    cache: Optional[DetailCache] = None,
+    on_conversation: Optional[Callable[[dict, list[dict]], None]] = None,
+    details_dir: Optional[str] = None,
+    window: int = PIPELINE_WINDOW,
+    metrics: Optional[RunMetrics] = None,
+) -> tuple[list[dict], list[dict], list[dict]]:
+    """
+    Producer/consumer pipeline: a producer thread pulls conversations from
+    `qualifying` (a list, or a generator such as iter_qualifying_conversations
+    that pages the list API lazily) and submits each detail download to a pool
+    of `concurrency` workers; this thread runs extract_turns on each detail as
+    soon as it arrives. List paging, detail downloads and extraction overlap.
+
+    At most `window` conversations are in flight (submitted but not yet
+    released); when the window is full the producer blocks, which also pauses
+    paging — backpressure keeps memory bounded however many conversations the
+    source yields. Turns are released in source order regardless of
+    completion order, so the raw output and summary are identical to a
+    sequential run.
+
+    Returns (conversations, all_turns, failures): every conversation taken
+    from the source in order (including failed ones), the extracted turns,
+    and structured failures. A conversation whose detail request fails after
+    retries is skipped and reported in `failures` instead of aborting the run.
+    When `on_conversation(conv, turns)` is given, each conversation is handed
+    to it as soon as it and every conversation before it are done, and
+    all_turns is returned empty — the caller streams instead of holding the
+    whole dataset. An ApiError raised by the source itself (list paging)
+    propagates to the caller.
+
+    Details of finished conversations (status "done") never change, so they
+    are read from and written to `cache` when one is given. With
+    `details_dir`, every payload is also saved there for offline replay.
+
+    With `metrics`, per-conversation extraction time is recorded, along with
+    how long this thread waited on downloads (pipeline_wait_secs) and spent
+    in on_conversation (sink_secs).
+    """
+    def fetch(cid: str) -> dict:
+        key = f"conversation:{cid}"
+        detail = cache.get(key) if cache else None
+        if detail is None:
+            detail = client.get(f"/conversations/{cid}")
+            if cache and detail.get("status") == "done":
+                cache.put(key, detail)
+        if details_dir:
+            save_detail(details_dir, cid, detail)
+        return detail
+
+    conversations: list[dict] = []
+    all_turns = []
+    failures = []
+    done: dict[int, Optional[list[dict]]] = {}  # completed out of order; None = failed
+    next_i = 0
+    results: queue.Queue = queue.Queue()
+    slots = threading.Semaphore(max(1, window))
+    stop = threading.Event()
+    source_end = object()
+
+    def produce(pool: ThreadPoolExecutor) -> None:
+        try:
+            for i, conv in enumerate(qualifying):
+                slots.acquire()
+                if stop.is_set():
+                    return
+                conversations.append(conv)
+                future = pool.submit(fetch, conv["conversation_id"])
+                future.add_done_callback(lambda f, i=i: results.put((i, f)))
+            results.put((source_end, None))
+        except BaseException as e:  # list paging failed: hand it to the consumer
+            results.put((source_end, e))
+
+    def release() -> None:
+        nonlocal next_i
+        while next_i in done:
+            turns = done.pop(next_i)
+            if turns is not None:
+                if on_conversation is not None:
+                    started = time.perf_counter()
+                    on_conversation(conversations[next_i], turns)
+                    if metrics:
+                        metrics.count("sink_secs", time.perf_counter() - started)
+                else:
+                    all_turns.extend(turns)
+            next_i += 1
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        producer = threading.Thread(target=produce, args=(pool,), name="conversation-list", daemon=True)
+        producer.start()
+        total = None
+        try:
+            while total is None or next_i < total:
+                started = time.perf_counter()
+                i, payload = results.get()
+                if metrics:
+                    metrics.count("pipeline_wait_secs", time.perf_counter() - started)
+                if i is source_end:
+                    if payload is not None:
+                        raise payload
+                    total = len(conversations)
+                    continue
+                c = conversations[i]
+                cid = c["conversation_id"]
+                try:
+                    detail = payload.result()
+                except ApiError as e:
+                    print(f"  FAILED {cid}: {e} (after {e.attempts} attempts) — skipping")
+                    failures.append({"conversation_id": cid, **e.to_dict()})
+                    done[i] = None
+                    release()
+                    continue
+                transcript = detail.get("transcript", []) or []
+                started = time.perf_counter()
+                turns = extract_turns(cid, transcript, node_map, root_llm)
+                if metrics:
+                    metrics.record_extraction(cid, time.perf_counter() - started, len(transcript), len(turns))
+                print(f"  Fetched {cid} ({c['duration_seconds']}s): "
+                      f"{len(transcript)} raw turns → {len(turns)} agent turns extracted")
+                done[i] = turns
+                release()
+        except BaseException:
+            stop.set()
+            slots.release()  # unblock a producer waiting for a slot
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        producer.join()
+
+    order = {c["conversation_id"]: i for i, c in enumerate(conversations)}
+    failures.sort(key=lambda f: order[f["conversation_id"]])
+    return conversations, all_turns, failures
+
+
+# ---------------------------------------------------------------------------
+# Incremental mode: start-time watermark + raw-JSON merge
+# ---------------------------------------------------------------------------
+
+def empty_watermark() -> dict:
+    return {"newest_start_time": None, "processed_ids": [], "pending_ids": []}
+
+
+def load_raw_output(path: str) -> Optional[dict]:
+    """Load a previous jrvs_v3_latency_raw.json, or None if there isn't one."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f, object_hook=compact_turn_hook)
+
+
+def fetch_new_conversations(
+    client: ApiClient,
+    watermark: dict,
+    limit: int = MAX_CONVERSATIONS,
+) -> tuple[list[dict], list[str]]:
+    """
+    Page the conversation list (newest first) only until it reaches history
+    already covered by `watermark`: the first conversation that is either in
+    processed_ids or started before newest_start_time ends pagination.
+
+    Returns (new_qualifying, pending_ids). Only finished conversations are
+    returned for analysis; ones still in progress are reported as pending so
+    the next run re-checks them even after the watermark has moved past them.
+    If more than `limit` new conversations qualify, the oldest ones are taken
+    so the watermark advances without leaving a gap.
+    """
+    print(f"\n[Step 2] Fetching new conversations for agent {AGENT_ID} (incremental)...")
+    processed = set(watermark.get("processed_ids", []))
+    newest = watermark.get("newest_start_time")
+    new = []
+    pending = []
+
+    reached_known = False
+    for conversations in iter_conversation_pages(client):
+        for conv in conversations:
+            start = conv.get("start_time_unix_secs")
+            if conv["conversation_id"] in processed or (
+                newest is not None and start is not None and start < newest
+            ):
+                reached_known = True
+                break
+            if conv.get("status") != "done":
+                pending.append(conv["conversation_id"])
+                continue
+            if (conv.get("call_duration_secs", 0) or 0) >= MIN_DURATION_SECS:
+                new.append(conversation_entry(conv))
+        if reached_known:
+            break
+
+    if len(new) > limit:
+        print(f"  {len(new)} new conversations; analyzing the oldest {limit} this run")
+        new = new[-limit:]
+    print(f"  Found {len(new)} new qualifying conversations, {len(pending)} still in progress")
+    print_conversations(new)
+    return new, pending
+
+
+def recheck_pending(
+    client: ApiClient,
+    pending_ids: list[str],
+    cache: Optional[DetailCache] = None,
+) -> tuple[list[dict], list[str]]:
+    """
+    Look up conversations that were in progress (or failed) on a previous run.
+    Returns (now_qualifying, still_pending).
+    """
+    ready = []
+    still_pending = []
+    for cid in pending_ids:
+        try:
+            detail = client.get(f"/conversations/{cid}")
+        except ApiError as e:
+            print(f"  Pending {cid}: {e} — will retry next run")
+            still_pending.append(cid)
+            continue
+        status = detail.get("status", "unknown")
+        if status != "done":
+            still_pending.append(cid)
+            continue
+        if cache:
+            cache.put(f"conversation:{cid}", detail)
+        meta = detail.get("metadata") or {}
+        duration = meta.get("call_duration_secs", 0) or 0
+        if duration >= MIN_DURATION_SECS:
+            ready.append({
+                "conversation_id": cid,
+                "start_time": meta.get("start_time_unix_secs"),
+                "duration_seconds": duration,
+                "status": status,
+                "call_successful": (detail.get("analysis") or {}).get("call_successful"),
+                "message_count": len(detail.get("transcript") or []),
+            })
+    if pending_ids:
+        print(f"  Re-checked {len(pending_ids)} pending conversations: "
+              f"{len(ready)} now qualify, {len(still_pending)} still pending")
+    return ready, still_pending
+
+
+def merge_raw_turns(
+    existing: Optional[dict],
+    conversations: list[dict],
+    turns: list[dict],
+) -> tuple[list[dict], list[dict]]:
+    """
+    Merge newly analyzed conversations and turns into a previous raw output.
+    A re-analyzed conversation replaces its earlier turns. Conversations are
+    ordered newest first and turns follow conversation order.
+    """
+    if not existing:
+        return conversations, turns
+    by_id = {c["conversation_id"]: c for c in existing.get("conversations", [])}
+    by_id.update({c["conversation_id"]: c for c in conversations})
+    merged_convs = sorted(by_id.values(), key=lambda c: -(c.get("start_time") or 0))
+
+    replaced = {c["conversation_id"] for c in conversations}
+    turns_by_conv: dict[str, list[dict]] = {}
+    for t in existing.get("turns", []):
+        if t["conversation_id"] not in replaced:
+            turns_by_conv.setdefault(t["conversation_id"], []).append(t)
+    for t in turns:
+        turns_by_conv.setdefault(t["conversation_id"], []).append(t)
+
+    merged_turns = []
+    for c in merged_convs:
+        merged_turns.extend(turns_by_conv.get(c["conversation_id"], []))
+    return merged_convs, merged_turns
+
+
+def update_watermark(
+    previous: Optional[dict],
+    analyzed: list[dict],
+    pending_ids: list[str],
+) -> dict:
+    """Fold this run's finished conversations into the watermark."""
+    wm = previous or empty_watermark()
+    processed = set(wm.get("processed_ids", []))
+    newest = wm.get("newest_start_time")
+    pending = set(pending_ids)
+    for c in analyzed:
+        if c.get("status") != "done":
+            pending.add(c["conversation_id"])
+            continue
+        processed.add(c["conversation_id"])
+        if c.get("start_time") is not None and (newest is None or c["start_time"] > newest):
+            newest = c["start_time"]
+    pending -= processed
+    return {
+        "newest_start_time": newest,
+        "processed_ids": sorted(processed),
+        "pending_ids": sorted(pending),
+    }
+
+
 # ---------------------------------------------------------------------------
 # Statistics helpers
 # ---------------------------------------------------------------------------
@@ -333,9 +1746,13 @@ def percentile(sorted_vals: list[float], p: float) -> float:
 
 
 def stats(values: list[float]) -> dict:
-    if not values:
+    return stats_sorted(sorted(values))
+
+
+def stats_sorted(s: list[float]) -> dict:
+    """stats() for an already ascending-sorted list."""
+    if not s:
         return {"count": 0, "mean": None, "median": None, "min": None, "max": None, "p95": None, "p75": None}
-    s = sorted(values)
     return {
         "count": len(s),
         "mean": round(statistics.mean(s), 1),
@@ -348,26 +1765,1033 @@ def stats(values: list[float]) -> dict:
 
 
 # ---------------------------------------------------------------------------
-# Step 5: Build outputs
+# Columnar turn store
 # ---------------------------------------------------------------------------
 
-def build_summary_md(
-    all_turns: list[dict],
-    qualifying: list[dict],
-    root_llm: str,
-    node_map: dict,
-) -> str:
-    lines = []
+class TurnTable:
+    """
+    Struct-of-arrays copy of extract_turns records.
 
-    def h1(t): lines.append(f"# {t}\n")
-    def h2(t): lines.append(f"## {t}\n")
-    def h3(t): lines.append(f"### {t}\n")
-    def rule(): lines.append("---\n")
-    def blank(): lines.append("")
+    Repeated strings (conversation, node, LLM, llm_type, tool names) are
+    dictionary-encoded: each column holds compact integer codes into a shared
+    list of labels. Numeric fields live in float64 arrays with NaN for None;
+    a column remembers whether every value it was given was an int so stats
+    come back with the same types (and therefore the same rendering) as
+    stats() on the original dict values. Tool names are stored CSR-style:
+    tool_offsets[i]:tool_offsets[i + 1] indexes into tool_codes.
 
-    h1("JRVS V3 Conversational Latency Report")
-    lines.append(f"**Analysis date:** {ANALYSIS_DATE}  ")
-    lines.append(f"**Agent:** `{AGENT_ID}`  ")
+    The table is built from the records, not instead of them: raw JSON/JSONL
+    export, the incremental merge and the SQLite index still need whole
+    records. Without numpy the statistics are plain Python loops over the
+    arrays; the gain is fewer objects per row, not vectorized arithmetic.
+    Streaming runs add and drop one conversation at a time, and
+    LatencyAggregator.consume releases each record once its row is in, so
+    records and table are never both held for the whole dataset.
+    """
+
+    CATEGORICAL = ("conversation_id", "active_node_id", "active_node", "active_llm", "llm_type")
+    NUMERIC = (
+        "turn_index",
+        "time_in_call_secs",
+        "llm_ttfb_ms",
+        "tts_ttfb_ms",
+        "ttf_first_sentence_ms",
+        "response_latency_secs_coarse",
+        "turn_duration_ms",
+        "response_word_count",
+        "response_char_count",
+        "llm_to_sentence_ms",
+        "critical_path_ms",
+        "perceived_latency_ms",
+        "residual_ms",
+        "prior_transcript_chars",
+    )
+    FLAGS = ("has_tool_calls", "interrupted")
+    # Serial components of critical_path_ms, in pipeline order.
+    BUDGET_COMPONENTS = ("llm_ttfb_ms", "llm_to_sentence_ms", "tts_ttfb_ms")
+
+    def __init__(self):
+        self.labels: dict[str, list[str]] = {name: [] for name in self.CATEGORICAL}
+        self._lookup: dict[str, dict[str, int]] = {name: {} for name in self.CATEGORICAL}
+        self.codes = {name: array("I") for name in self.CATEGORICAL}
+        self.values = {name: array("d") for name in self.NUMERIC}
+        self.integral = {name: True for name in self.NUMERIC}
+        self.flags = {name: array("b") for name in self.FLAGS}
+        self.tool_labels: list[str] = []
+        self._tool_lookup: dict[str, int] = {}
+        self.tool_codes = array("I")
+        self.tool_offsets = array("I", [0])
+
+    @classmethod
+    def from_turns(cls, turns) -> "TurnTable":
+        table = cls()
+        for t in turns:
+            table.append(t)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.tool_offsets) - 1
+
+    def _encode(self, name: str, label: str) -> int:
+        lookup = self._lookup[name]
+        code = lookup.get(label)
+        if code is None:
+            code = lookup[label] = len(self.labels[name])
+            self.labels[name].append(label)
+        return code
+
+    def append(self, turn: dict) -> None:
+        for name in self.CATEGORICAL:
+            self.codes[name].append(self._encode(name, turn[name]))
+        for name in self.NUMERIC:
+            v = turn[name]
+            if v is None:
+                self.values[name].append(NAN)
+            else:
+                if self.integral[name] and not isinstance(v, int):
+                    self.integral[name] = False
+                self.values[name].append(v)
+        for name in self.FLAGS:
+            self.flags[name].append(1 if turn.get(name) else 0)
+        for tool in turn.get("tool_names") or ():
+            code = self._tool_lookup.get(tool)
+            if code is None:
+                code = self._tool_lookup[tool] = len(self.tool_labels)
+                self.tool_labels.append(tool)
+            self.tool_codes.append(code)
+        self.tool_offsets.append(len(self.tool_codes))
+
+    def merge(self, other: "TurnTable") -> "TurnTable":
+        """Append `other`'s rows after this table's, re-encoding its labels."""
+        for name in self.CATEGORICAL:
+            remap = [self._encode(name, label) for label in other.labels[name]]
+            self.codes[name].extend(remap[c] for c in other.codes[name])
+        for name in self.NUMERIC:
+            self.values[name].extend(other.values[name])
+            self.integral[name] = self.integral[name] and other.integral[name]
+        for name in self.FLAGS:
+            self.flags[name].extend(other.flags[name])
+        remap = []
+        for tool in other.tool_labels:
+            code = self._tool_lookup.get(tool)
+            if code is None:
+                code = self._tool_lookup[tool] = len(self.tool_labels)
+                self.tool_labels.append(tool)
+            remap.append(code)
+        base = len(self.tool_codes)
+        self.tool_codes.extend(remap[c] for c in other.tool_codes)
+        self.tool_offsets.extend(base + off for off in other.tool_offsets[1:])
+        return self
+
+    def present(self, field: str) -> list[float]:
+        """Non-missing values of a numeric column, in row order, with original types."""
+        vals = [v for v in self.values[field] if v == v]  # NaN != NaN
+        if self.integral[field]:
+            return [int(v) for v in vals]
+        return vals
+
+    def column_stats(self, field: str) -> dict:
+        return stats(self.present(field))
+
+    def group_stats(self, field: str, by: str) -> dict[str, dict]:
+        """
+        stats() of `field` for every label of categorical column `by`.
+
+        One pass over the two columns drops each non-missing value into its
+        group's list (indexed by code, no per-row tuples or label lookups),
+        then each list is sorted once. Labels with no non-missing values get
+        stats([]).
+        """
+        labels = self.labels[by]
+        groups: list[list[float]] = [[] for _ in labels]
+        add = [g.append for g in groups]
+        for code, v in zip(self.codes[by], self.values[field]):
+            if v == v:  # NaN != NaN
+                add[code](v)
+        integral = self.integral[field]
+        result = {}
+        for label, vals in zip(labels, groups):
+            if integral:
+                vals = [int(v) for v in vals]
+            vals.sort()
+            result[label] = stats_sorted(vals)
+        return result
+
+    def latency_budget(self, by: str) -> dict[str, dict]:
+        """
+        Critical-path attribution for every label of categorical column `by`
+        (that has decomposed turns) plus "*" for all turns:
+
+          share    — each component's fraction of the summed critical path,
+                     i.e. how much of the mean a component accounts for;
+          p95      — P95 of critical_path_ms;
+          tail     — mean of each component over the turns at or above that
+                     P95, i.e. where the P95 budget goes;
+          residual — median residual_ms (coarse, see latency_budget).
+        """
+        critical = self.values["critical_path_ms"]
+        residual = self.values["residual_ms"]
+        comps = [self.values[name] for name in self.BUDGET_COMPONENTS]
+        codes = self.codes[by]
+        rows: dict[int, list[int]] = {}
+        for i, v in enumerate(critical):
+            if v == v:
+                rows.setdefault(codes[i], []).append(i)
+
+        def summarize(idx: list[int]) -> dict:
+            crit = sorted(critical[i] for i in idx)
+            total = sum(crit)
+            p95 = percentile(crit, 95)
+            tail = [i for i in idx if critical[i] >= p95]
+            res = sorted(residual[i] for i in idx if residual[i] == residual[i])
+            return {
+                "count": len(idx),
+                "mean": round(total / len(idx), 1),
+                "share": {
+                    name: (sum(col[i] for i in idx) / total if total else 0.0)
+                    for name, col in zip(self.BUDGET_COMPONENTS, comps)
+                },
+                "p95": round(p95, 1),
+                "tail_count": len(tail),
+                "tail": {
+                    name: round(sum(col[i] for i in tail) / len(tail), 1)
+                    for name, col in zip(self.BUDGET_COMPONENTS, comps)
+                },
+                "residual": round(statistics.median(res), 1) if res else None,
+            }
+
+        labels = self.labels[by]
+        result = {labels[code]: summarize(idx) for code, idx in rows.items()}
+        if rows:
+            result["*"] = summarize([i for idx in rows.values() for i in idx])
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Mergeable quantile sketches
+# ---------------------------------------------------------------------------
+
+SKETCH_METRICS = ("llm_ttfb_ms", "tts_ttfb_ms", "ttf_first_sentence_ms")
+SKETCH_RELATIVE_ACCURACY = 0.01  # quantile estimates within ±1% of the true value
+SKETCH_FORMAT = "jrvs-latency-sketches/1"
+
+
+class QuantileSketch:
+    """
+    Log-bucketed histogram (DDSketch-style) for non-negative latencies.
+
+    A positive value v lands in bucket ceil(log_gamma(v)) with
+    gamma = (1 + a) / (1 - a), so every quantile estimate is within relative
+    error `a` of a value actually observed at that rank. Zeros are counted
+    separately. Sketches with the same accuracy merge by adding bucket
+    counts, so percentiles of any union of runs, days or workers can be
+    answered without the raw values. Memory is O(log(max/min) / a) buckets
+    regardless of how many values are added.
+    """
+
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different relative accuracy")
+        for key, n in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, p: float) -> Optional[float]:
+        """Estimate the p-th percentile (0–100) at the same rank percentile() uses."""
+        if not self.count:
+            return None
+        rank = (self.count - 1) * p / 100
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                estimate = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        """Compact form: dense bin counts starting at `offset`."""
+        out = {
+            "count": self.count,
+            "zero": self.zero_count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "offset": 0,
+            "bins": [],
+        }
+        if self.bins:
+            lo, hi = min(self.bins), max(self.bins)
+            out["offset"] = lo
+            out["bins"] = [self.bins.get(k, 0) for k in range(lo, hi + 1)]
+        return out
+
+    @classmethod
+    def from_dict(cls, d: dict, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY) -> "QuantileSketch":
+        sk = cls(relative_accuracy)
+        sk.count = d["count"]
+        sk.zero_count = d["zero"]
+        sk.sum = d["sum"]
+        sk.min = d["min"] if d["min"] is not None else math.inf
+        sk.max = d["max"] if d["max"] is not None else -math.inf
+        sk.bins = {d["offset"] + i: n for i, n in enumerate(d["bins"]) if n}
+        return sk
+
+
+class SketchSet:
+    """
+    QuantileSketches for SKETCH_METRICS, partitioned by UTC day of the
+    conversation start and keyed by scope: "all", "node" (label) and "llm".
+
+    Each day also records the conversation ids it covers. Merging two sets
+    adds sketches day by day when their conversations are disjoint; when one
+    day's conversations are a superset of the other's, the superset wins, so
+    re-merging overlapping incremental runs never double-counts.
+    """
+
+    SCOPES = ("all", "node", "llm")
+
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        # day -> {"conversation_ids": set, "sketches": {metric: {scope: {key: sketch}}}}
+        self.days: dict[str, dict] = {}
+
+    def _day(self, day: str) -> dict:
+        entry = self.days.get(day)
+        if entry is None:
+            entry = self.days[day] = {
+                "conversation_ids": set(),
+                "sketches": {m: {scope: {} for scope in self.SCOPES} for m in SKETCH_METRICS},
+            }
+        return entry
+
+    def _sketch(self, day_entry: dict, metric: str, scope: str, key: str) -> QuantileSketch:
+        group = day_entry["sketches"][metric][scope]
+        sk = group.get(key)
+        if sk is None:
+            sk = group[key] = QuantileSketch(self.relative_accuracy)
+        return sk
+
+    def add_turn(self, turn: dict, day: str) -> None:
+        entry = self._day(day)
+        entry["conversation_ids"].add(turn["conversation_id"])
+        for metric in SKETCH_METRICS:
+            v = turn[metric]
+            if v is None:
+                continue
+            self._sketch(entry, metric, "all", "all").add(v)
+            self._sketch(entry, metric, "node", turn["active_node"]).add(v)
+            self._sketch(entry, metric, "llm", turn["active_llm"]).add(v)
+
+    def merge(self, other: "SketchSet") -> "SketchSet":
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketch sets with different relative accuracy")
+        for day, theirs in other.days.items():
+            mine = self.days.get(day)
+            if mine is None or mine["conversation_ids"] <= theirs["conversation_ids"]:
+                self.days[day] = copy.deepcopy(theirs)
+                continue
+            if theirs["conversation_ids"] <= mine["conversation_ids"]:
+                continue
+            if mine["conversation_ids"] & theirs["conversation_ids"]:
+                print(f"  WARNING: sketches for {day} partially overlap — keeping the larger set")
+                if len(theirs["conversation_ids"]) > len(mine["conversation_ids"]):
+                    self.days[day] = copy.deepcopy(theirs)
+                continue
+            mine["conversation_ids"] |= theirs["conversation_ids"]
+            for metric, scopes in theirs["sketches"].items():
+                for scope, group in scopes.items():
+                    for key, sk in group.items():
+                        self._sketch(mine, metric, scope, key).merge(sk)
+        return self
+
+    def combined(self, since: Optional[str] = None, until: Optional[str] = None) -> dict:
+        """Merge all days in [since, until] (inclusive, YYYY-MM-DD) into metric→scope→key→sketch."""
+        out = {m: {scope: {} for scope in self.SCOPES} for m in SKETCH_METRICS}
+        for day, entry in sorted(self.days.items()):
+            if (since and day < since) or (until and day > until):
+                continue
+            for metric, scopes in entry["sketches"].items():
+                for scope, group in scopes.items():
+                    for key, sk in group.items():
+                        target = out[metric][scope].get(key)
+                        if target is None:
+                            target = out[metric][scope][key] = QuantileSketch(self.relative_accuracy)
+                        target.merge(sk)
+        return out
+
+    def to_dict(self, agent_id: str) -> dict:
+        return {
+            "format": SKETCH_FORMAT,
+            "agent_id": agent_id,
+            "relative_accuracy": self.relative_accuracy,
+            "days": {
+                day: {
+                    "conversation_ids": sorted(entry["conversation_ids"]),
+                    "sketches": {
+                        metric: {
+                            scope: {key: sk.to_dict() for key, sk in group.items()}
+                            for scope, group in scopes.items()
+                        }
+                        for metric, scopes in entry["sketches"].items()
+                    },
+                }
+                for day, entry in sorted(self.days.items())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "SketchSet":
+        if d.get("format") != SKETCH_FORMAT:
+            raise ValueError(f"not a {SKETCH_FORMAT} file")
+        ss = cls(d["relative_accuracy"])
+        for day, entry in d["days"].items():
+            target = ss._day(day)
+            target["conversation_ids"] = set(entry["conversation_ids"])
+            for metric, scopes in entry["sketches"].items():
+                for scope, group in scopes.items():
+                    for key, sk in group.items():
+                        target["sketches"][metric][scope][key] = QuantileSketch.from_dict(sk, ss.relative_accuracy)
+        return ss
+
+
+def conversation_day(start_time: Optional[int]) -> str:
+    if not start_time:
+        return "unknown"
+    return datetime.fromtimestamp(start_time, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def load_sketch_files(paths: list[str]) -> SketchSet:
+    merged = None
+    for path in paths:
+        with open(path) as f:
+            ss = SketchSet.from_dict(json.load(f))
+        merged = ss if merged is None else merged.merge(ss)
+    return merged or SketchSet()
+
+
+def render_sketch_report(ss: SketchSet, since: Optional[str] = None, until: Optional[str] = None) -> str:
+    """Percentiles from merged sketches alone, plus a per-day global LLM TTFB trend."""
+    days = [d for d in sorted(ss.days) if not ((since and d < since) or (until and d > until))]
+    lines = ["# JRVS V3 Latency Percentiles (from sketches)", ""]
+    lines.append(f"**Days:** {days[0] if days else '—'} → {days[-1] if days else '—'} ({len(days)})  ")
+    n_convs = sum(len(ss.days[d]["conversation_ids"]) for d in days)
+    lines.append(f"**Conversations:** {n_convs}  ")
+    lines.append(f"**Relative accuracy:** ±{ss.relative_accuracy * 100:g}%  ")
+    lines.append("")
+
+    def fmt(v):
+        return "N/A" if v is None else round(v, 1)
+
+    combined = ss.combined(since, until)
+    for metric in SKETCH_METRICS:
+        lines.append(f"## {metric}\n")
+        lines.append("| Scope | Key | Count | Mean | P50 | P75 | P95 | P99 |")
+        lines.append("|---|---|---|---|---|---|---|---|")
+        for scope in SketchSet.SCOPES:
+            group = combined[metric][scope]
+            for key, sk in sorted(group.items(), key=lambda kv: -kv[1].count):
+                lines.append(
+                    f"| {scope} | {key} | {sk.count} | {fmt(sk.mean())} | {fmt(sk.quantile(50))} "
+                    f"| {fmt(sk.quantile(75))} | {fmt(sk.quantile(95))} | {fmt(sk.quantile(99))} |"
+                )
+        lines.append("")
+
+    lines.append("## Daily LLM TTFB trend (all nodes)\n")
+    lines.append("| Day | Conversations | Turns | P50 | P95 |")
+    lines.append("|---|---|---|---|---|")
+    for day in days:
+        entry = ss.days[day]
+        sk = entry["sketches"]["llm_ttfb_ms"]["all"].get("all")
+        if sk is None:
+            continue
+        lines.append(f"| {day} | {len(entry['conversation_ids'])} | {sk.count} | {fmt(sk.quantile(50))} | {fmt(sk.quantile(95))} |")
+    lines.append("")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Aggregation: one pass over turns → every group-by the report needs
+# ---------------------------------------------------------------------------
+
+TTFB_BUCKETS = [
+    (500, "<500ms"),
+    (1000, "500-999ms"),
+    (2000, "1000-1999ms"),
+    (3000, "2000-2999ms"),
+    (5000, "3000-4999ms"),
+    (math.inf, "≥5000ms"),
+]
+TTFB_BUCKET_EDGES = [edge for edge, _ in TTFB_BUCKETS]
+
+# Position of a turn relative to node changes within its conversation
+PHASE_OPENING = 0   # first transition_window turns of the conversation, before any transfer
+PHASE_TRANSFER = 1  # first transition_window turns after a node transfer
+PHASE_STEADY = 2    # everything else
+
+
+class LatencyAggregator:
+    """
+    Consumes turn records one at a time (add / extend) and keeps everything
+    the reports need: the columnar TurnTable for per-group statistics plus
+    per-node, per-LLM, per-tool, per-bucket and per-conversation counters and
+    the outlier list. Renderers read these attributes and never see the raw
+    turns, so any number of report formats can share one pass.
+
+    Group dicts preserve first-seen order, which the renderer relies on for
+    stable tie-breaking when sorting by count.
+
+    `conversations` (the raw JSON conversation list) supplies start times so
+    the mergeable quantile sketches can be partitioned by day; streaming
+    callers register conversations one at a time with add_conversation().
+
+    Node transfers are detected per conversation as turns arrive (turns of
+    one conversation must be added in order; conversations may interleave).
+    `phase` holds one PHASE_* code per TurnTable row, so post-transfer and
+    steady-state statistics come from the same columns as everything else.
+    """
+
+    def __init__(
+        self,
+        outlier_threshold_ms: float = OUTLIER_THRESHOLD_MS,
+        conversations: Optional[list[dict]] = None,
+        transition_window: int = TRANSITION_WINDOW,
+    ):
+        self.outlier_threshold_ms = outlier_threshold_ms
+        self.transition_window = transition_window
+        self._conv_days = {c["conversation_id"]: conversation_day(c.get("start_time")) for c in conversations or []}
+        self.sketches = SketchSet()
+        self.table = TurnTable()
+        self.total_turns = 0
+        self.conv_turn_counts: dict[str, int] = {}
+        self.node_turn_counts: dict[str, int] = {}
+        self.node_interrupted: dict[str, int] = {}
+        self.node_first_llm: dict[str, str] = {}
+        self.llm_turn_counts: dict[str, int] = {}
+        self.llm_nodes: dict[str, set] = {}
+        self.turns_with_tools = 0
+        self.tool_counts: dict[str, int] = {}
+        self.ttfb_buckets = [0] * len(TTFB_BUCKETS)
+        self.outliers: list[dict] = []
+        self.tool_episodes: list[dict] = []
+        self.no_tool_critical: dict[str, list[float]] = {}
+        self.phase = array("b")
+        self.transitions: dict[tuple[str, str], int] = {}
+        self.transition_first: dict[tuple[str, str], list[tuple]] = {}  # (llm_ttfb_ms, perceived_latency_ms)
+        self.transfer_outliers = 0
+        self._conv_node: dict[str, tuple[str, int, bool]] = {}  # cid → (node, turns since change, after transfer)
+
+    def add_conversation(self, conv: dict) -> None:
+        self._conv_days[conv["conversation_id"]] = conversation_day(conv.get("start_time"))
+
+    def add(self, t: dict) -> None:
+        self.table.append(t)
+        self.total_turns += 1
+
+        cid = t["conversation_id"]
+        self.conv_turn_counts[cid] = self.conv_turn_counts.get(cid, 0) + 1
+        self.sketches.add_turn(t, self._conv_days.get(cid, "unknown"))
+
+        node = t["active_node"]
+        llm = t["active_llm"]
+        prev = self._conv_node.get(cid)
+        if prev is None:
+            since, transferred = 0, False
+        elif prev[0] != node:
+            since, transferred = 0, True
+            edge = (prev[0], node)
+            self.transitions[edge] = self.transitions.get(edge, 0) + 1
+            self.transition_first.setdefault(edge, []).append((t["llm_ttfb_ms"], t["perceived_latency_ms"]))
+        else:
+            since, transferred = prev[1] + 1, prev[2]
+        self._conv_node[cid] = (node, since, transferred)
+        if since >= self.transition_window:
+            phase = PHASE_STEADY
+        else:
+            phase = PHASE_TRANSFER if transferred else PHASE_OPENING
+        self.phase.append(phase)
+        self.node_turn_counts[node] = self.node_turn_counts.get(node, 0) + 1
+        self.node_first_llm.setdefault(node, llm)
+        if t.get("interrupted"):
+            self.node_interrupted[node] = self.node_interrupted.get(node, 0) + 1
+        self.llm_turn_counts[llm] = self.llm_turn_counts.get(llm, 0) + 1
+        self.llm_nodes.setdefault(llm, set()).add(node)
+
+        if t.get("has_tool_calls"):
+            self.turns_with_tools += 1
+            for tn in t.get("tool_names", []):
+                self.tool_counts[tn] = self.tool_counts.get(tn, 0) + 1
+
+        critical = t["critical_path_ms"]
+        if t.get("prep_tool_names"):
+            self.tool_episodes.append({
+                "node": node,
+                "tools": t["prep_tool_names"],
+                "prep_llm_ttfb_ms": t["prep_llm_ttfb_ms"],
+                "tool_round_trip_ms": t["tool_round_trip_ms"],
+                "critical_path_ms": critical,
+            })
+        elif critical is not None and not t.get("has_tool_calls"):
+            self.no_tool_critical.setdefault(node, []).append(critical)
+
+        ttfb = t["llm_ttfb_ms"]
+        if ttfb is not None:
+            self.ttfb_buckets[bisect.bisect_right(TTFB_BUCKET_EDGES, ttfb)] += 1
+            if ttfb > self.outlier_threshold_ms:
+                if phase == PHASE_TRANSFER:
+                    self.transfer_outliers += 1
+                self.outliers.append({
+                    "conversation_id": cid,
+                    "turn_index": t["turn_index"],
+                    "time_in_call_secs": t["time_in_call_secs"],
+                    "active_node": node,
+                    "llm_ttfb_ms": ttfb,
+                    "response_word_count": t["response_word_count"],
+                    "interrupted": t["interrupted"],
+                })
+
+    def extend(self, turns) -> "LatencyAggregator":
+        for t in turns:
+            self.add(t)
+        return self
+
+    def consume(self, turns: list) -> "LatencyAggregator":
+        """
+        extend() that empties `turns` as it goes, so each record can be freed
+        once its row is in the table (peak memory is the records or the
+        table, not both). The caller must hold no other references to them.
+        """
+        for i, t in enumerate(turns):
+            turns[i] = None
+            self.add(t)
+        turns.clear()
+        return self
+
+    def merge(self, other: "LatencyAggregator") -> "LatencyAggregator":
+        """
+        Fold in a partial aggregate over other conversations, as if its turns
+        had been added after this one's. Merging partials of consecutive
+        slices of the conversation list, in order, reproduces a single pass
+        exactly (first-seen group order included).
+        """
+        def add_counts(mine: dict, theirs: dict) -> None:
+            for key, n in theirs.items():
+                mine[key] = mine.get(key, 0) + n
+
+        self._conv_days.update(other._conv_days)
+        self.sketches.merge(other.sketches)
+        self.table.merge(other.table)
+        self.total_turns += other.total_turns
+        add_counts(self.conv_turn_counts, other.conv_turn_counts)
+        add_counts(self.node_turn_counts, other.node_turn_counts)
+        add_counts(self.node_interrupted, other.node_interrupted)
+        for node, llm in other.node_first_llm.items():
+            self.node_first_llm.setdefault(node, llm)
+        add_counts(self.llm_turn_counts, other.llm_turn_counts)
+        for llm, nodes in other.llm_nodes.items():
+            self.llm_nodes.setdefault(llm, set()).update(nodes)
+        self.turns_with_tools += other.turns_with_tools
+        add_counts(self.tool_counts, other.tool_counts)
+        self.ttfb_buckets = [a + b for a, b in zip(self.ttfb_buckets, other.ttfb_buckets)]
+        self.outliers.extend(other.outliers)
+        self.tool_episodes.extend(other.tool_episodes)
+        for node, values in other.no_tool_critical.items():
+            self.no_tool_critical.setdefault(node, []).extend(values)
+        self.phase.extend(other.phase)
+        add_counts(self.transitions, other.transitions)
+        for edge, firsts in other.transition_first.items():
+            self.transition_first.setdefault(edge, []).extend(firsts)
+        self.transfer_outliers += other.transfer_outliers
+        self._conv_node.update(other._conv_node)
+        return self
+
+    def sorted_outliers(self) -> list[dict]:
+        return sorted(self.outliers, key=lambda x: -x["llm_ttfb_ms"])
+
+    def phase_stats(self, field: str) -> dict[str, dict[int, dict]]:
+        """stats() of `field` per node label and PHASE_* code (missing combinations are absent)."""
+        table = self.table
+        values = table.values[field]
+        codes = table.codes["active_node"]
+        groups: dict[tuple[int, int], list[float]] = {}
+        for code, phase, v in zip(codes, self.phase, values):
+            if v == v:
+                groups.setdefault((code, phase), []).append(v)
+        to_type = int if table.integral[field] else float
+        labels = table.labels["active_node"]
+        result: dict[str, dict[int, dict]] = {}
+        for (code, phase), vals in groups.items():
+            result.setdefault(labels[code], {})[phase] = stats([to_type(v) for v in vals])
+        return result
+
+    def phase_counts(self) -> list[int]:
+        counts = [0, 0, 0]
+        for phase in self.phase:
+            counts[phase] += 1
+        return counts
+
+    def tool_overhead(self, by: str) -> dict[str, dict]:
+        """
+        Delay tool calls add before the reply, grouped by "tool" or "node".
+
+        Each episode (a speech turn with paired prep turns) is split by
+        resolution:
+            added = prep LLM TTFB + post-tool excess       (milliseconds)
+            gap   = coarse prep→reply gap                  (whole seconds)
+        Post-tool excess is the reply's critical path minus the median
+        critical path of no-tool speech turns on the same node (the matched
+        baseline; 0 when either is missing). The gap is where the tool's own
+        execution time lands, but with ±1 s resolution it is reported
+        separately rather than added in. An episode calling several tools
+        counts toward each. Groups are ordered by total added delay, largest
+        first.
+        """
+        baseline = {node: statistics.median(v) for node, v in self.no_tool_critical.items()}
+        groups: dict[str, dict[str, list]] = {}
+        for ep in self.tool_episodes:
+            prep = ep["prep_llm_ttfb_ms"]
+            excess = None
+            if ep["critical_path_ms"] is not None and ep["node"] in baseline:
+                excess = ep["critical_path_ms"] - baseline[ep["node"]]
+            added = (prep or 0) + (excess or 0)
+            keys = dict.fromkeys(ep["tools"]) if by == "tool" else (ep["node"],)
+            for key in keys:
+                g = groups.setdefault(key, {"prep": [], "excess": [], "added": [], "gap": []})
+                if prep is not None:
+                    g["prep"].append(prep)
+                if excess is not None:
+                    g["excess"].append(excess)
+                g["added"].append(added)
+                g["gap"].append(ep["tool_round_trip_ms"] // 1000)
+        result = {}
+        for key, g in groups.items():
+            result[key] = {
+                "episodes": len(g["added"]),
+                "prep": stats(g["prep"]),
+                "excess": stats(g["excess"]),
+                "added": stats(g["added"]),
+                "total_secs": round(sum(g["added"]) / 1000, 1),
+                "gap": stats(g["gap"]),
+                "gap_nonzero": sum(1 for v in g["gap"] if v),
+            }
+        return dict(sorted(result.items(), key=lambda kv: -kv[1]["total_secs"]))
+
+
+def aggregate_turns(
+    turns,
+    outlier_threshold_ms: float = OUTLIER_THRESHOLD_MS,
+    conversations: Optional[list[dict]] = None,
+    transition_window: int = TRANSITION_WINDOW,
+) -> LatencyAggregator:
+    return LatencyAggregator(outlier_threshold_ms, conversations, transition_window).extend(turns)
+
+
+# ---------------------------------------------------------------------------
+# TTFB model: content, context size and position in the call
+# ---------------------------------------------------------------------------
+
+MODEL_MIN_TURNS = 50  # fewer turns with LLM TTFB: no model
+MODEL_MIN_NODE_TURNS = 30  # smaller nodes are folded into the reference node
+DRIFT_MIN_TURNS = 10  # per-conversation TTFB slope needs at least this many turns
+DRIFT_BUCKET_SECS = 600
+CALL_LENGTH_BUCKETS = [
+    (20 * 60, "<20 min"),
+    (40 * 60, "20–40 min"),
+    (60 * 60, "40–60 min"),
+    (math.inf, "≥60 min"),
+]
+
+
+def prior_agent_chars(table: TurnTable) -> list[float]:
+    """
+    Per row, the characters of agent speech earlier in the same conversation:
+    the fallback context measure for raw files written before
+    prior_transcript_chars existed, which lack the user side of the call.
+    """
+    totals: dict[int, float] = {}
+    out = []
+    for code, chars in zip(table.codes["conversation_id"], table.values["response_char_count"]):
+        total = totals.get(code, 0.0)
+        out.append(total)
+        if chars == chars:
+            totals[code] = total + chars
+    return out
+
+
+def solve_normal_equations(xtx: list[list[float]], xty: list[float]) -> Optional[tuple[list[float], list[list[float]]]]:
+    """(beta, inverse of xtx) by Gauss–Jordan elimination; None if xtx is singular."""
+    p = len(xty)
+    m = [row[:] + [1.0 if i == j else 0.0 for j in range(p)] + [xty[i]] for i, row in enumerate(xtx)]
+    for col in range(p):
+        pivot = max(range(col, p), key=lambda r: abs(m[r][col]))
+        if abs(m[pivot][col]) < 1e-9 * max(1.0, abs(xtx[col][col])):
+            return None
+        m[col], m[pivot] = m[pivot], m[col]
+        scale = m[col][col]
+        m[col] = [v / scale for v in m[col]]
+        for r in range(p):
+            if r != col and m[r][col]:
+                f = m[r][col]
+                m[r] = [a - f * b for a, b in zip(m[r], m[col])]
+    return [row[-1] for row in m], [row[p:2 * p] for row in m]
+
+
+def fit_ttfb_model(table: TurnTable) -> Optional[dict]:
+    """
+    Ordinary least squares of llm_ttfb_ms on turn content, context size,
+    time in call and node (one indicator per node with at least
+    MODEL_MIN_NODE_TURNS turns; the largest node, with any smaller ones, is
+    the reference). Context size is prior_transcript_chars; if any turn lacks
+    it (raw files written before it existed) the model falls back to
+    prior_agent_chars for all turns, and `context` says which was used.
+    Coefficients are the marginal latency cost of each factor with the others
+    held fixed; standard errors assume homoscedastic noise, so treat the
+    intervals as indicative. Constant columns are dropped. `position_r` is
+    the correlation of time in call with the context column: both grow
+    through every call, so when it is high their coefficients trade off
+    against each other. Returns None below MODEL_MIN_TURNS turns or when the
+    design is singular.
+    """
+    ttfb = table.values["llm_ttfb_ms"]
+    words = table.values["response_word_count"]
+    secs = table.values["time_in_call_secs"]
+    keep = [i for i, (v, w, t) in enumerate(zip(ttfb, words, secs)) if v == v and w == w and t == t]
+    n = len(keep)
+    if n < MODEL_MIN_TURNS:
+        return None
+
+    codes = table.codes["active_node"]
+    labels = table.labels["active_node"]
+    node_counts: dict[int, int] = {}
+    for i in keep:
+        node_counts[codes[i]] = node_counts.get(codes[i], 0) + 1
+    reference = max(node_counts, key=node_counts.get)
+    indicators = sorted(
+        (code for code, count in node_counts.items() if code != reference and count >= MODEL_MIN_NODE_TURNS),
+        key=lambda code: -node_counts[code],
+    )
+
+    tools = table.flags["has_tool_calls"]
+    interrupted = table.flags["interrupted"]
+    transcript = table.values["prior_transcript_chars"]
+    if all(transcript[i] == transcript[i] for i in keep):
+        context, context_name, prior = "transcript", "Context size", transcript
+    else:
+        context, context_name, prior = "agent speech", "Prior agent speech", prior_agent_chars(table)
+    dense = [
+        ("Reply length", "per 100 words", [words[i] / 100 for i in keep]),
+        ("Tool call on the turn", "yes vs no", [1.0 if tools[i] else 0.0 for i in keep]),
+        ("Interrupted", "yes vs no", [1.0 if interrupted[i] else 0.0 for i in keep]),
+        ("Time in call", "per 10 min", [secs[i] / DRIFT_BUCKET_SECS for i in keep]),
+        (context_name, "per 10k chars", [prior[i] / 10000 for i in keep]),
+    ]
+    dense = [t for t in dense if min(t[2]) != max(t[2])]
+
+    y = [ttfb[i] for i in keep]
+    cols = [[1.0] * n] + [col for _, _, col in dense]
+    d = len(cols)
+    slot = {code: d + k for k, code in enumerate(indicators)}  # reference and small nodes: no column
+    p = d + len(indicators)
+    if n <= p:
+        return None
+    xtx = [[0.0] * p for _ in range(p)]
+    xty = [0.0] * p
+    for a in range(d):
+        for b in range(a, d):
+            xtx[a][b] = sum(u * v for u, v in zip(cols[a], cols[b]))
+        xty[a] = sum(u * v for u, v in zip(cols[a], y))
+    for row, i in enumerate(keep):
+        k = slot.get(codes[i])
+        if k is None:
+            continue
+        xtx[k][k] += 1.0
+        xty[k] += y[row]
+        for a in range(d):
+            xtx[a][k] += cols[a][row]
+    for a in range(p):
+        for b in range(a + 1, p):
+            xtx[b][a] = xtx[a][b]
+    solved = solve_normal_equations(xtx, xty)
+    if solved is None:
+        return None
+    beta, inverse = solved
+    yty = sum(v * v for v in y)
+    sst = yty - xty[0] * xty[0] / n
+    sse = max(0.0, yty - sum(b * c for b, c in zip(beta, xty)))
+    sigma2 = sse / (n - p)
+    z = statistics.NormalDist().inv_cdf(0.975)
+    names = [(name, unit) for name, unit, _ in dense]
+    names += [(f"Node: {labels[code]}", f"vs {labels[reference]}") for code in indicators]
+    terms = []
+    for k, (name, unit) in enumerate(names, start=1):
+        se = math.sqrt(max(0.0, sigma2 * inverse[k][k]))
+        coef = beta[k]
+        terms.append({
+            "name": name,
+            "unit": unit,
+            "coef": round(coef, 1),
+            "ci": (round(coef - z * se, 1), round(coef + z * se, 1)),
+            "p": math.erfc(abs(coef / se) / math.sqrt(2)) if se else 0.0,
+        })
+    position = {name: col for name, _, col in dense if name in ("Time in call", context_name)}
+    return {
+        "turns": n,
+        "intercept": round(beta[0], 1),
+        "r2": round(1 - sse / sst, 3) if sst > 0 else None,
+        "resid_sd": round(math.sqrt(sigma2), 1),
+        "reference_node": labels[reference],
+        "terms": terms,
+        "context": context,
+        "context_term": context_name,
+        "position_r": round(statistics.correlation(*position.values()), 2) if len(position) == 2 else None,
+    }
+
+
+def ttfb_drift(table: TurnTable, durations: Optional[dict[str, int]] = None) -> dict:
+    """
+    How LLM TTFB moves with time in the call:
+
+      profile   — per DRIFT_BUCKET_SECS of call time (last bucket open-ended
+                  at 60 min): turns, median, P95, and the mean deviation from
+                  each turn's own conversation mean (within-call drift, free
+                  of which calls happen to run long);
+      by_length — per CALL_LENGTH_BUCKETS bucket (from `durations`, else the
+                  last turn's time): conversations with at least
+                  DRIFT_MIN_TURNS turns, median per-conversation OLS slope
+                  (ms per 10 min), share of positive slopes, and median TTFB
+                  in each call's first and last 10 minutes.
+    """
+    points: dict[int, list[tuple[float, float]]] = {}
+    for code, t, v in zip(table.codes["conversation_id"], table.values["time_in_call_secs"], table.values["llm_ttfb_ms"]):
+        if v == v and t == t:
+            points.setdefault(code, []).append((t, v))
+
+    conv_labels = table.labels["conversation_id"]
+    edges = [edge for edge, _ in CALL_LENGTH_BUCKETS]
+    lengths: dict[str, dict[str, list]] = {label: {"slopes": [], "first": [], "last": []} for _, label in CALL_LENGTH_BUCKETS}
+    last_bucket = 3600 // DRIFT_BUCKET_SECS
+    buckets: dict[int, tuple[list[float], list[float]]] = {}  # bucket → (TTFBs, deviations from own call mean)
+    for code, pts in points.items():
+        k = len(pts)
+        sum_t = sum(t for t, _ in pts)
+        sum_v = sum(v for _, v in pts)
+        mean = sum_v / k
+        for t, v in pts:
+            vals, devs = buckets.setdefault(min(int(t // DRIFT_BUCKET_SECS), last_bucket), ([], []))
+            vals.append(v)
+            devs.append(v - mean)
+        if k < DRIFT_MIN_TURNS:
+            continue
+        denom = k * sum(t * t for t, _ in pts) - sum_t * sum_t
+        length = (durations or {}).get(conv_labels[code]) or max(t for t, _ in pts)
+        g = lengths[CALL_LENGTH_BUCKETS[bisect.bisect_right(edges, length)][1]]
+        if denom:
+            g["slopes"].append((k * sum(t * v for t, v in pts) - sum_t * sum_v) / denom * DRIFT_BUCKET_SECS)
+        g["first"].extend(v for t, v in pts if t < DRIFT_BUCKET_SECS)
+        g["last"].extend(v for t, v in pts if t >= length - DRIFT_BUCKET_SECS)
+
+    profile = []
+    for b in sorted(buckets):
+        vals, devs = buckets[b]
+        vals.sort()
+        lo = b * DRIFT_BUCKET_SECS // 60
+        profile.append({
+            "minutes": f"{lo}+" if b == last_bucket else f"{lo}–{lo + DRIFT_BUCKET_SECS // 60}",
+            "turns": len(vals),
+            "median": round(statistics.median(vals), 1),
+            "p95": round(percentile(vals, 95), 1),
+            "within_call": round(sum(devs) / len(devs), 1),
+        })
+    by_length = []
+    for _, label in CALL_LENGTH_BUCKETS:
+        g = lengths[label]
+        if not g["slopes"]:
+            continue
+        by_length.append({
+            "length": label,
+            "conversations": len(g["slopes"]),
+            "slope_median": round(statistics.median(g["slopes"]), 1),
+            "positive_share": sum(1 for s in g["slopes"] if s > 0) / len(g["slopes"]),
+            "first_median": stats(g["first"])["median"],
+            "last_median": stats(g["last"])["median"],
+        })
+    return {"profile": profile, "by_length": by_length}
+
+
+# ---------------------------------------------------------------------------
+# Step 5: Build outputs
+# ---------------------------------------------------------------------------
+
+def build_summary_md(
+    all_turns: list[dict],
+    qualifying: list[dict],
+    root_llm: str,
+    node_map: dict,
+    failures: Optional[list[dict]] = None,
+) -> str:
+    return render_summary_md(aggregate_turns(all_turns), qualifying, root_llm, node_map, failures)
+
+
+def render_summary_md(
+    agg: LatencyAggregator,
+    qualifying: list[dict],
+    root_llm: str,
+    node_map: dict,
+    failures: Optional[list[dict]] = None,
+    agent_id: Optional[str] = None,
+    by_agent: Optional[dict[str, LatencyAggregator]] = None,
+) -> str:
+    """
+    Markdown report from one aggregation pass. With `by_agent` (agent id →
+    that agent's aggregate, `agg` being their merge) the per-LLM section
+    also compares each model across agents.
+    """
+    lines = []
+    table = agg.table
+
+    def h1(t): lines.append(f"# {t}\n")
+    def h2(t): lines.append(f"## {t}\n")
+    def h3(t): lines.append(f"### {t}\n")
+    def rule(): lines.append("---\n")
+    def blank(): lines.append("")
+
+    h1("JRVS V3 Conversational Latency Report")
+    lines.append(f"**Analysis date:** {ANALYSIS_DATE}  ")
+    lines.append(f"**Agent:** `{agent_id or AGENT_ID}`  ")
     lines.append(f"**TTS model:** `eleven_v3_conversational`  ")
     lines.append(f"**Root LLM:** `{root_llm}`  ")
     lines.append(f"**Conversations analyzed:** {len(qualifying)}  ")
@@ -386,35 +2810,40 @@ def build_summary_md(
     h2("Conversations Analyzed")
     lines.append("| conversation_id | start_time (UTC) | duration | turns_analyzed | status |")
     lines.append("|---|---|---|---|---|")
-    conv_turn_counts = {}
-    for t in all_turns:
-        cid = t["conversation_id"]
-        conv_turn_counts[cid] = conv_turn_counts.get(cid, 0) + 1
-
     for c in qualifying:
         dt = datetime.fromtimestamp(c["start_time"], tz=timezone.utc).strftime("%Y-%m-%d %H:%M") if c["start_time"] else "?"
         mins = c["duration_seconds"] // 60
         secs = c["duration_seconds"] % 60
         dur_str = f"{mins}m {secs}s"
-        n_turns = conv_turn_counts.get(c["conversation_id"], 0)
+        n_turns = agg.conv_turn_counts.get(c["conversation_id"], 0)
         lines.append(f"| `{c['conversation_id']}` | {dt} | {dur_str} | {n_turns} | {c['status']} |")
     blank()
 
+    if failures:
+        h2("Failed Conversations")
+        lines.append(f"*{len(failures)} conversations skipped after API errors (excluded from all statistics).*")
+        blank()
+        lines.append("| conversation_id | HTTP status | attempts | error |")
+        lines.append("|---|---|---|---|")
+        for f in failures:
+            err = f["error"].replace("|", "\\|").replace("\n", " ")[:120]
+            lines.append(f"| `{f['conversation_id']}` | {f['status'] or 'n/a'} | {f['attempts']} | {err} |")
+        blank()
+
     # ---- Overall stats ----
     h2("Overall Statistics")
-    agent_turns = [t for t in all_turns]
-    total_turns = len(agent_turns)
-    llm_ttfbs = [t["llm_ttfb_ms"] for t in agent_turns if t["llm_ttfb_ms"] is not None]
-    coarse_latencies = [t["response_latency_secs_coarse"] * 1000 for t in agent_turns if t["response_latency_secs_coarse"] is not None]
+    total_turns = agg.total_turns
+    ttfb_stats = table.column_stats("llm_ttfb_ms")
+    n_ttfb = ttfb_stats["count"]
     avg_duration = statistics.mean([c["duration_seconds"] for c in qualifying]) if qualifying else 0
 
     lines.append(f"- **Total agent turns analyzed:** {total_turns}")
-    lines.append(f"- **Turns with LLM TTFB data:** {len(llm_ttfbs)} ({round(100*len(llm_ttfbs)/total_turns if total_turns else 0)}%)")
+    lines.append(f"- **Turns with LLM TTFB data:** {n_ttfb} ({round(100*n_ttfb/total_turns if total_turns else 0)}%)")
     lines.append(f"- **Average conversation duration:** {round(avg_duration/60, 1)} minutes")
     blank()
 
-    if llm_ttfbs:
-        s = stats(llm_ttfbs)
+    if n_ttfb:
+        s = ttfb_stats
         lines.append("**LLM TTFB (ms) — global:**")
         lines.append(f"| Mean | Median | Min | Max | P75 | P95 |")
         lines.append(f"|---|---|---|---|---|---|")
@@ -426,79 +2855,81 @@ def build_summary_md(
     lines.append("*Latency = LLM TTFB in ms (high precision). All nodes inherit root LLM `claude-sonnet-4-5`.*")
     blank()
 
-    from collections import defaultdict
-    node_turns = defaultdict(list)
-    for t in agent_turns:
-        node_turns[t["active_node"]].append(t)
-
     # Sort by turn count desc
-    sorted_nodes = sorted(node_turns.items(), key=lambda x: -len(x[1]))
+    sorted_nodes = sorted(agg.node_turn_counts.items(), key=lambda x: -x[1])
+    node_stats = table.group_stats("llm_ttfb_ms", "active_node")
     lines.append("| Node | LLM | Turns | Mean TTFB | Median | Min | Max | P95 | Interrupted% |")
     lines.append("|---|---|---|---|---|---|---|---|---|")
-    for node_label, turns in sorted_nodes:
-        ttfbs = [t["llm_ttfb_ms"] for t in turns if t["llm_ttfb_ms"] is not None]
-        llm = turns[0]["active_llm"] if turns else root_llm
-        interrupted = sum(1 for t in turns if t.get("interrupted"))
-        int_pct = round(100 * interrupted / len(turns)) if turns else 0
-        if ttfbs:
-            s = stats(ttfbs)
-            lines.append(f"| {node_label} | `{llm}` | {len(turns)} | {s['mean']} | {s['median']} | {s['min']} | {s['max']} | {s['p95']} | {int_pct}% |")
+    for node_label, n_turns in sorted_nodes:
+        llm = agg.node_first_llm.get(node_label, root_llm)
+        interrupted = agg.node_interrupted.get(node_label, 0)
+        int_pct = round(100 * interrupted / n_turns) if n_turns else 0
+        s = node_stats[node_label]
+        if s["count"]:
+            lines.append(f"| {node_label} | `{llm}` | {n_turns} | {s['mean']} | {s['median']} | {s['min']} | {s['max']} | {s['p95']} | {int_pct}% |")
         else:
-            lines.append(f"| {node_label} | `{llm}` | {len(turns)} | N/A | N/A | N/A | N/A | N/A | {int_pct}% |")
+            lines.append(f"| {node_label} | `{llm}` | {n_turns} | N/A | N/A | N/A | N/A | N/A | {int_pct}% |")
     blank()
 
     # ---- Per-LLM stats ----
     h2("Per-LLM Breakdown")
-    llm_turns = defaultdict(list)
-    for t in agent_turns:
-        llm_turns[t["active_llm"]].append(t)
-
     lines.append("| LLM Model | Turns | Mean TTFB | Median | Min | Max | P95 | Nodes Using |")
     lines.append("|---|---|---|---|---|---|---|---|")
-    for llm_model, turns in sorted(llm_turns.items(), key=lambda x: -len(x[1])):
-        ttfbs = [t["llm_ttfb_ms"] for t in turns if t["llm_ttfb_ms"] is not None]
-        nodes_using = sorted(set(t["active_node"] for t in turns))
+    llm_stats = table.group_stats("llm_ttfb_ms", "active_llm")
+    for llm_model, n_turns in sorted(agg.llm_turn_counts.items(), key=lambda x: -x[1]):
+        nodes_using = sorted(agg.llm_nodes[llm_model])
         nodes_str = ", ".join(nodes_using[:4]) + ("..." if len(nodes_using) > 4 else "")
-        if ttfbs:
-            s = stats(ttfbs)
-            lines.append(f"| `{llm_model}` | {len(turns)} | {s['mean']} | {s['median']} | {s['min']} | {s['max']} | {s['p95']} | {nodes_str} |")
+        s = llm_stats[llm_model]
+        if s["count"]:
+            lines.append(f"| `{llm_model}` | {n_turns} | {s['mean']} | {s['median']} | {s['min']} | {s['max']} | {s['p95']} | {nodes_str} |")
         else:
-            lines.append(f"| `{llm_model}` | {len(turns)} | N/A | N/A | N/A | N/A | N/A | {nodes_str} |")
+            lines.append(f"| `{llm_model}` | {n_turns} | N/A | N/A | N/A | N/A | N/A | {nodes_str} |")
     blank()
 
+    if by_agent:
+        h3("LLM × Agent")
+        lines.append("*LLM TTFB (ms) of each model per agent; Δ Median is against the model's median across all agents.*")
+        blank()
+        lines.append("| LLM Model | Agent | Turns | Mean TTFB | Median | P95 | Δ Median |")
+        lines.append("|---|---|---|---|---|---|---|")
+        agent_llm_stats = {aid: a.table.group_stats("llm_ttfb_ms", "active_llm") for aid, a in by_agent.items()}
+        for llm_model, _ in sorted(agg.llm_turn_counts.items(), key=lambda x: -x[1]):
+            overall = llm_stats[llm_model]
+            for aid, a in by_agent.items():
+                n_turns = a.llm_turn_counts.get(llm_model)
+                if not n_turns:
+                    continue
+                s = agent_llm_stats[aid][llm_model]
+                if s["count"]:
+                    delta = round(s["median"] - overall["median"], 1)
+                    lines.append(f"| `{llm_model}` | `{aid}` | {n_turns} | {s['mean']} | {s['median']} | {s['p95']} | {delta:+g} |")
+                else:
+                    lines.append(f"| `{llm_model}` | `{aid}` | {n_turns} | N/A | N/A | N/A | N/A |")
+        blank()
+
     # ---- Distribution of turns by node ----
     h2("Turn Distribution by Node")
     lines.append("| Node | Turns | % of Total |")
     lines.append("|---|---|---|")
-    for node_label, turns in sorted_nodes:
-        pct = round(100 * len(turns) / total_turns) if total_turns else 0
-        lines.append(f"| {node_label} | {len(turns)} | {pct}% |")
+    for node_label, n_turns in sorted_nodes:
+        pct = round(100 * n_turns / total_turns) if total_turns else 0
+        lines.append(f"| {node_label} | {n_turns} | {pct}% |")
     blank()
 
     # ---- LLM TTFB distribution buckets ----
     h2("LLM TTFB Distribution (Histogram)")
     lines.append("*LLM TTFB buckets across all turns with data.*")
     blank()
-    buckets = {"<500ms": 0, "500-999ms": 0, "1000-1999ms": 0, "2000-2999ms": 0, "3000-4999ms": 0, "≥5000ms": 0}
-    for v in llm_ttfbs:
-        if v < 500: buckets["<500ms"] += 1
-        elif v < 1000: buckets["500-999ms"] += 1
-        elif v < 2000: buckets["1000-1999ms"] += 1
-        elif v < 3000: buckets["2000-2999ms"] += 1
-        elif v < 5000: buckets["3000-4999ms"] += 1
-        else: buckets["≥5000ms"] += 1
     lines.append("| Bucket | Count | % |")
     lines.append("|---|---|---|")
-    total_with_data = len(llm_ttfbs)
-    for bucket, count in buckets.items():
-        pct = round(100 * count / total_with_data) if total_with_data else 0
+    for (_, bucket), count in zip(TTFB_BUCKETS, agg.ttfb_buckets):
+        pct = round(100 * count / n_ttfb) if n_ttfb else 0
         lines.append(f"| {bucket} | {count} | {pct}% |")
     blank()
 
     # ---- Outliers ----
-    h2(f"Outlier Turns (LLM TTFB > {OUTLIER_THRESHOLD_MS}ms)")
-    outliers = [t for t in agent_turns if t["llm_ttfb_ms"] is not None and t["llm_ttfb_ms"] > OUTLIER_THRESHOLD_MS]
-    outliers.sort(key=lambda x: -(x["llm_ttfb_ms"] or 0))
+    h2(f"Outlier Turns (LLM TTFB > {agg.outlier_threshold_ms}ms)")
+    outliers = agg.sorted_outliers()
     lines.append(f"**{len(outliers)} outlier turns found.**")
     blank()
     if outliers:
@@ -511,106 +2942,2186 @@ def build_summary_md(
             )
     blank()
 
+    # ---- Node transitions ----
+    h2("Node Transitions")
+    window = agg.transition_window
+    n_transfers = sum(agg.transitions.values())
+    phase_counts = agg.phase_counts()
+    lines.append(
+        f"*A transfer is a change of `workflow_node_id` between consecutive agent turns of one conversation. "
+        f"Post-transfer = the first {window} turns after a transfer; steady state = turns at least {window} "
+        f"after the last transfer (the first {window} turns of each conversation are excluded from both). "
+        f"Perceived latency is the coarse gap from the preceding user turn.*"
+    )
+    lines.append(
+        f"- **Transfers:** {n_transfers} across {len(agg.transitions)} distinct transitions"
+    )
+    lines.append(
+        f"- **Turns:** {phase_counts[PHASE_TRANSFER]} post-transfer, {phase_counts[PHASE_STEADY]} steady state, "
+        f"{phase_counts[PHASE_OPENING]} conversation opening"
+    )
+    n_outliers = len(agg.outliers)
+    if n_outliers:
+        turn_share = round(100 * phase_counts[PHASE_TRANSFER] / total_turns) if total_turns else 0
+        lines.append(
+            f"- **Outliers (LLM TTFB > {agg.outlier_threshold_ms}ms) in post-transfer turns:** "
+            f"{agg.transfer_outliers} / {n_outliers} ({round(100 * agg.transfer_outliers / n_outliers)}%, "
+            f"vs {turn_share}% of all turns)"
+        )
+    blank()
+    if agg.transitions:
+        h3("Transition Matrix")
+        lines.append("*Rows: node transferred from; columns: node transferred to.*")
+        blank()
+        involved = [node for node, _ in sorted_nodes if any(node in edge for edge in agg.transitions)]
+        lines.append("| From \\ To | " + " | ".join(involved) + " |")
+        lines.append("|---|" + "---|" * len(involved))
+        for src in involved:
+            cells = " | ".join(str(agg.transitions.get((src, dst), "")) for dst in involved)
+            lines.append(f"| {src} | {cells} |")
+        blank()
+
+        h3("First Turn After Each Transition")
+        lines.append("| Transition | Count | LLM TTFB median | LLM TTFB P95 | Perceived median (ms) |")
+        lines.append("|---|---|---|---|---|")
+        for (src, dst), count in sorted(agg.transitions.items(), key=lambda x: -x[1]):
+            first = agg.transition_first[(src, dst)]
+            ttfb = stats([v for v, _ in first if v is not None])
+            perceived = stats([v for _, v in first if v is not None])
+            lines.append(
+                f"| {src} → {dst} | {count} | {ttfb['median'] if ttfb['count'] else 'N/A'} "
+                f"| {ttfb['p95'] if ttfb['count'] else 'N/A'} | {perceived['median'] if perceived['count'] else 'N/A'} |"
+            )
+        blank()
+
+        h3("Post-Transfer vs Steady State by Node")
+        lines.append(f"*Median / P95 in ms. Δ = post-transfer median − steady-state median (LLM TTFB).*")
+        blank()
+        lines.append(
+            "| Node | Post-transfer turns | TTFB median | TTFB P95 | Perceived median "
+            "| Steady turns | TTFB median | TTFB P95 | Perceived median | Δ TTFB |"
+        )
+        lines.append("|---|---|---|---|---|---|---|---|---|---|")
+        ttfb_phase = agg.phase_stats("llm_ttfb_ms")
+        perceived_phase = agg.phase_stats("perceived_latency_ms")
+        empty = stats([])
+
+        def phase_cells(node, phase):
+            t = ttfb_phase.get(node, {}).get(phase, empty)
+            p = perceived_phase.get(node, {}).get(phase, empty)
+            na = lambda v: "N/A" if v is None else v
+            return t, f"{t['count']} | {na(t['median'])} | {na(t['p95'])} | {na(p['median'])}"
+
+        for node, _ in sorted_nodes:
+            if PHASE_TRANSFER not in ttfb_phase.get(node, {}):
+                continue
+            post, post_cells = phase_cells(node, PHASE_TRANSFER)
+            steady, steady_cells = phase_cells(node, PHASE_STEADY)
+            delta = round(post["median"] - steady["median"], 1) if post["count"] and steady["count"] else "N/A"
+            lines.append(f"| {node} | {post_cells} | {steady_cells} | {delta} |")
+        blank()
+
+    # ---- TTFB model ----
+    h2("TTFB Model (Content, Context, Position)")
+    model = fit_ttfb_model(table)
+    if model is None:
+        lines.append(f"*Not enough turns with LLM TTFB (< {MODEL_MIN_TURNS}) or a singular design — no model fitted.*")
+        blank()
+    else:
+        if model["context"] == "transcript":
+            context_note = (
+                "context size (characters of user and agent messages earlier in the call; the system prompt "
+                "and tool results come on top)"
+            )
+        else:
+            context_note = (
+                "prior agent speech (characters the agent spoke earlier in the call — these raw records predate "
+                "`prior_transcript_chars`, so user speech is missing and this is not the context size)"
+            )
+        lines.append(
+            f"*Least-squares fit of LLM TTFB on reply length, tool calls, interruption, time in call, {context_note} "
+            f"and node (nodes with < {MODEL_MIN_NODE_TURNS} turns pooled with the reference). Each row is the "
+            "marginal cost of that factor with the others held fixed; standard errors assume constant noise, "
+            "so the 95% intervals are indicative.*"
+        )
+        lines.append(
+            f"- **Turns:** {model['turns']}  **R²:** {model['r2']}  **Residual SD:** {model['resid_sd']} ms  "
+            f"**Intercept:** {model['intercept']} ms (`{model['reference_node']}`)"
+        )
+        blank()
+        lines.append("| Factor | Unit | Δ TTFB (ms) | 95% CI | p |")
+        lines.append("|---|---|---|---|---|")
+        for term in model["terms"]:
+            lo, hi = term["ci"]
+            p_cell = "<0.001" if term["p"] < 0.001 else f"{term['p']:.3f}"
+            lines.append(f"| {term['name']} | {term['unit']} | {term['coef']:+g} | {lo:+g} … {hi:+g} | {p_cell} |")
+        blank()
+
+        if model["position_r"] is not None:
+            lines.append(
+                f"- **Collinearity:** time in call and {model['context_term'].lower()} both grow through every call "
+                f"(r = {model['position_r']:.2f} over these turns), so the split of any drift between them is "
+                "unstable — read their two rows together, not one against the other."
+            )
+        for term in model["terms"]:
+            if term["name"] not in ("Time in call", model["context_term"]):
+                continue
+            lo, hi = term["ci"]
+            if lo > 0:
+                direction = f"TTFB rises (interval {lo:+g} … {hi:+g} ms {term['unit']} excludes 0)"
+            elif hi < 0:
+                direction = f"TTFB falls (interval {lo:+g} … {hi:+g} ms {term['unit']} excludes 0)"
+            else:
+                direction = "no clear direction (interval spans 0)"
+            lines.append(f"- **{term['name']}:** {direction}")
+        blank()
+
+    drift = ttfb_drift(table, {c["conversation_id"]: c["duration_seconds"] for c in qualifying})
+    if drift["profile"]:
+        h3("LLM TTFB by Minutes Into Call")
+        lines.append("*Within-call Δ = mean of each turn's TTFB minus its own conversation's mean, so long and short calls compare fairly.*")
+        blank()
+        lines.append("| Minutes | Turns | Median | P95 | Within-call Δ (ms) |")
+        lines.append("|---|---|---|---|---|")
+        for row in drift["profile"]:
+            lines.append(f"| {row['minutes']} | {row['turns']} | {row['median']} | {row['p95']} | {row['within_call']:+g} |")
+        blank()
+    if drift["by_length"]:
+        h3("Per-Conversation Drift by Call Length")
+        lines.append(
+            f"*Slope = least-squares LLM TTFB trend within each conversation with ≥ {DRIFT_MIN_TURNS} TTFB turns, "
+            "in ms per 10 minutes; first/last = median TTFB in the call's first and last 10 minutes.*"
+        )
+        blank()
+        lines.append("| Call length | Conversations | Median slope (ms / 10 min) | Rising | First 10 min | Last 10 min |")
+        lines.append("|---|---|---|---|---|---|")
+        for row in drift["by_length"]:
+            lines.append(
+                f"| {row['length']} | {row['conversations']} | {row['slope_median']:+g} | "
+                f"{round(100 * row['positive_share'])}% | {row['first_median']} | {row['last_median']} |"
+            )
+        blank()
+
     # ---- Tool call analysis ----
     h2("Tool Call Analysis")
-    turns_with_tools = [t for t in agent_turns if t.get("has_tool_calls")]
-    tool_counts = defaultdict(int)
-    for t in turns_with_tools:
-        for tn in t.get("tool_names", []):
-            tool_counts[tn] += 1
-    lines.append(f"- **Turns with tool calls:** {len(turns_with_tools)} / {total_turns} ({round(100*len(turns_with_tools)/total_turns if total_turns else 0)}%)")
+    lines.append(f"- **Turns with tool calls:** {agg.turns_with_tools} / {total_turns} ({round(100*agg.turns_with_tools/total_turns if total_turns else 0)}%)")
     blank()
-    if tool_counts:
+    if agg.tool_counts:
         lines.append("| Tool | Call count |")
         lines.append("|---|---|")
-        for tool, cnt in sorted(tool_counts.items(), key=lambda x: -x[1]):
+        for tool, cnt in sorted(agg.tool_counts.items(), key=lambda x: -x[1]):
             lines.append(f"| `{tool}` | {cnt} |")
     blank()
 
+    # ---- Tool-call overhead ----
+    h2("Tool-Call Overhead")
+    episodes = agg.tool_episodes
+    n_baseline = sum(len(v) for v in agg.no_tool_critical.values())
+    if not episodes:
+        if agg.turns_with_tools:
+            lines.append(
+                f"*No tool-call episodes, although {agg.turns_with_tools} turns called tools. Episodes come from the "
+                "prep-turn fields that extraction from conversation details adds; turns loaded from raw files written "
+                "before those fields existed carry none. Re-extract (a fresh run, or `--replay` with `--details-dir` "
+                "holding the saved details) to measure tool overhead.*"
+            )
+        else:
+            lines.append("*No tool-call episodes.*")
+        blank()
+    else:
+        lines.append(
+            "*Each reply that followed tool-call prep turns is one episode. Added delay (ms resolution) = prep LLM "
+            "TTFB + post-tool excess (reply critical path − median critical path of no-tool replies on the same "
+            "node). The tool's own execution time lands in the prep→reply gap, which only whole-second "
+            "`time_in_call_secs` measures, so it is shown separately at ±1 s (0 s = prep and reply in the same "
+            "second). Tools are ordered by total added delay — the best candidates for caching or prefetching "
+            "come first.*"
+        )
+        lines.append(
+            f"*Episodes: {len(episodes)}; "
+            f"matched no-tool baseline: {n_baseline} replies across {len(agg.no_tool_critical)} nodes.*"
+        )
+        blank()
+
+    def median_cell(s):
+        return s["median"] if s["count"] else "N/A"
+
+    for title, by in (("By Tool", "tool"), ("By Node", "node")):
+        overhead = agg.tool_overhead(by)
+        if not overhead:
+            continue
+        h3(title)
+        label = "Tool" if by == "tool" else "Node"
+        lines.append(
+            f"| {label} | Episodes | Prep LLM TTFB (median ms) | Post-tool excess (median ms) | "
+            "Added median (ms) | Added P95 (ms) | Total added (s) | Prep→reply gap (median s, ±1 s) | Gap ≥ 1 s |"
+        )
+        lines.append("|---|---|---|---|---|---|---|---|---|")
+        for key, o in overhead.items():
+            name = f"`{key}`" if by == "tool" else key
+            lines.append(
+                f"| {name} | {o['episodes']} | {median_cell(o['prep'])} | {median_cell(o['excess'])} "
+                f"| {o['added']['median']} | {o['added']['p95']} | {o['total_secs']} "
+                f"| {o['gap']['median']:g} | {o['gap_nonzero']}/{o['episodes']} |"
+            )
+        blank()
+
     # ---- TTS TTFB ----
     h2("TTS TTFB Statistics")
-    tts_vals = [t["tts_ttfb_ms"] for t in agent_turns if t["tts_ttfb_ms"] is not None]
-    lines.append(f"*Turns with TTS TTFB data: {len(tts_vals)}*")
-    if tts_vals:
-        s = stats(tts_vals)
+    s = table.column_stats("tts_ttfb_ms")
+    lines.append(f"*Turns with TTS TTFB data: {s['count']}*")
+    if s["count"]:
         lines.append(f"| Mean | Median | Min | Max | P95 |")
         lines.append(f"|---|---|---|---|---|")
         lines.append(f"| {s['mean']} | {s['median']} | {s['min']} | {s['max']} | {s['p95']} |")
     blank()
 
+    # ---- Latency budget ----
+    h2("Latency Budget (Critical Path)")
+    budget = table.latency_budget("active_node")
+    n_budget = budget["*"]["count"] if budget else 0
+    lines.append(
+        "*Critical path to first audio = LLM TTFB + LLM→first sentence (`convai_llm_service_ttf_sentence` − TTFB) "
+        "+ TTS TTFB, for turns reporting all three metrics. Residual = coarse gap − critical path "
+        "(user speech, end-of-turn detection, transport, rounding); no model or TTS change can remove it.*"
+    )
+    lines.append(f"*Turns decomposed: {n_budget} / {total_turns}*")
+    blank()
+    if budget:
+        node_order = ["*"] + [node for node, _ in sorted_nodes if node in budget]
+
+        def node_cell(node):
+            return "**All nodes**" if node == "*" else node
+
+        h3("Critical-Path Share")
+        lines.append("*Share of the summed critical path per component — the most a faster component could cut from the mean.*")
+        blank()
+        lines.append("| Node | Turns | Mean critical path (ms) | LLM TTFB | LLM→sentence | TTS TTFB | Median residual (ms) |")
+        lines.append("|---|---|---|---|---|---|---|")
+        for node in node_order:
+            b = budget[node]
+            shares = " | ".join(f"{round(100 * b['share'][c])}%" for c in TurnTable.BUDGET_COMPONENTS)
+            residual = b["residual"] if b["residual"] is not None else "N/A"
+            lines.append(f"| {node_cell(node)} | {b['count']} | {b['mean']} | {shares} | {residual} |")
+        blank()
+
+        h3("P95 Budget by Node")
+        lines.append("*Mean of each component (ms) over the turns at or above the node's P95 critical path.*")
+        blank()
+        lines.append("| Node | P95 critical path (ms) | Tail turns | LLM TTFB | LLM→sentence | TTS TTFB | Dominant |")
+        lines.append("|---|---|---|---|---|---|---|")
+        names = dict(zip(TurnTable.BUDGET_COMPONENTS, ("LLM TTFB", "LLM→sentence", "TTS TTFB")))
+        for node in node_order:
+            b = budget[node]
+            tail_total = sum(b["tail"].values())
+            cells = " | ".join(
+                f"{b['tail'][c]} ({round(100 * b['tail'][c] / tail_total) if tail_total else 0}%)"
+                for c in TurnTable.BUDGET_COMPONENTS
+            )
+            dominant = names[max(TurnTable.BUDGET_COMPONENTS, key=lambda c: b["tail"][c])]
+            lines.append(f"| {node_cell(node)} | {b['p95']} | {b['tail_count']} | {cells} | {dominant} |")
+    blank()
+
     return "\n".join(lines)
 
 
 # ---------------------------------------------------------------------------
-# Main
+# Raw output: indented JSON or streaming JSONL
 # ---------------------------------------------------------------------------
 
-def main():
-    api_key = get_api_key()
-    if not AGENT_ID:
-        sys.exit("ERROR: MJRVS_ELEVENLABS_AGENT_ID not set in environment")
-
-    # Step 1: Node→LLM map
-    node_map, root_llm = build_node_llm_map(api_key)
-
-    # Step 2: Qualifying conversations
-    qualifying = fetch_qualifying_conversations(api_key)
-    if not qualifying:
-        print(f"No conversations >= {MIN_DURATION_SECS}s found. Exiting.")
-        return
+RAW_JSONL_FORMAT = "jrvs-latency-raw-jsonl/1"
+RAW_COMPRESSION_SUFFIX = {"none": "", "gzip": ".gz", "zstd": ".zst"}
 
-    # Step 3 & 4: Per-turn extraction
-    all_turns = []
-    print(f"\n[Step 3/4] Extracting per-turn data from {len(qualifying)} conversations...")
-    for c in qualifying:
-        cid = c["conversation_id"]
-        print(f"  Fetching {cid} ({c['duration_seconds']}s)...")
-        detail = api_get(f"/conversations/{cid}", api_key)
-        transcript = detail.get("transcript", []) or []
-        turns = extract_turns(cid, transcript, node_map, root_llm)
-        print(f"    → {len(transcript)} raw turns → {len(turns)} agent turns extracted")
-        all_turns.extend(turns)
 
-    print(f"\n  Total agent turns: {len(all_turns)}")
+def raw_output_path(output_dir: str, raw_format: str, compress: str = "none") -> str:
+    if raw_format == "json":
+        return os.path.join(output_dir, "jrvs_v3_latency_raw.json")
+    return os.path.join(output_dir, f"jrvs_v3_latency_raw.jsonl{RAW_COMPRESSION_SUFFIX[compress]}")
 
-    # Step 5: Output
-    print("\n[Step 5] Writing outputs...")
-    output_dir = os.path.dirname(os.path.abspath(__file__))
 
-    # Raw JSON
-    raw_output = {
-        "agent_id": AGENT_ID,
+def raw_header(agent_id: str, root_llm: str, node_map: dict) -> dict:
+    """Run-level fields shared by both raw formats (everything except the lists)."""
+    return {
+        "agent_id": agent_id,
         "analysis_date": ANALYSIS_DATE,
         "tts_model": "eleven_v3_conversational",
         "root_llm": root_llm,
-        "conversations_analyzed": len(qualifying),
-        "total_agent_turns": len(all_turns),
-        "node_llm_map": {
-            nid: info for nid, info in node_map.items()
-        },
-        "conversations": qualifying,
-        "turns": all_turns,
+        "node_llm_map": {nid: info for nid, info in node_map.items()},
     }
-    raw_path = os.path.join(output_dir, "jrvs_v3_latency_raw.json")
-    with open(raw_path, "w") as f:
-        json.dump(raw_output, f, indent=2)
-    print(f"  Wrote {raw_path}")
 
-    # Summary MD
-    summary_md = build_summary_md(all_turns, qualifying, root_llm, node_map)
-    md_path = os.path.join(output_dir, "jrvs_v3_latency_summary.md")
-    with open(md_path, "w") as f:
-        f.write(summary_md)
-    print(f"  Wrote {md_path}")
 
-    print("\n=== DONE ===")
-    print(f"Conversations analyzed: {len(qualifying)}")
-    llm_ttfbs = [t["llm_ttfb_ms"] for t in all_turns if t["llm_ttfb_ms"] is not None]
-    if llm_ttfbs:
-        s = stats(llm_ttfbs)
-        print(f"Global LLM TTFB — mean: {s['mean']}ms  median: {s['median']}ms  p95: {s['p95']}ms")
-    outliers = [t for t in all_turns if t["llm_ttfb_ms"] is not None and t["llm_ttfb_ms"] > OUTLIER_THRESHOLD_MS]
-    print(f"Outlier turns (>{OUTLIER_THRESHOLD_MS}ms): {len(outliers)}")
+def open_raw_text(path: str, mode: str, name: Optional[str] = None):
+    """
+    Open a raw output file for text I/O, (de)compressing by the extension of
+    `name` (defaults to `path`; lets a temp file use the final file's codec).
+    """
+    name = name or path
+    if name.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if name.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            sys.exit("ERROR: zstd raw output requires the 'zstandard' package (pip install zstandard)")
+        if mode == "w":
+            return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(path, "wb")), encoding="utf-8")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_raw_json(
+    path: str,
+    header: dict,
+    conversations: list[dict],
+    turns: list[dict],
+    watermark: dict,
+    failures: Optional[list[dict]] = None,
+) -> None:
+    raw_output = {
+        "agent_id": header["agent_id"],
+        "analysis_date": header["analysis_date"],
+        "tts_model": header["tts_model"],
+        "root_llm": header["root_llm"],
+        "conversations_analyzed": len(conversations),
+        "total_agent_turns": len(turns),
+        "node_llm_map": header["node_llm_map"],
+        "conversations": conversations,
+        "turns": turns,
+        "watermark": watermark,
+    }
+    if failures:
+        raw_output["failed_conversations"] = failures
+    with open(path, "w") as f:
+        json.dump(raw_output, f, indent=2, default=raw_json_default)
+
+
+class RawJsonlWriter:
+    """
+    Streams the raw dataset as compact JSON lines:
+
+      {"type": "header", "format": ..., agent_id, root_llm, node_llm_map, ...}
+      {"type": "conversation", conversation_id, start_time, ...}
+      {"type": "turn", ...one extract_turns record...}      (after its conversation)
+      {"type": "failure", conversation_id, status, error, attempts}
+      {"type": "footer", conversations_analyzed, total_agent_turns, watermark}
+
+    Records are written as conversations are extracted, so nothing is held
+    in memory. The file is written to a temporary name and moved into place
+    by close(), so readers (including an incremental merge reading the
+    previous file) never see a partial dataset.
+    """
+
+    def __init__(self, path: str, header: dict):
+        self.path = path
+        self._tmp = f"{path}.tmp"
+        self._f = open_raw_text(self._tmp, "w", name=path)
+        self.conversations = 0
+        self.turns = 0
+        self._write({"type": "header", "format": RAW_JSONL_FORMAT, **header})
+
+    def _write(self, record: dict) -> None:
+        self._f.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False))
+        self._f.write("\n")
+
+    def write_conversation(self, conv: dict, turns: list[dict]) -> None:
+        self._write({"type": "conversation", **conv})
+        for t in turns:
+            self._write({"type": "turn", **export_turn(t)})
+        self.conversations += 1
+        self.turns += len(turns)
+
+    def write_failure(self, failure: dict) -> None:
+        self._write({"type": "failure", **failure})
+
+    def close(self, watermark: dict) -> None:
+        self._write({
+            "type": "footer",
+            "conversations_analyzed": self.conversations,
+            "total_agent_turns": self.turns,
+            "watermark": watermark,
+        })
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        self._f.close()
+        try:
+            os.remove(self._tmp)
+        except OSError:
+            pass
+
+
+class RawReader:
+    """
+    Iterates a raw dataset in either format. For JSONL input, conversations()
+    streams one conversation group at a time, so memory stays bounded by the
+    largest conversation; `header`, `failures` and `footer` are filled in as
+    the corresponding records are passed. Indented JSON input is loaded whole
+    and replayed through the same interface.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header: Optional[dict] = None
+        self.footer: Optional[dict] = None
+        self.failures: list[dict] = []
+
+    def records(self) -> Iterator[dict]:
+        if self.path.endswith(".json"):
+            with open(self.path) as f:
+                data = json.load(f)
+            yield {"type": "header", **{k: data.get(k) for k in ("agent_id", "analysis_date", "tts_model", "root_llm", "node_llm_map")}}
+            turns_by_conv: dict[str, list[dict]] = {}
+            for t in data.get("turns", []):
+                turns_by_conv.setdefault(t["conversation_id"], []).append(t)
+            for c in data.get("conversations", []):
+                yield {"type": "conversation", **c}
+                for t in turns_by_conv.get(c["conversation_id"], []):
+                    yield {"type": "turn", **t}
+            for fail in data.get("failed_conversations", []):
+                yield {"type": "failure", **fail}
+            yield {
+                "type": "footer",
+                "conversations_analyzed": data.get("conversations_analyzed"),
+                "total_agent_turns": data.get("total_agent_turns"),
+                "watermark": data.get("watermark"),
+            }
+            return
+        with open_raw_text(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def conversations(self) -> Iterator[tuple[dict, list[dict]]]:
+        conv = None
+        turns: list[dict] = []
+        for rec in self.records():
+            kind = rec.pop("type")
+            if kind == "turn":
+                turns.append(TurnRecord.from_dict(rec))
+                continue
+            if conv is not None:
+                yield conv, turns
+                conv, turns = None, []
+            if kind == "conversation":
+                conv = rec
+            elif kind == "header":
+                rec.pop("format", None)
+                self.header = rec
+            elif kind == "failure":
+                self.failures.append(rec)
+            elif kind == "footer":
+                self.footer = rec
+        if conv is not None:
+            yield conv, turns
+
+    def read_footer(self) -> Optional[dict]:
+        """Scan to the end (streaming) and return the footer record."""
+        for _ in self.conversations():
+            pass
+        return self.footer
+
+
+def rewrite_raw_jsonl_watermark(path: str, watermark: dict) -> None:
+    """
+    Copy a JSONL raw file through RawJsonlWriter with `watermark` in a new
+    footer, streaming one conversation at a time. Used when an incremental
+    run finds nothing new but its pending_ids still changed.
+    """
+    reader = RawReader(path)
+    groups = reader.conversations()
+    first = next(groups, None)  # reads the header record
+    writer = RawJsonlWriter(path, reader.header or {})
+    try:
+        if first is not None:
+            writer.write_conversation(*first)
+            for conv, turns in groups:
+                writer.write_conversation(conv, turns)
+        for f in reader.failures:
+            writer.write_failure(f)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close(watermark)
+
+
+# ---------------------------------------------------------------------------
+# Offline replay: rebuild outputs from saved data without the API
+# ---------------------------------------------------------------------------
+
+def save_detail(details_dir: str, cid: str, detail: dict) -> None:
+    """Keep a conversation-detail payload as <details_dir>/<cid>.json.gz for replay."""
+    os.makedirs(details_dir, exist_ok=True)
+    path = os.path.join(details_dir, f"{cid}.json.gz")
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(detail, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load_saved_detail(cid: str, details_dir: Optional[str], cache: Optional[DetailCache]) -> Optional[dict]:
+    """Find a saved detail payload: <details_dir>/<cid>.json[.gz] first, then the cache."""
+    if details_dir:
+        for name in (f"{cid}.json.gz", f"{cid}.json"):
+            path = os.path.join(details_dir, name)
+            if os.path.exists(path):
+                opener = gzip.open if name.endswith(".gz") else open
+                with opener(path, "rt", encoding="utf-8") as f:
+                    return json.load(f)
+    if cache:
+        return cache.get(f"conversation:{cid}")
+    return None
+
+
+def replay(
+    raw_path: str,
+    details_dir: Optional[str] = None,
+    cache: Optional[DetailCache] = None,
+    outlier_threshold_ms: float = OUTLIER_THRESHOLD_MS,
+    index: Optional["TurnIndex"] = None,
+    transition_window: int = TRANSITION_WINDOW,
+) -> tuple[LatencyAggregator, list[dict], dict, list[dict], dict]:
+    """
+    Re-aggregate a saved raw dataset. Conversations whose detail payload is
+    available (saved details directory or response cache) are re-extracted
+    with the current extract_turns; the rest reuse their stored turns.
+    With `index`, every conversation is also upserted into the turn index.
+
+    Returns (aggregator, conversations, header, failures, counts).
+    """
+    reader = RawReader(raw_path)
+    agg = LatencyAggregator(outlier_threshold_ms, transition_window=transition_window)
+    conversations = []
+    counts = {"reextracted": 0, "stored": 0}
+    node_map = None
+    root_llm = None
+    for conv, stored_turns in reader.conversations():
+        if node_map is None:
+            node_map = reader.header.get("node_llm_map") or {}
+            root_llm = reader.header.get("root_llm") or "unknown"
+            if index:
+                index.upsert_nodes(node_map)
+        cid = conv["conversation_id"]
+        detail = load_saved_detail(cid, details_dir, cache) if (details_dir or cache) else None
+        if detail is not None:
+            turns = extract_turns(cid, detail.get("transcript", []) or [], node_map, root_llm)
+            counts["reextracted"] += 1
+        else:
+            turns = stored_turns
+            counts["stored"] += 1
+        agg.add_conversation(conv)
+        agg.extend(turns)
+        conversations.append(conv)
+        if index:
+            index.upsert_conversation(conv, turns, reader.header.get("agent_id"))
+    return agg, conversations, reader.header or {}, reader.failures, counts
+
+
+def run_replay(
+    args: argparse.Namespace,
+    md_path: str,
+    sketch_path: str,
+    metrics: Optional[RunMetrics] = None,
+) -> None:
+    metrics = metrics or RunMetrics()
+    print(f"[Replay] Rebuilding outputs from {args.replay} (offline)...")
+    metrics.begin("replay")
+    cache = None
+    if not args.no_cache and os.path.isdir(args.cache_dir):
+        cache = DetailCache(args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    index = TurnIndex(args.sqlite) if args.sqlite else None
+    agg, conversations, header, failures, counts = replay(
+        args.replay, args.details_dir, cache, args.outlier_threshold_ms, index, args.transition_window,
+    )
+    print(f"  {len(conversations)} conversations: {counts['reextracted']} re-extracted from saved details, "
+          f"{counts['stored']} from stored turns → {agg.total_turns} agent turns")
+    if index:
+        index.close()
+        print(f"  Indexed {len(conversations)} conversations into {args.sqlite}")
+    metrics.count("conversations", len(conversations))
+    metrics.count("agent_turns", agg.total_turns)
+
+    metrics.begin("summary")
+    summary_md = render_summary_md(
+        agg, conversations, header.get("root_llm", "unknown"), header.get("node_llm_map") or {},
+        failures, agent_id=header.get("agent_id"),
+    )
+    with open(md_path, "w") as f:
+        f.write(summary_md)
+    print(f"  Wrote {md_path}")
+    metrics.begin("sketches")
+    with open(sketch_path, "w") as f:
+        json.dump(agg.sketches.to_dict(header.get("agent_id") or AGENT_ID), f, separators=(",", ":"))
+    print(f"  Wrote {sketch_path}")
+    metrics.end()
+
+
+# ---------------------------------------------------------------------------
+# Turn index: SQLite store for ad-hoc slicing
+# ---------------------------------------------------------------------------
+
+# (conversation_id, turn_index) is the primary key, which also serves as the
+# conversation_id index. time_unix = conversation start + time_in_call_secs.
+# NUMERIC keeps integer milliseconds as integers, as in the raw JSON.
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id  TEXT PRIMARY KEY,
+    agent_id         TEXT,
+    start_time       INTEGER,
+    duration_seconds INTEGER,
+    status           TEXT,
+    call_successful  TEXT,
+    message_count    INTEGER
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    node_id   TEXT PRIMARY KEY,
+    label     TEXT NOT NULL,
+    llm_model TEXT
+);
+CREATE TABLE IF NOT EXISTS turns (
+    conversation_id              TEXT NOT NULL,
+    turn_index                   INTEGER NOT NULL,
+    time_unix                    INTEGER,
+    time_in_call_secs            INTEGER,
+    active_node_id               TEXT,
+    active_node                  TEXT,
+    active_llm                   TEXT,
+    llm_type                     TEXT,
+    llm_ttfb_ms                  NUMERIC,
+    tts_ttfb_ms                  NUMERIC,
+    ttf_first_sentence_ms        NUMERIC,
+    response_latency_secs_coarse NUMERIC,
+    turn_duration_ms             NUMERIC,
+    response_word_count          INTEGER,
+    response_char_count          INTEGER,
+    has_tool_calls               INTEGER NOT NULL DEFAULT 0,
+    tool_names                   TEXT,
+    interrupted                  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (conversation_id, turn_index)
+);
+CREATE INDEX IF NOT EXISTS idx_turns_node ON turns (active_node_id, llm_ttfb_ms);
+CREATE INDEX IF NOT EXISTS idx_turns_llm ON turns (active_llm, llm_ttfb_ms);
+CREATE INDEX IF NOT EXISTS idx_turns_time ON turns (time_unix);
+CREATE INDEX IF NOT EXISTS idx_turns_ttfb ON turns (llm_ttfb_ms);
+CREATE INDEX IF NOT EXISTS idx_nodes_label ON nodes (label);
+"""
+
+INDEX_TURN_COLUMNS = (
+    "conversation_id", "turn_index", "time_unix", "time_in_call_secs", "active_node_id",
+    "active_node", "active_llm", "llm_type", "llm_ttfb_ms", "tts_ttfb_ms",
+    "ttf_first_sentence_ms", "response_latency_secs_coarse", "turn_duration_ms",
+    "response_word_count", "response_char_count", "has_tool_calls", "tool_names", "interrupted",
+)
+INDEX_GROUPS = {"node": "active_node_id", "llm": "active_llm"}
+
+
+class TurnIndex:
+    """
+    Local SQLite copy of extracted conversations and turns, for interactive
+    slicing over months of data without loading the raw file into Python.
+
+    Writes are upserts keyed on conversation_id / (conversation_id,
+    turn_index), so re-indexing a conversation (incremental runs, replays
+    with a newer extract_turns) replaces its rows instead of duplicating
+    them. Reports run as indexed SQL; only the handful of rows needed for
+    each percentile are read back.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(INDEX_SCHEMA)
+        self._known_nodes: set[str] = set()
+
+    def __enter__(self) -> "TurnIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def upsert_nodes(self, node_map: dict) -> None:
+        self.conn.executemany(
+            "INSERT INTO nodes (node_id, label, llm_model) VALUES (?, ?, ?) "
+            "ON CONFLICT (node_id) DO UPDATE SET label = excluded.label, llm_model = excluded.llm_model",
+            [(nid, info.get("label", nid), info.get("llm_model")) for nid, info in node_map.items()],
+        )
+        self._known_nodes.update(node_map)
+
+    def upsert_conversation(self, conv: dict, turns: list[dict], agent_id: Optional[str] = None) -> None:
+        cid = conv["conversation_id"]
+        start = conv.get("start_time")
+        call_successful = conv.get("call_successful")
+        self.conn.execute(
+            "INSERT INTO conversations VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (conversation_id) DO UPDATE SET agent_id = excluded.agent_id, "
+            "start_time = excluded.start_time, duration_seconds = excluded.duration_seconds, "
+            "status = excluded.status, call_successful = excluded.call_successful, "
+            "message_count = excluded.message_count",
+            (cid, agent_id, start, conv.get("duration_seconds"), conv.get("status"),
+             None if call_successful is None else str(call_successful), conv.get("message_count")),
+        )
+        rows = []
+        for t in turns:
+            node_id = t["active_node_id"]
+            if node_id not in self._known_nodes:
+                # Nodes missing from the agent config (e.g. removed since) keep their extracted label
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO nodes (node_id, label, llm_model) VALUES (?, ?, ?)",
+                    (node_id, t["active_node"], t["active_llm"]),
+                )
+                self._known_nodes.add(node_id)
+            t_secs = t.get("time_in_call_secs")
+            rows.append((
+                cid, t["turn_index"], start + t_secs if start and t_secs is not None else None, t_secs,
+                node_id, t["active_node"], t["active_llm"], t.get("llm_type"),
+                t.get("llm_ttfb_ms"), t.get("tts_ttfb_ms"), t.get("ttf_first_sentence_ms"),
+                t.get("response_latency_secs_coarse"), t.get("turn_duration_ms"),
+                t.get("response_word_count"), t.get("response_char_count"),
+                int(bool(t.get("has_tool_calls"))), json.dumps(t.get("tool_names") or []),
+                int(bool(t.get("interrupted"))),
+            ))
+        columns = ", ".join(INDEX_TURN_COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in INDEX_TURN_COLUMNS[2:])
+        self.conn.executemany(
+            f"INSERT INTO turns ({columns}) VALUES ({', '.join('?' * len(INDEX_TURN_COLUMNS))}) "
+            f"ON CONFLICT (conversation_id, turn_index) DO UPDATE SET {updates}",
+            rows,
+        )
+        # A re-extraction that yields fewer turns must not leave stale tail rows behind
+        self.conn.execute(
+            "DELETE FROM turns WHERE conversation_id = ? AND turn_index >= ?", (cid, len(turns)),
+        )
+
+    def index_turns(self, conversations: list[dict], turns: list[dict], agent_id: Optional[str] = None) -> None:
+        """Upsert conversations with their turns taken from a flat turn list."""
+        groups: dict[str, list[dict]] = {}
+        for t in turns:
+            groups.setdefault(t["conversation_id"], []).append(t)
+        for conv in conversations:
+            self.upsert_conversation(conv, groups.get(conv["conversation_id"], []), agent_id)
+        self.conn.commit()
+
+    # ---- Queries ----
+
+    @staticmethod
+    def where_clause(
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        node: Optional[str] = None,
+        llm: Optional[str] = None,
+        tools_only: bool = False,
+    ) -> tuple[str, list]:
+        """SQL filter over turns; since/until are inclusive UTC days (YYYY-MM-DD)."""
+        clauses, params = [], []
+        if since:
+            clauses.append("time_unix >= ?")
+            params.append(int(datetime.strptime(since, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()))
+        if until:
+            clauses.append("time_unix < ?")
+            params.append(int(datetime.strptime(until, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()) + 86400)
+        if node:
+            # Accept either a node label ("Dr. Noir") or a workflow node id
+            clauses.append("active_node_id IN (SELECT node_id FROM nodes WHERE label = ? OR node_id = ?)")
+            params.extend([node, node])
+        if llm:
+            clauses.append("active_llm = ?")
+            params.append(llm)
+        if tools_only:
+            clauses.append("has_tool_calls = 1")
+        return (" AND ".join(clauses) or "1"), params
+
+    def group_stats(self, by: str, where: str = "1", params: Iterable = ()) -> list[dict]:
+        """
+        Per-group turn counts, interruption rate and LLM TTFB stats (same
+        definitions as stats()), ordered by turn count descending. Percentiles
+        come from a ranked window query that returns only the rows straddling
+        each requested rank.
+        """
+        col = INDEX_GROUPS[by]
+        params = list(params)
+        groups = {}
+        for key, n_turns, interrupted, n, mean, lo, hi in self.conn.execute(
+            f"SELECT {col}, COUNT(*), SUM(interrupted), COUNT(llm_ttfb_ms), AVG(llm_ttfb_ms), "
+            f"MIN(llm_ttfb_ms), MAX(llm_ttfb_ms) FROM turns WHERE {where} GROUP BY {col}",
+            params,
+        ):
+            groups[key] = {
+                "key": key, "turns": n_turns, "interrupted": interrupted or 0, "count": n,
+                "mean": round(mean, 1) if n else None, "min": round(lo, 1) if n else None,
+                "max": round(hi, 1) if n else None, "_ranked": {},
+            }
+
+        # Ranks needed for median / P75 / P95 given each group's count
+        wanted = {}
+        for key, g in groups.items():
+            n = g["count"]
+            if n:
+                for p in (50, 75, 95):
+                    lo = int((n - 1) * p / 100)
+                    wanted.setdefault(key, set()).update((lo, min(lo + 1, n - 1)))
+        if wanted:
+            for key, rank, value in self.conn.execute(
+                f"SELECT k, rn, v FROM (SELECT {col} AS k, llm_ttfb_ms AS v, "
+                f"ROW_NUMBER() OVER (PARTITION BY {col} ORDER BY llm_ttfb_ms) - 1 AS rn, "
+                f"COUNT(*) OVER (PARTITION BY {col}) AS n "
+                f"FROM turns WHERE llm_ttfb_ms IS NOT NULL AND {where}) "
+                f"WHERE rn IN ((n - 1) * 50 / 100, (n - 1) * 50 / 100 + 1, (n - 1) * 75 / 100, "
+                f"(n - 1) * 75 / 100 + 1, (n - 1) * 95 / 100, (n - 1) * 95 / 100 + 1)",
+                params,
+            ):
+                groups[key]["_ranked"][rank] = value
+
+        for g in groups.values():
+            n, ranked = g["count"], g.pop("_ranked")
+            for name, p in (("median", 50), ("p75", 75), ("p95", 95)):
+                if not n:
+                    g[name] = None
+                    continue
+                idx = (n - 1) * p / 100
+                lo = int(idx)
+                hi = min(lo + 1, n - 1)
+                g[name] = round(ranked[lo] * (1 - (idx - lo)) + ranked[hi] * (idx - lo), 1)
+        if by == "node":
+            labels = dict(self.conn.execute("SELECT node_id, label FROM nodes"))
+            for g in groups.values():
+                g["label"] = labels.get(g["key"], g["key"])
+        return sorted(groups.values(), key=lambda g: -g["turns"])
+
+    def outliers(
+        self,
+        threshold_ms: float = OUTLIER_THRESHOLD_MS,
+        where: str = "1",
+        params: Iterable = (),
+        limit: Optional[int] = None,
+    ) -> list[dict]:
+        """Turns with LLM TTFB above the threshold, slowest first (range scan on idx_turns_ttfb)."""
+        sql = (
+            "SELECT conversation_id, turn_index, time_in_call_secs, active_node, llm_ttfb_ms, "
+            f"response_word_count, interrupted FROM turns WHERE llm_ttfb_ms > ? AND {where} "
+            "ORDER BY llm_ttfb_ms DESC"
+        )
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        cols = ("conversation_id", "turn_index", "time_in_call_secs", "active_node", "llm_ttfb_ms",
+                "response_word_count", "interrupted")
+        return [
+            {**dict(zip(cols, row)), "interrupted": bool(row[6])}
+            for row in self.conn.execute(sql, [threshold_ms, *params])
+        ]
+
+
+def render_index_report(index: TurnIndex, report: str, args: argparse.Namespace) -> str:
+    """Per-node / per-LLM / outlier tables straight from the SQLite turn index."""
+    where, params = TurnIndex.where_clause(args.since, args.until, args.node, args.llm, args.tools_only)
+    (n_convs, n_turns), = index.conn.execute(
+        f"SELECT COUNT(DISTINCT conversation_id), COUNT(*) FROM turns WHERE {where}", params,
+    )
+    lines = [f"# JRVS V3 Latency Index Report ({report})", ""]
+    filters = [f"{name}={value}" for name, value in (
+        ("since", args.since), ("until", args.until), ("node", args.node), ("llm", args.llm),
+    ) if value]
+    if args.tools_only:
+        filters.append("tool-call turns only")
+    lines.append(f"**Index:** `{index.path}`  ")
+    lines.append(f"**Filters:** {', '.join(filters) or 'none'}  ")
+    lines.append(f"**Conversations:** {n_convs}  ")
+    lines.append(f"**Agent turns:** {n_turns}  ")
+    lines.append("")
+
+    def fmt(v):
+        return "N/A" if v is None else v
+
+    if report in ("nodes", "llms"):
+        by = "node" if report == "nodes" else "llm"
+        lines.append(f"| {'Node' if by == 'node' else 'LLM Model'} | Turns | Mean TTFB | Median | Min | Max | P75 | P95 | Interrupted% |")
+        lines.append("|---|---|---|---|---|---|---|---|---|")
+        for g in index.group_stats(by, where, params):
+            key = g["label"] if by == "node" else f"`{g['key']}`"
+            int_pct = round(100 * g["interrupted"] / g["turns"]) if g["turns"] else 0
+            lines.append(
+                f"| {key} | {g['turns']} | {fmt(g['mean'])} | {fmt(g['median'])} | {fmt(g['min'])} "
+                f"| {fmt(g['max'])} | {fmt(g['p75'])} | {fmt(g['p95'])} | {int_pct}% |"
+            )
+    else:
+        outliers = index.outliers(args.outlier_threshold_ms, where, params, args.limit)
+        lines.append(f"**{len(outliers)} outlier turns (LLM TTFB > {args.outlier_threshold_ms}ms).**")
+        lines.append("")
+        if outliers:
+            lines.append("| conversation_id | turn_index | t (secs) | Node | LLM TTFB (ms) | Words | Interrupted |")
+            lines.append("|---|---|---|---|---|---|---|")
+            for t in outliers:
+                lines.append(
+                    f"| `{t['conversation_id'][:30]}` | {t['turn_index']} | {t['time_in_call_secs']}s "
+                    f"| {t['active_node']} | **{t['llm_ttfb_ms']}** | {t['response_word_count']} | {t['interrupted']} |"
+                )
+    lines.append("")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Run comparison: bootstrap deltas + distribution shift → regression gate
+# ---------------------------------------------------------------------------
+
+COMPARE_METRICS = ("llm_ttfb_ms", "tts_ttfb_ms", "ttf_first_sentence_ms", "critical_path_ms", "perceived_latency_ms")
+COMPARE_STATS = ("mean", "median", "p95")
+
+
+def parse_dataset_spec(spec: str) -> tuple[str, Optional[str], Optional[str]]:
+    """
+    Split a --compare dataset into (path, since, until). PATH alone is the
+    whole raw file; PATH@SINCE..UNTIL keeps conversations started on those
+    UTC days (inclusive, YYYY-MM-DD; either side may be empty).
+    """
+    path, sep, window = spec.rpartition("@")
+    if not sep or ".." not in window:
+        return spec, None, None
+    since, _, until = window.partition("..")
+    for day in (since, until):
+        if day:
+            datetime.strptime(day, "%Y-%m-%d")  # ValueError on a malformed day
+    return path, since or None, until or None
+
+
+def load_compare_dataset(spec: str, metric: str) -> dict:
+    """
+    Stream a raw JSON/JSONL file (RawReader) and collect `metric` for every
+    turn in the spec's day window, grouped as ("all", "*"), ("node", label)
+    and ("llm", model). Values are returned sorted.
+    """
+    path, since, until = parse_dataset_spec(spec)
+    if not os.path.exists(path):
+        sys.exit(f"ERROR: no raw dataset at {path}")
+    groups: dict[tuple[str, str], list[float]] = {("all", "*"): []}
+    n_convs = n_turns = 0
+    reader = RawReader(path)
+    for conv, turns in reader.conversations():
+        if since or until:
+            day = conversation_day(conv.get("start_time"))
+            if day == "unknown" or (since and day < since) or (until and day > until):
+                continue
+        n_convs += 1
+        for t in turns:
+            n_turns += 1
+            v = t.get(metric)
+            if v is None:
+                continue
+            groups[("all", "*")].append(v)
+            groups.setdefault(("node", t["active_node"]), []).append(v)
+            groups.setdefault(("llm", t["active_llm"]), []).append(v)
+    for vals in groups.values():
+        vals.sort()
+    return {
+        "spec": spec,
+        "path": path,
+        "since": since,
+        "until": until,
+        "conversations": n_convs,
+        "turns": n_turns,
+        "groups": groups,
+    }
+
+
+def empirical_quantile(sorted_vals: list[float], u: float) -> float:
+    """Inverse empirical CDF at u ∈ (0, 1): the value a uniform draw u maps to when resampling."""
+    n = len(sorted_vals)
+    return sorted_vals[min(int(u * n), n - 1)]
+
+
+def bootstrap_stats(sorted_vals: list[float], n_boot: int, rng: random.Random) -> dict[str, list[float]]:
+    """
+    Bootstrap distributions of mean, median and P95, n_boot draws each, in
+    O(n_boot) regardless of sample size — one batch per statistic instead of
+    n_boot resamples of n values:
+
+      median / P95 — a resample's k-th order statistic is F̂⁻¹(U₍ₖ₎) with
+          U₍ₖ₎ ~ Beta(k, n − k + 1); the next one up is U₍ₖ₎ + (1 − U₍ₖ₎)·
+          Beta(1, n − k). Drawing those and interpolating exactly as
+          percentile() does samples the percentile bootstrap directly.
+      mean — not resampled: draws come from the normal approximation
+          N(x̄, s/√n), which the bootstrap distribution of the mean matches
+          to well within CI precision at the COMPARE_MIN_SAMPLES floor. The
+          report labels the mean CI accordingly.
+    """
+    n = len(sorted_vals)
+    mean = sum(sorted_vals) / n
+    sd = statistics.pstdev(sorted_vals) if n > 1 else 0.0
+    out = {"mean": [rng.gauss(mean, sd / math.sqrt(n)) for _ in range(n_boot)]}
+    beta = rng.betavariate
+    for name, p in (("median", 50), ("p95", 95)):
+        idx = (n - 1) * p / 100
+        lo = int(idx)
+        frac = idx - lo
+        k = lo + 1  # 1-based rank of the lower order statistic
+        draws = []
+        for _ in range(n_boot):
+            u_lo = beta(k, n - k + 1)
+            v = empirical_quantile(sorted_vals, u_lo)
+            if frac and k < n:
+                u_hi = u_lo + (1 - u_lo) * beta(1, n - k)
+                v = v * (1 - frac) + empirical_quantile(sorted_vals, u_hi) * frac
+            draws.append(v)
+        out[name] = draws
+    return out
+
+
+def mann_whitney_u(a: list[float], b: list[float]) -> tuple[float, float]:
+    """
+    Two-sided Mann–Whitney U test of `b` vs `a` (normal approximation with
+    tie and continuity correction). Returns (P(b > a) + ½·P(b = a), p-value):
+    the first is the common-language effect size, 0.5 = no shift.
+    """
+    n1, n2 = len(a), len(b)
+    pooled = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    rank_sum_b = 0.0
+    tie_term = 0.0
+    i = 0
+    n = n1 + n2
+    while i < n:
+        j = i
+        while j < n and pooled[j][0] == pooled[i][0]:
+            j += 1
+        avg_rank = (i + j + 1) / 2  # ranks i+1 … j
+        rank_sum_b += avg_rank * sum(1 for k in range(i, j) if pooled[k][1])
+        tie_term += (j - i) ** 3 - (j - i)
+        i = j
+    u_b = rank_sum_b - n2 * (n2 + 1) / 2
+    mu = n1 * n2 / 2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))) if n > 1 else 0.0
+    if sigma == 0:
+        return u_b / (n1 * n2), 1.0
+    z = (abs(u_b - mu) - 0.5) / sigma
+    return u_b / (n1 * n2), min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def compare_datasets(
+    baseline: dict,
+    candidate: dict,
+    n_boot: int = COMPARE_BOOTSTRAP_SAMPLES,
+    confidence: float = COMPARE_CONFIDENCE,
+    min_delta_ms: float = COMPARE_MIN_DELTA_MS,
+    seed: int = COMPARE_SEED,
+) -> list[dict]:
+    """
+    Per group present in both datasets: candidate − baseline deltas of mean,
+    median and P95 with confidence intervals (bootstrap_stats: percentile
+    bootstrap for median and P95, normal approximation for the mean), plus the
+    Mann–Whitney shift test. A statistic is a regression when its whole CI
+    lies above 0 and the delta is at least `min_delta_ms` (an improvement,
+    mirrored). Groups with fewer than COMPARE_MIN_SAMPLES values on either
+    side are reported but never flagged. Seeded, so reruns agree.
+    """
+    rng = random.Random(seed)
+    tail = (1 - confidence) / 2
+    rows = []
+    for key, base_vals in baseline["groups"].items():
+        cand_vals = candidate["groups"].get(key)
+        if not base_vals or not cand_vals:
+            continue
+        row = {"group": key, "n_baseline": len(base_vals), "n_candidate": len(cand_vals), "deltas": {}}
+        enough = len(base_vals) >= COMPARE_MIN_SAMPLES and len(cand_vals) >= COMPARE_MIN_SAMPLES
+        row["enough"] = enough
+        point = {
+            "baseline": {"mean": sum(base_vals) / len(base_vals), "median": percentile(base_vals, 50), "p95": percentile(base_vals, 95)},
+            "candidate": {"mean": sum(cand_vals) / len(cand_vals), "median": percentile(cand_vals, 50), "p95": percentile(cand_vals, 95)},
+        }
+        if enough:
+            base_boot = bootstrap_stats(base_vals, n_boot, rng)
+            cand_boot = bootstrap_stats(cand_vals, n_boot, rng)
+            row["shift"], row["p_value"] = mann_whitney_u(base_vals, cand_vals)
+        else:
+            row["shift"], row["p_value"] = None, None
+        for stat in COMPARE_STATS:
+            delta = point["candidate"][stat] - point["baseline"][stat]
+            entry = {
+                "baseline": round(point["baseline"][stat], 1),
+                "candidate": round(point["candidate"][stat], 1),
+                "delta": round(delta, 1),
+                "ci": None,
+                "verdict": "insufficient data" if not enough else "no change",
+            }
+            if enough:
+                diffs = sorted(c - b for b, c in zip(base_boot[stat], cand_boot[stat]))
+                lo, hi = percentile(diffs, 100 * tail), percentile(diffs, 100 * (1 - tail))
+                entry["ci"] = (round(lo, 1), round(hi, 1))
+                if lo > 0 and delta >= min_delta_ms:
+                    entry["verdict"] = "regression"
+                elif hi < 0 and delta <= -min_delta_ms:
+                    entry["verdict"] = "improvement"
+            row["deltas"][stat] = entry
+        rows.append(row)
+    order = {"all": 0, "node": 1, "llm": 2}
+    rows.sort(key=lambda r: (order[r["group"][0]], -r["n_baseline"]))
+    return rows
+
+
+def render_compare_report(
+    baseline: dict,
+    candidate: dict,
+    rows: list[dict],
+    metric: str,
+    n_boot: int,
+    confidence: float,
+    min_delta_ms: float,
+) -> str:
+    lines = ["# JRVS V3 Latency Comparison", ""]
+
+    def describe(d):
+        window = ""
+        if d["since"] or d["until"]:
+            window = f" ({d['since'] or '…'} → {d['until'] or '…'})"
+        return f"`{d['path']}`{window} — {d['conversations']} conversations, {d['turns']} agent turns"
+
+    regressions = [(r, stat) for r in rows for stat, e in r["deltas"].items() if e["verdict"] == "regression"]
+    lines.append(f"**Baseline:** {describe(baseline)}  ")
+    lines.append(f"**Candidate:** {describe(candidate)}  ")
+    lines.append(f"**Metric:** `{metric}`  ")
+    lines.append(
+        f"**Method:** Δ = candidate − baseline; {round(100 * confidence)}% CI from {n_boot} draws — "
+        f"percentile bootstrap for median and P95, normal approximation (s/√n) for the mean; distribution shift by two-sided Mann–Whitney U. A statistic regresses when its "
+        f"CI lies entirely above 0 and Δ ≥ {min_delta_ms} ms; groups with < {COMPARE_MIN_SAMPLES} values "
+        f"on either side are not tested.  "
+    )
+    lines.append(f"**Result:** {'REGRESSION — ' + str(len(regressions)) + ' flagged' if regressions else 'no significant regressions'}")
+    lines.append("")
+
+    def group_name(key):
+        kind, label = key
+        if kind == "all":
+            return "**All turns**"
+        return label if kind == "node" else f"`{label}`"
+
+    if regressions:
+        lines.append("## Regressions")
+        lines.append("")
+        for r, stat in regressions:
+            e = r["deltas"][stat]
+            lines.append(
+                f"- {group_name(r['group'])} {stat}: {e['baseline']} → {e['candidate']} ms "
+                f"(Δ +{e['delta']}, CI [{e['ci'][0]}, {e['ci'][1]}], Mann–Whitney p = {r['p_value']:.3g})"
+            )
+        lines.append("")
+
+    def cell(e):
+        if e["ci"] is None:
+            return f"{e['delta']:+} (n/a)"
+        mark = " ⚠" if e["verdict"] == "regression" else " ✓" if e["verdict"] == "improvement" else ""
+        return f"{e['delta']:+} [{e['ci'][0]:+}, {e['ci'][1]:+}]{mark}"
+
+    for title, kinds in (("Overall and Per-Node", ("all", "node")), ("Per-LLM", ("llm",))):
+        selected = [r for r in rows if r["group"][0] in kinds]
+        if not selected:
+            continue
+        lines.append(f"## {title}")
+        lines.append("")
+        lines.append("| Group | n (base → cand) | Median (base → cand) | Mean Δ [CI] | Median Δ [CI] | P95 Δ [CI] | P(cand > base) | Mann–Whitney p |")
+        lines.append("|---|---|---|---|---|---|---|---|")
+        for r in selected:
+            d = r["deltas"]
+            shift = "N/A" if r["shift"] is None else round(r["shift"], 3)
+            p = "N/A" if r["p_value"] is None else f"{r['p_value']:.3g}"
+            lines.append(
+                f"| {group_name(r['group'])} | {r['n_baseline']} → {r['n_candidate']} "
+                f"| {d['median']['baseline']} → {d['median']['candidate']} "
+                f"| {cell(d['mean'])} | {cell(d['median'])} | {cell(d['p95'])} | {shift} | {p} |"
+            )
+        lines.append("")
+    only = sorted(
+        {key for key in baseline["groups"] if key not in candidate["groups"]}
+        | {key for key in candidate["groups"] if key not in baseline["groups"]}
+    )
+    if only:
+        lines.append("*Present in only one dataset (not compared): " + ", ".join(f"{k}: {v}" for k, v in only) + "*")
+        lines.append("")
+    lines.append("*⚠ regression, ✓ improvement (CI excludes 0 and |Δ| ≥ the minimum effect).*")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def run_compare(args: argparse.Namespace) -> int:
+    """--compare: print (and optionally write) the report; returns the exit status (1 = regression)."""
+    baseline = load_compare_dataset(args.compare[0], args.compare_metric)
+    candidate = load_compare_dataset(args.compare[1], args.compare_metric)
+    for d in (baseline, candidate):
+        if not d["groups"][("all", "*")]:
+            # An empty side would otherwise pass the gate silently
+            sys.exit(f"ERROR: no {args.compare_metric} values in {d['spec']}")
+    rows = compare_datasets(baseline, candidate, args.bootstrap_samples, args.confidence, args.min_delta_ms)
+    report = render_compare_report(
+        baseline, candidate, rows, args.compare_metric, args.bootstrap_samples, args.confidence, args.min_delta_ms,
+    )
+    print(report)
+    if args.compare_out:
+        with open(args.compare_out, "w") as f:
+            f.write(report)
+    regressed = any(e["verdict"] == "regression" for r in rows for e in r["deltas"].values())
+    return 1 if regressed else 0
+
+
+# ---------------------------------------------------------------------------
+# Live tail: in-progress conversations, rolling windows, clustered alerts
+# ---------------------------------------------------------------------------
+
+class LiveConversation:
+    """
+    Tail state for one in-progress conversation. Each poll re-runs
+    extract_turns over the transcript from `start` — always a user turn,
+    where extraction state (previous user time, tool-prep pairing) resets —
+    so turns come out exactly as a full extraction of the finished call
+    would produce them. `base` counts the records before `start` and
+    `chars` the message characters there (prior_transcript_chars offset).
+    """
+
+    __slots__ = ("conversation_id", "start_time", "etag", "start", "base", "chars", "emitted")
+
+    def __init__(self, conversation_id: str, start_time: Optional[int]):
+        self.conversation_id = conversation_id
+        self.start_time = start_time
+        self.etag: Optional[str] = None
+        self.start = 0
+        self.base = 0
+        self.chars = 0
+        self.emitted = 0
+
+    def new_turns(self, transcript: list[dict], done: bool, node_map: dict, root_llm: str) -> list[TurnRecord]:
+        """
+        Turns that settled since the last call, in order. Until the call
+        ends, turns from the transcript's newest second on are held back:
+        more same-second entries may still be deduplicated into them, and
+        their turn_duration_ms is not known yet.
+        """
+        if not transcript:
+            return []
+        cid = self.conversation_id
+        newest = transcript[-1].get("time_in_call_secs", 0)
+        records = extract_turns(cid, transcript[self.start:], node_map, root_llm)
+        settled = len(records)
+        if not done:
+            settled = next((i for i, t in enumerate(records) if t["time_in_call_secs"] >= newest), settled)
+        fresh = records[self.emitted - self.base:settled]
+        for t in fresh:
+            t.turn_index += self.base
+            if t.prior_transcript_chars is not None:
+                t.prior_transcript_chars += self.chars
+        self.emitted += len(fresh)
+
+        # Move the checkpoint to the last user turn before the newest second,
+        # provided every record before it has been emitted.
+        if not done:
+            for u in range(len(transcript) - 1, self.start, -1):
+                entry = transcript[u]
+                if entry["role"] == "user" and entry.get("time_in_call_secs", 0) < newest:
+                    before = len(extract_turns(cid, transcript[self.start:u], node_map, root_llm))
+                    if self.base + before <= self.emitted:
+                        self.base += before
+                        self.chars += sum(len(e.get("message") or "") for e in transcript[self.start:u])
+                        self.start = u
+                    break
+        return fresh
+
+
+class RollingWindow:
+    """The last `size` values of a metric (bounded deque); percentiles on demand."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, size: int):
+        self.values: deque = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        self.values.append(value)
+
+    def percentiles(self) -> tuple[int, Optional[float], Optional[float]]:
+        """(count, P50, P95)"""
+        s = sorted(self.values)
+        if not s:
+            return 0, None, None
+        return len(s), round(percentile(s, 50), 1), round(percentile(s, 95), 1)
+
+
+class BreachAlerter:
+    """
+    Per node, remembers the last `count` LLM TTFB breaches of the outlier
+    threshold (bounded deque). Fires once when they all fall within
+    `window_secs` of call time (start_time + time_in_call_secs, so breaches
+    from concurrent calls cluster together), then stays quiet for that node
+    until a turn arrives more than `window_secs` after its latest breach.
+    """
+
+    def __init__(self, threshold_ms: float, count: int, window_secs: float):
+        self.threshold_ms = threshold_ms
+        self.count = count
+        self.window_secs = window_secs
+        self._breaches: dict[str, deque] = {}
+        self._firing: set[str] = set()
+
+    def observe(self, node: str, at: float, ttfb: Optional[float], cid: str) -> Optional[dict]:
+        recent = self._breaches.setdefault(node, deque(maxlen=self.count))
+        if ttfb is None or ttfb <= self.threshold_ms:
+            if node in self._firing and (not recent or at - recent[-1][0] > self.window_secs):
+                self._firing.discard(node)
+            return None
+        recent.append((at, ttfb, cid))
+        clustered = len(recent) == self.count and recent[-1][0] - recent[0][0] <= self.window_secs
+        if not clustered or node in self._firing:
+            return None
+        self._firing.add(node)
+        return {
+            "node": node,
+            "breaches": [{"at": a, "llm_ttfb_ms": v, "conversation_id": c} for a, v, c in recent],
+            "span_secs": recent[-1][0] - recent[0][0],
+            "threshold_ms": self.threshold_ms,
+        }
+
+
+def poll_live_conversations(client: ApiClient, live: dict[str, LiveConversation], list_etag: Optional[str]) -> Optional[str]:
+    """Register in-progress conversations from the newest list page; returns the page's ETag."""
+    data, list_etag = client.get_if_changed(
+        "/conversations", list_etag, {"agent_id": AGENT_ID, "page_size": TAIL_LIST_PAGE_SIZE},
+    )
+    for conv in (data or {}).get("conversations", []):
+        cid = conv["conversation_id"]
+        if conv.get("status") not in FINAL_STATUSES and cid not in live:
+            live[cid] = LiveConversation(cid, conv.get("start_time_unix_secs"))
+            print(f"  + tracking {cid} ({conv.get('status', 'unknown')})")
+    return list_etag
+
+
+def run_tail(args: argparse.Namespace) -> None:
+    """
+    --tail: poll the conversation list and the details of in-progress
+    conversations (conditional requests, so unchanged ones cost a 304),
+    print each newly settled agent turn with its node's rolling P50/P95, and
+    alert when outlier breaches cluster on a node. Runs until interrupted or
+    for --tail-for seconds.
+    """
+    api_key = get_api_key()
+    if not AGENT_ID:
+        sys.exit("ERROR: MJRVS_ELEVENLABS_AGENT_ID not set in environment")
+    base_url = (args.base_url or BASE_URL).rstrip("/")
+    scheduler = RequestScheduler(args.concurrency, args.max_rps, adaptive=not args.no_adaptive)
+    client = ApiClient(api_key, base_url, args.concurrency, scheduler=scheduler)
+    try:
+        node_map, root_llm = build_node_llm_map(client)
+    except ApiError as e:
+        sys.exit(f"ERROR: {e}")
+    print(f"\n[Tail] Watching agent {AGENT_ID} every {args.poll_secs}s "
+          f"(window {args.tail_window} turns, alert at {args.alert_breaches} breaches "
+          f"> {args.outlier_threshold_ms}ms within {args.alert_window_secs}s)")
+
+    live: dict[str, LiveConversation] = {}
+    windows: dict[str, dict[str, RollingWindow]] = {}
+    alerter = BreachAlerter(args.outlier_threshold_ms, args.alert_breaches, args.alert_window_secs)
+    alert_log = open(args.alert_log, "a") if args.alert_log else None
+    list_etag = None
+    deadline = time.monotonic() + args.tail_for if args.tail_for else None
+
+    def ingest(conv: LiveConversation, t: TurnRecord) -> None:
+        node = t["active_node"]
+        w = windows.setdefault(node, {name: RollingWindow(args.tail_window) for name in ("llm_ttfb_ms", "perceived_latency_ms")})
+        for name, window in w.items():
+            if t[name] is not None:
+                window.add(t[name])
+        n, p50, p95 = w["llm_ttfb_ms"].percentiles()
+        ttfb = t["llm_ttfb_ms"]
+        flag = "!" if ttfb is not None and ttfb > args.outlier_threshold_ms else " "
+        at = (conv.start_time or 0) + t["time_in_call_secs"]
+        clock = datetime.fromtimestamp(at, tz=timezone.utc).strftime("%H:%M:%S") if conv.start_time else f"{t['time_in_call_secs']}s"
+        print(f" {flag}{clock}  {conv.conversation_id[:24]:<24}  {node[:20]:<20}  "
+              f"TTFB {ttfb if ttfb is not None else '—':>6}  TTS {t['tts_ttfb_ms'] if t['tts_ttfb_ms'] is not None else '—':>5}  "
+              f"| {node[:20]} P50/P95 {p50}/{p95} ms (n={n})")
+        alert = alerter.observe(node, at, ttfb, conv.conversation_id)
+        if alert:
+            values = ", ".join(str(b["llm_ttfb_ms"]) for b in alert["breaches"])
+            convs = sorted({b["conversation_id"] for b in alert["breaches"]})
+            print(f"ALERT  {node}: {len(alert['breaches'])} LLM TTFB breaches > {args.outlier_threshold_ms}ms "
+                  f"within {alert['span_secs']}s ({', '.join(convs)}): {values} ms — rolling P95 {p95} ms")
+            if alert_log:
+                alert_log.write(json.dumps({**alert, "rolling_p50_ms": p50, "rolling_p95_ms": p95}) + "\n")
+                alert_log.flush()
+
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                list_etag = poll_live_conversations(client, live, list_etag)
+            except ApiError as e:
+                print(f"  List poll failed: {e} — retrying next poll")
+            for cid, conv in list(live.items()):
+                try:
+                    detail, conv.etag = client.get_if_changed(f"/conversations/{cid}", conv.etag)
+                except ApiError as e:
+                    print(f"  Detail poll for {cid} failed: {e}" + (" — dropping" if e.status == 404 else ""))
+                    if e.status == 404:
+                        del live[cid]
+                    continue
+                if detail is None:
+                    continue  # 304: nothing new
+                done = detail.get("status") in FINAL_STATUSES
+                for t in conv.new_turns(detail.get("transcript") or [], done, node_map, root_llm):
+                    ingest(conv, t)
+                if done:
+                    print(f"  - {cid} ended ({detail.get('status')}, {conv.emitted} agent turns)")
+                    del live[cid]
+            time.sleep(max(0.0, args.poll_secs - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+        if alert_log:
+            alert_log.close()
+    print("\n[Tail] Rolling LLM TTFB by node:")
+    for node, w in sorted(windows.items()):
+        n, p50, p95 = w["llm_ttfb_ms"].percentiles()
+        print(f"  {node:<24} P50 {p50}  P95 {p95}  (last {n} turns)")
+
+
+# ---------------------------------------------------------------------------
+# Corpus mode: several agents, sharded across worker processes
+# ---------------------------------------------------------------------------
+
+def shard_conversations(conversations: list[dict], shards: int) -> list[list[dict]]:
+    """
+    Split into at most `shards` contiguous, near-equal slices. Contiguous
+    slices merged back in order keep the report identical to one pass.
+    """
+    size = -(-len(conversations) // max(1, shards))
+    return [conversations[i:i + size] for i in range(0, len(conversations), size)] if size else []
+
+
+def analyze_shard(task: dict) -> dict:
+    """
+    Worker-process body for one shard of one agent's conversations: fetch
+    details through its own ApiClient and scheduler (task["concurrency"] and
+    task["max_rps"] are this worker's share), extract turns, stream them to
+    the raw JSONL shard, and write the shard's quantile sketches. Returns the
+    partial LatencyAggregator for the parent to merge, plus the analyzed
+    conversations, failures, cache index and timings.
+    """
+    started, cpu_started = time.perf_counter(), time.process_time()
+    cache = None
+    if task["cache_dir"]:
+        cache = DetailCache(task["cache_dir"], task["cache_max_bytes"], refresh=task["refresh"])
+    agent_id = task["agent_id"]
+    agg = LatencyAggregator(task["outlier_threshold_ms"], transition_window=task["transition_window"])
+    analyzed: list[dict] = []
+    writer = RawJsonlWriter(task["raw_path"], raw_header(agent_id, task["root_llm"], task["node_map"]))
+
+    def sink(conv: dict, turns: list[dict]) -> None:
+        writer.write_conversation(conv, turns)
+        agg.add_conversation(conv)
+        agg.extend(turns)
+        analyzed.append(conv)
+
+    scheduler = RequestScheduler(task["concurrency"], task["max_rps"], adaptive=task["adaptive"])
+    try:
+        with ApiClient(task["api_key"], task["base_url"], task["concurrency"], scheduler=scheduler) as client:
+            _, _, failures = fetch_and_extract_all(
+                task["conversations"], client, task["node_map"], task["root_llm"], task["concurrency"],
+                cache, sink, task["details_dir"], task["window"],
+            )
+    except BaseException:
+        writer.abort()
+        raise
+    for f in failures:
+        writer.write_failure(f)
+    writer.close(update_watermark(None, analyzed, [f["conversation_id"] for f in failures]))
+    with open(task["sketch_path"], "w") as f:
+        json.dump(agg.sketches.to_dict(agent_id), f, separators=(",", ":"))
+    return {
+        "agent_id": agent_id,
+        "shard": task["shard"],
+        "aggregator": agg,
+        "conversations": analyzed,
+        "failures": failures,
+        "cache": (cache.index_snapshot(), cache.hits, cache.misses) if cache else None,
+        "scheduler": scheduler.snapshot(),
+        "wall_secs": round(time.perf_counter() - started, 3),
+        "cpu_secs": round(time.process_time() - cpu_started, 3),
+    }
+
+
+def run_corpus(args: argparse.Namespace, output_dir: str, md_path: str, sketch_path: str, metrics: RunMetrics) -> None:
+    """
+    --agents / --workers: list each agent's qualifying conversations, split
+    each list into --workers contiguous shards and analyze the shards in a
+    process pool, so JSON decoding and extraction use every core. Each shard
+    writes its own raw JSONL and sketches under --shard-dir/<agent_id>/; the
+    parent merges the partial aggregates into one summary and sketch file per
+    agent (same directory) and a cross-agent summary and sketches at the
+    usual paths, whose per-LLM section compares models across agents.
+    """
+    api_key = get_api_key()
+    agents = list(dict.fromkeys(args.agents or [AGENT_ID]))
+    if not all(agents):
+        sys.exit("ERROR: MJRVS_ELEVENLABS_AGENT_ID not set in environment (or pass --agents)")
+    base_url = (args.base_url or BASE_URL).rstrip("/")
+    if base_url != DEFAULT_BASE_URL:
+        print(f"Using API base URL {base_url}")
+    cache = cache_dir = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir
+        if base_url != DEFAULT_BASE_URL:
+            cache_dir = os.path.join(cache_dir, "hosts", hashlib.sha256(base_url.encode()).hexdigest()[:16])
+        cache = DetailCache(cache_dir, args.cache_max_mb * 1024 * 1024, refresh=args.refresh)
+    shard_dir = args.shard_dir or os.path.join(output_dir, "jrvs_v3_latency_shards")
+    suffix = RAW_COMPRESSION_SUFFIX[args.compress]
+    worker_concurrency = max(1, args.concurrency // args.workers)
+
+    # Steps 1–2 in this process: node maps and conversation lists are a few requests per agent
+    agent_info: dict[str, dict] = {}
+    tasks: list[dict] = []
+    scheduler = RequestScheduler(args.concurrency, args.max_rps, adaptive=not args.no_adaptive)
+    with ApiClient(api_key, base_url, args.concurrency, metrics=metrics, scheduler=scheduler) as client:
+        for agent_id in agents:
+            try:
+                metrics.begin("agent_config")
+                print(f"\n[Agent {agent_id}]")
+                node_map, root_llm = build_node_llm_map(client, cache, agent_id)
+                metrics.begin("conversation_list")
+                print(f"\n[Step 2] Fetching conversations for agent {agent_id}...")
+                qualifying = list(iter_qualifying_conversations(client, args.max_conversations, agent_id))
+            except ApiError as e:
+                sys.exit(f"ERROR: {e}")
+            print(f"  {len(qualifying)} qualifying conversations")
+            agent_info[agent_id] = {"node_map": node_map, "root_llm": root_llm}
+            agent_dir = os.path.join(shard_dir, agent_id)
+            os.makedirs(agent_dir, exist_ok=True)
+            for name in os.listdir(agent_dir):
+                # Shards of an earlier run with more workers would read as part of this one
+                if name.startswith(("jrvs_v3_latency_raw.shard", "jrvs_v3_latency_sketches.shard")):
+                    os.remove(os.path.join(agent_dir, name))
+            for k, shard in enumerate(shard_conversations(qualifying, args.workers)):
+                tasks.append({
+                    "agent_id": agent_id,
+                    "shard": k,
+                    "conversations": shard,
+                    "node_map": node_map,
+                    "root_llm": root_llm,
+                    "raw_path": os.path.join(agent_dir, f"jrvs_v3_latency_raw.shard{k:03d}.jsonl{suffix}"),
+                    "sketch_path": os.path.join(agent_dir, f"jrvs_v3_latency_sketches.shard{k:03d}.json"),
+                    "api_key": api_key,
+                    "base_url": base_url,
+                    "concurrency": worker_concurrency,
+                    "max_rps": args.max_rps / args.workers,
+                    "adaptive": not args.no_adaptive,
+                    "window": args.window,
+                    "cache_dir": cache_dir,
+                    "cache_max_bytes": args.cache_max_mb * 1024 * 1024,
+                    "refresh": args.refresh,
+                    "details_dir": args.save_details,
+                    "outlier_threshold_ms": args.outlier_threshold_ms,
+                    "transition_window": args.transition_window,
+                })
+    if not tasks:
+        if cache:
+            cache.close()
+        print(f"No conversations >= {MIN_DURATION_SECS}s found. Exiting.")
+        return
+
+    # Steps 3–4: shards across processes
+    metrics.begin("fetch_extract")
+    print(f"\n[Step 3/4] Extracting {len(tasks)} shards of {len(agents)} agent(s) on {args.workers} worker processes "
+          f"(concurrency={worker_concurrency} per worker)...")
+    results: dict[tuple[str, int], dict] = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(analyze_shard, task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                r = future.result()
+            except ApiError as e:
+                for f in futures:
+                    f.cancel()
+                sys.exit(f"ERROR: {e}")
+            results[(r["agent_id"], r["shard"])] = r
+            print(f"  Shard {r['agent_id']}/{r['shard']:03d}: {len(r['conversations'])} conversations, "
+                  f"{r['aggregator'].total_turns} agent turns in {r['wall_secs']}s (cpu {r['cpu_secs']}s)")
+
+    # Step 5: merge partials — per agent in shard order, then across agents in --agents order
+    metrics.begin("merge")
+    merged = LatencyAggregator(args.outlier_threshold_ms, transition_window=args.transition_window)
+    by_agent: dict[str, LatencyAggregator] = {}
+    analyzed: list[dict] = []
+    failures: list[dict] = []
+    workers_info = []
+    for agent_id in agents:
+        agg = LatencyAggregator(args.outlier_threshold_ms, transition_window=args.transition_window)
+        agent_convs: list[dict] = []
+        agent_failures: list[dict] = []
+        for task in tasks:
+            if task["agent_id"] != agent_id:
+                continue
+            r = results[(agent_id, task["shard"])]
+            agg.merge(r["aggregator"])
+            agent_convs.extend(r["conversations"])
+            agent_failures.extend(r["failures"])
+            if cache and r["cache"]:
+                cache.absorb(*r["cache"])
+            workers_info.append({
+                "agent_id": agent_id, "shard": r["shard"], "conversations": len(r["conversations"]),
+                "agent_turns": r["aggregator"].total_turns, "wall_secs": r["wall_secs"], "cpu_secs": r["cpu_secs"],
+                "scheduler": r["scheduler"],
+            })
+        if not agent_convs:
+            continue
+        by_agent[agent_id] = agg
+        info = agent_info[agent_id]
+        agent_dir = os.path.join(shard_dir, agent_id)
+        with open(os.path.join(agent_dir, "jrvs_v3_latency_summary.md"), "w") as f:
+            f.write(render_summary_md(agg, agent_convs, info["root_llm"], info["node_map"], agent_failures, agent_id))
+        with open(os.path.join(agent_dir, "jrvs_v3_latency_sketches.json"), "w") as f:
+            json.dump(agg.sketches.to_dict(agent_id), f, separators=(",", ":"))
+        print(f"  {agent_id}: {len(agent_convs)} conversations, {agg.total_turns} agent turns → {agent_dir}")
+        merged.merge(agg)
+        analyzed.extend(agent_convs)
+        failures.extend(agent_failures)
+    metrics.extra["workers"] = workers_info
+    metrics.count("conversations", len(analyzed))
+    metrics.count("failed_conversations", len(failures))
+    if cache:
+        cache.close()
+        metrics.count("cache_hits", cache.hits)
+        metrics.count("cache_misses", cache.misses)
+
+    metrics.begin("summary")
+    roots = ", ".join(dict.fromkeys(agent_info[a]["root_llm"] for a in by_agent))
+    node_map = {nid: n for a in by_agent for nid, n in agent_info[a]["node_map"].items()}
+    with open(md_path, "w") as f:
+        f.write(render_summary_md(
+            merged, analyzed, roots, node_map, failures, ", ".join(by_agent), by_agent if len(by_agent) > 1 else None,
+        ))
+    print(f"  Wrote {md_path}")
+    metrics.begin("sketches")
+    with open(sketch_path, "w") as f:
+        json.dump(merged.sketches.to_dict(",".join(by_agent)), f, separators=(",", ":"))
+    print(f"  Wrote {sketch_path}")
+    metrics.end()
+    metrics.count("agent_turns", merged.total_turns)
+
+    print("\n=== DONE ===")
+    print(f"Agents: {len(by_agent)}  Conversations analyzed: {len(analyzed)}  Shards: {len(tasks)}")
+    if failures:
+        print(f"Conversations failed: {len(failures)}")
+    s = merged.table.column_stats("llm_ttfb_ms")
+    if s["count"]:
+        print(f"Global LLM TTFB — mean: {s['mean']}ms  median: {s['median']}ms  p95: {s['p95']}ms")
+    print(f"Outlier turns (>{merged.outlier_threshold_ms}ms): {len(merged.outliers)}")
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="JRVS V3 conversational latency analysis")
+    parser.add_argument(
+        "--max-conversations", type=int, default=MAX_CONVERSATIONS,
+        help=f"number of qualifying conversations to analyze (default {MAX_CONVERSATIONS})",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=FETCH_CONCURRENCY,
+        help=f"max parallel API requests; 1 = sequential (default {FETCH_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--base-url",
+        help="ConvAI API base URL, e.g. a local mock server (default $ELEVENLABS_API_BASE_URL or the public API)",
+    )
+    parser.add_argument(
+        "--max-rps", type=float, default=SCHED_MAX_RPS,
+        help=f"ceiling for the adaptive request rate across all endpoints (default {SCHED_MAX_RPS:g})",
+    )
+    parser.add_argument(
+        "--no-adaptive", action="store_true",
+        help="disable adaptive pacing: keep --concurrency requests in flight at up to --max-rps",
+    )
+    parser.add_argument(
+        "--window", type=int, default=PIPELINE_WINDOW,
+        help=f"max conversations listed but not yet extracted; paging pauses when full (default {PIPELINE_WINDOW})",
+    )
+    parser.add_argument(
+        "--agents", nargs="+", metavar="AGENT_ID",
+        help="analyze several agents together: per-agent summaries plus a cross-agent summary "
+             "(default $MJRVS_ELEVENLABS_AGENT_ID alone); implies sharded JSONL output",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="worker processes; > 1 shards each agent's conversations across them (JSONL raw shards "
+             "under --shard-dir), splitting --concurrency and --max-rps between workers (default 1)",
+    )
+    parser.add_argument(
+        "--shard-dir", metavar="DIR",
+        help="with --agents/--workers: per-agent raw shards, sketches and summaries "
+             "(default <output dir>/jrvs_v3_latency_shards)",
+    )
+    parser.add_argument(
+        "--refresh", action="store_true",
+        help="ignore cached agent config and conversation details (fresh copies are still cached)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="disable the on-disk response cache")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help=f"cache directory (default {CACHE_DIR})")
+    parser.add_argument(
+        "--cache-max-mb", type=int, default=CACHE_MAX_BYTES // (1024 * 1024),
+        help="evict least-recently-used cache entries beyond this size (default %(default)s)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="analyze only conversations newer than the watermark in the existing raw JSON and merge them in",
+    )
+    parser.add_argument(
+        "--raw-format", choices=("json", "jsonl"), default="json",
+        help="json: one indented document (default); jsonl: streamed header/conversation/turn lines",
+    )
+    parser.add_argument(
+        "--compress", choices=tuple(RAW_COMPRESSION_SUFFIX), default="none",
+        help="compress --raw-format jsonl output (zstd needs the 'zstandard' package)",
+    )
+    parser.add_argument(
+        "--save-details", metavar="DIR",
+        help="also save every conversation-detail payload as DIR/<conversation_id>.json.gz for --replay",
+    )
+    parser.add_argument(
+        "--replay", metavar="RAW_PATH",
+        help="rebuild the summary and sketches from a saved raw JSON/JSONL file without API access",
+    )
+    parser.add_argument(
+        "--details-dir", metavar="DIR",
+        help="with --replay: re-run extract_turns on saved detail payloads found here (falls back to the cache)",
+    )
+    parser.add_argument(
+        "--summary-out", metavar="PATH",
+        help="write the Markdown summary here instead of jrvs_v3_latency_summary.md",
+    )
+    parser.add_argument(
+        "--outlier-threshold-ms", type=int, default=OUTLIER_THRESHOLD_MS,
+        help=f"LLM TTFB above this is listed as an outlier (default {OUTLIER_THRESHOLD_MS})",
+    )
+    parser.add_argument(
+        "--transition-window", type=int, default=TRANSITION_WINDOW, metavar="N",
+        help=f"turns after a node transfer reported separately from steady state (default {TRANSITION_WINDOW})",
+    )
+    parser.add_argument(
+        "--sketch-report", nargs="+", metavar="SKETCH_JSON",
+        help="merge one or more jrvs_v3_latency_sketches.json files and print percentiles (no API access)",
+    )
+    parser.add_argument(
+        "--sqlite", metavar="DB",
+        help="upsert analyzed conversations and turns into this SQLite turn index (also with --replay)",
+    )
+    parser.add_argument(
+        "--index-report", choices=("nodes", "llms", "outliers"),
+        help="print a per-node, per-LLM or outlier report from the --sqlite index (no API access)",
+    )
+    parser.add_argument("--node", help="with --index-report: only turns on this node (label or workflow node id)")
+    parser.add_argument("--llm", help="with --index-report: only turns served by this LLM")
+    parser.add_argument("--tools-only", action="store_true", help="with --index-report: only turns with tool calls")
+    parser.add_argument("--limit", type=int, help="with --index-report outliers: show at most this many turns")
+    parser.add_argument(
+        "--metrics-out", metavar="PATH",
+        help="write run telemetry JSON here instead of jrvs_v3_latency_metrics.json",
+    )
+    parser.add_argument(
+        "--profile", metavar="PSTATS_PATH",
+        help="run under cProfile, dump stats to PSTATS_PATH and list the top functions in the metrics file",
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true",
+        help="trace allocations with tracemalloc and list the top allocation sites in the metrics file",
+    )
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+        help="compare two raw datasets (PATH or PATH@SINCE..UNTIL, UTC days) per node and LLM; "
+             "exits 1 when a statistically significant regression is found (no API access)",
+    )
+    parser.add_argument(
+        "--compare-metric", choices=COMPARE_METRICS, default="llm_ttfb_ms",
+        help="with --compare: per-turn field to compare (default llm_ttfb_ms)",
+    )
+    parser.add_argument(
+        "--bootstrap-samples", type=int, default=COMPARE_BOOTSTRAP_SAMPLES, metavar="N",
+        help=f"with --compare: bootstrap draws per statistic (default {COMPARE_BOOTSTRAP_SAMPLES})",
+    )
+    parser.add_argument(
+        "--confidence", type=float, default=COMPARE_CONFIDENCE,
+        help=f"with --compare: confidence level of the delta intervals (default {COMPARE_CONFIDENCE})",
+    )
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=COMPARE_MIN_DELTA_MS,
+        help=f"with --compare: smallest delta flagged as a regression (default {COMPARE_MIN_DELTA_MS})",
+    )
+    parser.add_argument("--compare-out", metavar="PATH", help="with --compare: also write the report to PATH")
+    parser.add_argument(
+        "--tail", action="store_true",
+        help="live mode: follow in-progress conversations, print each new turn with rolling per-node "
+             "P50/P95 and alert on clustered outliers (runs until interrupted)",
+    )
+    parser.add_argument(
+        "--poll-secs", type=float, default=TAIL_POLL_SECS,
+        help=f"with --tail: seconds between polls (default {TAIL_POLL_SECS:g})",
+    )
+    parser.add_argument(
+        "--tail-window", type=int, default=TAIL_WINDOW_TURNS, metavar="N",
+        help=f"with --tail: rolling window size in turns per node (default {TAIL_WINDOW_TURNS})",
+    )
+    parser.add_argument(
+        "--alert-breaches", type=int, default=TAIL_ALERT_BREACHES, metavar="K",
+        help=f"with --tail: alert after K outlier breaches on one node ... (default {TAIL_ALERT_BREACHES})",
+    )
+    parser.add_argument(
+        "--alert-window-secs", type=float, default=TAIL_ALERT_WINDOW_SECS, metavar="SECS",
+        help=f"with --tail: ... within SECS of call time (default {TAIL_ALERT_WINDOW_SECS})",
+    )
+    parser.add_argument("--alert-log", metavar="PATH", help="with --tail: append alerts to PATH as JSON lines")
+    parser.add_argument("--tail-for", type=float, metavar="SECS", help="with --tail: stop after SECS")
+    parser.add_argument("--since", help="with --sketch-report/--index-report: first UTC day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="with --sketch-report/--index-report: last UTC day to include (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+    corpus = bool(args.agents) or args.workers > 1
+    if args.compress != "none" and args.raw_format != "jsonl" and not corpus:
+        parser.error("--compress requires --raw-format jsonl")
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if corpus and (args.incremental or args.sqlite or args.replay):
+        parser.error("--agents/--workers cannot be combined with --incremental, --sqlite or --replay")
+    if args.max_conversations < 1:
+        parser.error("--max-conversations must be >= 1")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+    if args.window < 1:
+        parser.error("--window must be >= 1")
+    if args.transition_window < 1:
+        parser.error("--transition-window must be >= 1")
+    if args.tail and (args.poll_secs <= 0 or args.tail_window < 1 or args.alert_breaches < 1):
+        parser.error("--poll-secs must be > 0, --tail-window and --alert-breaches >= 1")
+    if args.compare:
+        if args.bootstrap_samples < 100:
+            parser.error("--bootstrap-samples must be >= 100")
+        if not 0 < args.confidence < 1:
+            parser.error("--confidence must be between 0 and 1")
+        for spec in args.compare:
+            try:
+                parse_dataset_spec(spec)
+            except ValueError:
+                parser.error(f"--compare: bad day window in {spec!r} (expected PATH@YYYY-MM-DD..YYYY-MM-DD)")
+    if args.max_rps <= 0:
+        parser.error("--max-rps must be > 0")
+    if args.index_report and not args.sqlite:
+        parser.error("--index-report requires --sqlite DB")
+    return args
+
+
+def run_analysis(args: argparse.Namespace, output_dir: str, metrics: RunMetrics) -> None:
+    raw_path = raw_output_path(output_dir, args.raw_format, args.compress)
+    md_path = args.summary_out or os.path.join(output_dir, "jrvs_v3_latency_summary.md")
+    sketch_path = os.path.join(output_dir, "jrvs_v3_latency_sketches.json")
+
+    if args.replay:
+        run_replay(args, md_path, sketch_path, metrics)
+        return
+    if args.agents or args.workers > 1:
+        run_corpus(args, output_dir, md_path, sketch_path, metrics)
+        return
+
+    api_key = get_api_key()
+    if not AGENT_ID:
+        sys.exit("ERROR: MJRVS_ELEVENLABS_AGENT_ID not set in environment")
+    streaming = args.raw_format == "jsonl"
+
+    existing = None
+    existing_reader = None
+    watermark = None
+    if args.incremental:
+        if streaming:
+            if os.path.exists(raw_path):
+                existing_reader = RawReader(raw_path)
+                footer = existing_reader.read_footer() or {}
+                existing = {**(existing_reader.header or {}), "watermark": footer.get("watermark")}
+        else:
+            existing = load_raw_output(raw_path)
+        if existing and existing.get("agent_id") not in (None, AGENT_ID):
+            sys.exit(f"ERROR: {raw_path} belongs to agent {existing['agent_id']}, not {AGENT_ID}")
+        if existing is None:
+            watermark = empty_watermark()
+        else:
+            # Raw files written before watermarks existed: derive one from their conversations
+            watermark = existing.get("watermark") or update_watermark(None, existing.get("conversations", []), [])
+
+    base_url = (args.base_url or BASE_URL).rstrip("/")
+    if base_url != DEFAULT_BASE_URL:
+        print(f"Using API base URL {base_url}")
+    cache = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir
+        if base_url != DEFAULT_BASE_URL:
+            # Keep payloads from other servers (mocks, staging) out of the production cache
+            cache_dir = os.path.join(cache_dir, "hosts", hashlib.sha256(base_url.encode()).hexdigest()[:16])
+        cache = DetailCache(cache_dir, args.cache_max_mb * 1024 * 1024, refresh=args.refresh)
+
+    pending_ids: list[str] = []
+    scheduler = RequestScheduler(args.concurrency, args.max_rps, adaptive=not args.no_adaptive)
+    with ApiClient(api_key, base_url, args.concurrency, metrics=metrics, scheduler=scheduler) as client:
+        try:
+            # Step 1: Node→LLM map
+            metrics.begin("agent_config")
+            node_map, root_llm = build_node_llm_map(client, cache)
+
+            # Step 2: Qualifying conversations
+            if args.incremental:
+                metrics.begin("conversation_list")
+                qualifying, pending_ids = fetch_new_conversations(client, watermark, args.max_conversations)
+                ready, still_pending = recheck_pending(client, watermark.get("pending_ids", []), cache)
+                known = {c["conversation_id"] for c in qualifying}
+                qualifying.extend(c for c in ready if c["conversation_id"] not in known)
+                pending_ids.extend(still_pending)
+                if not qualifying:
+                    if cache:
+                        cache.close()
+                    if existing is not None:
+                        # Persist pending_ids changes (finished or newly started calls)
+                        new_wm = update_watermark(watermark, [], pending_ids)
+                        if new_wm != watermark:
+                            if streaming:
+                                rewrite_raw_jsonl_watermark(raw_path, new_wm)
+                            else:
+                                existing["watermark"] = new_wm
+                                with open(raw_path, "w") as f:
+                                    json.dump(existing, f, indent=2, default=raw_json_default)
+                    print("No new conversations since last run. Nothing to do.")
+                    return
+                source = qualifying
+                print(f"\n[Step 3/4] Extracting per-turn data from {len(qualifying)} conversations "
+                      f"(concurrency={args.concurrency})...")
+            else:
+                # List paging feeds detail downloads directly (pipelined Steps 2–4)
+                source = iter_qualifying_conversations(client, args.max_conversations)
+                print(f"\n[Step 2–4] Paging conversations for agent {AGENT_ID} and extracting "
+                      f"per-turn data as they qualify (concurrency={args.concurrency}, window={args.window})...")
+        except ApiError as e:
+            sys.exit(f"ERROR: {e}")
+
+        header = raw_header(AGENT_ID, root_llm, node_map)
+        agg = LatencyAggregator(args.outlier_threshold_ms, transition_window=args.transition_window)
+        index = None
+        if args.sqlite:
+            index = TurnIndex(args.sqlite)
+            index.upsert_nodes(node_map)
+        analyzed: list[dict] = []
+        writer = None
+        sink = None
+        metrics.begin("fetch_extract")
+        if streaming and not args.incremental:
+            # Stream each conversation to disk and into the aggregator as it is extracted
+            writer = RawJsonlWriter(raw_path, header)
+
+            def sink(conv: dict, turns: list[dict]) -> None:
+                writer.write_conversation(conv, turns)
+                agg.add_conversation(conv)
+                agg.extend(turns)
+                analyzed.append(conv)
+                if index:
+                    index.upsert_conversation(conv, turns, AGENT_ID)
+
+        try:
+            qualifying, all_turns, failures = fetch_and_extract_all(
+                source, client, node_map, root_llm, args.concurrency, cache, sink,
+                args.save_details, args.window, metrics,
+            )
+        except BaseException as e:
+            if writer:
+                writer.abort()
+            if isinstance(e, ApiError):
+                sys.exit(f"ERROR: {e}")
+            raise
+
+    if not qualifying:
+        if writer:
+            writer.abort()
+        if cache:
+            cache.close()
+        if index:
+            index.close()
+        print(f"No conversations >= {MIN_DURATION_SECS}s found. Exiting.")
+        return
+    print(f"\n  Analyzed {len(qualifying)} qualifying conversations (>= {MIN_DURATION_SECS}s)")
+    sched = metrics.extra["scheduler"] = scheduler.snapshot()
+    print(f"  Scheduler: {sched['requests']} requests, {sched['throttled_429']} throttled, "
+          f"{sched['decreases']} backoffs; settled at {sched['concurrency_limit']} in flight, {sched['rate_rps']} req/s")
+
+    metrics.count("conversations", len(qualifying))
+    metrics.count("failed_conversations", len(failures))
+    if cache:
+        cache.close()
+        metrics.count("cache_hits", cache.hits)
+        metrics.count("cache_misses", cache.misses)
+        print(f"  Cache: {cache.hits} hits, {cache.misses} misses ({cache.cache_dir})")
+
+    failed_ids = {f["conversation_id"] for f in failures}
+    if sink is None:
+        analyzed = [c for c in qualifying if c["conversation_id"] not in failed_ids]
+        if index:
+            metrics.begin("turn_index")
+            index.index_turns(analyzed, all_turns, AGENT_ID)
+    print(f"\n  Total agent turns: {agg.total_turns if sink else len(all_turns)}")
+    if failures:
+        print(f"  Skipped {len(failures)} conversations after API errors")
+
+    if args.incremental:
+        # Failed conversations are retried on the next run
+        pending_ids.extend(failed_ids)
+        new_watermark = update_watermark(watermark, analyzed, pending_ids)
+    else:
+        new_watermark = update_watermark(None, analyzed, pending_ids)
+
+    # Step 5: Output
+    print("\n[Step 5] Writing outputs...")
+    metrics.begin("raw_output")
+
+    if writer is not None:
+        # Raw JSONL already streamed during extraction
+        for f in failures:
+            writer.write_failure(f)
+        writer.close(new_watermark)
+    elif streaming:
+        # Incremental JSONL: stream the previous file, splicing new conversations in by start time
+        writer = RawJsonlWriter(raw_path, header)
+        new_groups: dict[str, list[dict]] = {}
+        for t in all_turns:
+            new_groups.setdefault(t["conversation_id"], []).append(t)
+        replaced = {c["conversation_id"] for c in analyzed}
+        fresh = sorted(
+            ((c, new_groups.get(c["conversation_id"], [])) for c in analyzed),
+            key=lambda g: -(g[0].get("start_time") or 0),
+        )
+        old = (
+            (c, turns) for c, turns in (existing_reader.conversations() if existing_reader else ())
+            if c["conversation_id"] not in replaced
+        )
+        analyzed = []
+        try:
+            for conv, turns in heapq.merge(fresh, old, key=lambda g: -(g[0].get("start_time") or 0)):
+                writer.write_conversation(conv, turns)
+                agg.add_conversation(conv)
+                agg.extend(turns)
+                analyzed.append(conv)
+        except BaseException:
+            writer.abort()
+            raise
+        for f in failures:
+            writer.write_failure(f)
+        writer.close(new_watermark)
+        print(f"  Merged dataset: {len(analyzed)} conversations, {agg.total_turns} agent turns")
+    else:
+        if args.incremental:
+            analyzed, all_turns = merge_raw_turns(existing, analyzed, all_turns)
+            existing = None  # its turn list would keep the merged records alive
+            print(f"  Merged dataset: {len(analyzed)} conversations, {len(all_turns)} agent turns")
+        write_raw_json(raw_path, header, analyzed, all_turns, new_watermark, failures)
+        for c in analyzed:
+            agg.add_conversation(c)
+        agg.consume(all_turns)
+    print(f"  Wrote {raw_path}")
+
+    # Summary MD
+    metrics.begin("summary")
+    summary_md = render_summary_md(agg, analyzed, root_llm, node_map, failures)
+    with open(md_path, "w") as f:
+        f.write(summary_md)
+    print(f"  Wrote {md_path}")
+
+    # Quantile sketches (mergeable across runs/days without the raw turns)
+    metrics.begin("sketches")
+    with open(sketch_path, "w") as f:
+        json.dump(agg.sketches.to_dict(AGENT_ID), f, separators=(",", ":"))
+    print(f"  Wrote {sketch_path}")
+
+    if index:
+        metrics.begin("turn_index")
+        index.close()
+        print(f"  Updated turn index {args.sqlite}")
+    metrics.end()
+    metrics.count("agent_turns", agg.total_turns)
+
+    print("\n=== DONE ===")
+    print(f"Conversations analyzed: {len(analyzed)}")
+    if failures:
+        print(f"Conversations failed: {len(failures)}")
+    s = agg.table.column_stats("llm_ttfb_ms")
+    if s["count"]:
+        print(f"Global LLM TTFB — mean: {s['mean']}ms  median: {s['median']}ms  p95: {s['p95']}ms")
+    print(f"Outlier turns (>{agg.outlier_threshold_ms}ms): {len(agg.outliers)}")
+
+
+def write_metrics(
+    metrics: RunMetrics,
+    path: str,
+    profiler: Optional[cProfile.Profile] = None,
+    profile_path: Optional[str] = None,
+) -> None:
+    """Finish optional cProfile/tracemalloc capture and write the metrics JSON."""
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+        top = sorted(pstats.Stats(profiler).stats.items(), key=lambda kv: -kv[1][3])[:PROFILE_TOP_N]
+        metrics.extra["profile"] = {
+            "path": profile_path,
+            "top_cumulative": [
+                {"function": f"{file}:{line}({name})", "calls": nc, "tottime": round(tt, 4), "cumtime": round(ct, 4)}
+                for (file, line, name), (_, nc, tt, ct, _) in top
+            ],
+        }
+    metrics.end()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        metrics.extra["tracemalloc"] = metrics.memory_snapshot
+    with open(path, "w") as f:
+        json.dump(metrics.to_dict(), f, indent=2)
+    metrics.print_stages()
+    print(f"  Wrote {path}")
+
+
+def main(argv: Optional[list[str]] = None):
+    args = parse_args(argv)
+    if args.compare:
+        sys.exit(run_compare(args))
+    if args.tail:
+        run_tail(args)
+        return
+    if args.sketch_report:
+        sketches = load_sketch_files(args.sketch_report)
+        print(render_sketch_report(sketches, args.since, args.until))
+        return
+    if args.index_report:
+        if not os.path.exists(args.sqlite):
+            sys.exit(f"ERROR: no turn index at {args.sqlite}")
+        with TurnIndex(args.sqlite) as index:
+            print(render_index_report(index, args.index_report, args))
+        return
+
+    output_dir = os.path.dirname(os.path.abspath(__file__))
+    metrics_path = args.metrics_out or os.path.join(output_dir, "jrvs_v3_latency_metrics.json")
+    metrics = RunMetrics()
+    metrics.extra["argv"] = sys.argv[1:] if argv is None else list(argv)
+    if args.trace_memory:
+        tracemalloc.start()
+    profiler = None
+    if args.profile:
+        # cProfile sees the calling thread: paging, extraction and output, not the download workers
+        profiler = cProfile.Profile()
+        profiler.enable()
+    metrics.extra["status"] = "error"
+    try:
+        run_analysis(args, output_dir, metrics)
+        metrics.extra["status"] = "ok"
+    except SystemExit as e:
+        metrics.extra["status"] = "ok" if e.code in (None, 0) else "error"
+        raise
+    finally:
+        write_metrics(metrics, metrics_path, profiler, args.profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+JRVS V3 Latency Analysis — Scaling Benchmarks
+=============================================
+Times the analyzer's hot paths on seeded synthetic transcripts, from 1k to
+10M transcript turns, and saves throughput, CPU time, peak memory and a
+scaling exponent per stage as JSON.
+
+Synthetic transcripts follow the ElevenLabs conversation-detail payload:
+alternating user/agent turns with integer time_in_call_secs, tool-call prep
+turns (chained at times) with a same-second empty duplicate and the spoken
+reply a few seconds later, interrupted turns,
+conversation_turn_metrics (LLM/TTS TTFB, time to first sentence) and
+agent_metadata.workflow_node_id drawn from the node map. Node, tool and
+latency distributions are calibrated from jrvs_v3_latency_raw.json when it
+exists (--raw), so the synthetic mix resembles production traffic.
+
+Stages:
+  deduplicate_turns  — per conversation
+  extract_turns      — per conversation (includes its own dedup pass)
+  stats              — stats() over every LLM TTFB value
+  percentile         — percentile() at P0..P100 on the sorted TTFB values
+  build_summary_md   — aggregation (one pass over all turns) + Markdown render
+
+Usage:
+  python jrvs_v3_latency_bench.py                                  # 1k … 1M turns
+  python jrvs_v3_latency_bench.py --sizes 1k 10k 100k 1M 10M --repeat 1
+  python jrvs_v3_latency_bench.py --compare bench_baseline.json    # exit 1 on regression
+
+  Each size is timed --repeat times (best run kept; sizes above 100k run
+  once). Peak memory is measured in a separate tracemalloc pass, so tracing
+  overhead never skews the timings; sizes above --memory-max-turns skip it.
+  "peak/call" is the largest single call's working set (one conversation
+  for deduplicate_turns / extract_turns); "run" is the most memory the run
+  held during the stage, aggregate included — the whole-dataset figure.
+  The scaling exponent is the log-log slope of stage time against turns
+  (1.0 = linear). --compare flags stages whose throughput fell by more than
+  --tolerance at any size shared with the baseline (timings under 1ms are
+  ignored as noise).
+
+Output:
+  jrvs_v3_latency_bench.json — one result per size and stage, plus scaling fits
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from array import array
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+import jrvs_v3_latency_analysis as jrvs
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_SEED = 1729
+DEFAULT_REPEAT = 3
+REPEAT_MAX_TURNS = 100_000  # larger sizes are timed once
+MEMORY_MAX_TURNS = 1_000_000
+TURNS_PER_CONVERSATION = 300  # transcript entries, ~40-minute call
+REGRESSION_TOLERANCE = 0.25
+MIN_COMPARABLE_SECS = 0.001  # shorter stage timings are too noisy to flag
+TOOL_SHARE_TOLERANCE = 0.05  # extracted prep-turn share vs profile.tool_rate
+TOOL_SHARE_MIN_TURNS = 10_000  # smaller sizes are too noisy to check
+STAGES = ("deduplicate_turns", "extract_turns", "stats", "percentile", "build_summary_md")
+BENCH_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jrvs_v3_latency_bench.json")
+SYNTHETIC_START = 1772323200  # 2026-03-01 00:00 UTC
+
+
+# ---------------------------------------------------------------------------
+# Synthetic transcript generator
+# ---------------------------------------------------------------------------
+
+class TranscriptProfile:
+    """
+    Distributions the generator samples from: node weights, tool-call rate
+    and tool mix, interruption rate, and log-normal LLM/TTS TTFB parameters.
+    from_raw() fits them to a saved raw dataset; the defaults approximate
+    the committed 722-turn baseline.
+
+    tool_rate is the share of extracted turns that are tool-call prep turns
+    (zero-word records of their own); tool_chain_rate is how often a prep
+    turn is followed directly by another one.
+    """
+
+    def __init__(self, node_map: dict, root_llm: str):
+        self.node_map = node_map
+        self.root_llm = root_llm
+        self.node_ids = list(node_map)
+        self.node_weights = [1.0] * len(self.node_ids)
+        self.tool_names = ["mjrvs_docs", "google_search", "exa_search", "maya_memory"]
+        self.tool_weights = [1.0] * len(self.tool_names)
+        self.tool_rate = 0.30
+        self.tool_chain_rate = 0.46
+        self.interrupt_rate = 0.32
+        self.llm_ttfb_log = (math.log(1.76), 0.55)  # (mu, sigma) of ln(seconds)
+        self.tts_ttfb_log = (math.log(0.38), 0.25)
+        self.metrics_rate = 0.95  # share of agent turns carrying turn metrics
+
+    @classmethod
+    def default(cls) -> "TranscriptProfile":
+        labels = ["Qualification", "Dr. Noir", "VAG", "Thought Partner", "Coding"]
+        node_map = {
+            f"node_synthetic_{i:02d}": {
+                "label": label, "llm_model": "claude-sonnet-4-5", "llm_type": "native", "is_inherited": True,
+            }
+            for i, label in enumerate(labels)
+        }
+        profile = cls(node_map, "claude-sonnet-4-5")
+        profile.node_weights = [598, 72, 26, 14, 12]
+        return profile
+
+    @classmethod
+    def from_raw(cls, path: str) -> "TranscriptProfile":
+        data = jrvs.load_raw_output(path)
+        if not data or not data.get("node_llm_map") or not data.get("turns"):
+            return cls.default()
+        profile = cls(data["node_llm_map"], data.get("root_llm") or "unknown")
+        turns = data["turns"]
+
+        node_counts = {nid: 0 for nid in profile.node_ids}
+        tool_counts: dict[str, int] = {}
+        for t in turns:
+            if t["active_node_id"] in node_counts:
+                node_counts[t["active_node_id"]] += 1
+            for name in t.get("tool_names", []):
+                tool_counts[name] = tool_counts.get(name, 0) + 1
+        # Unused nodes keep a small weight so every node id still appears at scale
+        profile.node_weights = [max(node_counts[nid], 0.5) for nid in profile.node_ids]
+        if tool_counts:
+            profile.tool_names = list(tool_counts)
+            profile.tool_weights = list(tool_counts.values())
+        profile.tool_rate = sum(1 for t in turns if t.get("has_tool_calls")) / len(turns)
+        followed = chained = 0
+        for t, nxt in zip(turns, turns[1:]):
+            if t.get("has_tool_calls") and nxt["conversation_id"] == t["conversation_id"]:
+                followed += 1
+                chained += bool(nxt.get("has_tool_calls"))
+        if followed:
+            profile.tool_chain_rate = min(chained / followed, 0.9)
+        profile.interrupt_rate = sum(1 for t in turns if t.get("interrupted")) / len(turns)
+
+        def lognormal(field: str, default: tuple[float, float]) -> tuple[float, float]:
+            logs = [math.log(t[field] / 1000) for t in turns if t.get(field)]
+            if len(logs) < 2:
+                return default
+            mu = sum(logs) / len(logs)
+            return mu, math.sqrt(sum((x - mu) ** 2 for x in logs) / (len(logs) - 1))
+
+        profile.llm_ttfb_log = lognormal("llm_ttfb_ms", profile.llm_ttfb_log)
+        profile.tts_ttfb_log = lognormal("tts_ttfb_ms", profile.tts_ttfb_log)
+        return profile
+
+
+def synthetic_transcript(rng: random.Random, profile: TranscriptProfile, n_entries: int) -> list[dict]:
+    """
+    One conversation-detail transcript with about `n_entries` entries.
+    Tool-using replies are preceded, as in the payload, by one or more
+    tool-only prep turns, each with a same-second empty artifact that
+    deduplicate_turns must drop, and the reply follows a few seconds later.
+    Prep chains are drawn so that the extracted share of prep turns matches
+    profile.tool_rate.
+    """
+    # Each prep turn is its own extracted record: with E[k] prep turns per
+    # reply the prep share is E[k] / (1 + E[k]), and E[k] = start / (1 - chain)
+    share = min(profile.tool_rate, 0.9)
+    prep_start = share / (1 - share) * (1 - profile.tool_chain_rate)
+
+    def llm_metrics() -> dict:
+        if rng.random() < profile.metrics_rate:
+            return {"convai_llm_service_ttfb": {"elapsed_time": rng.lognormvariate(*profile.llm_ttfb_log)}}
+        return {}
+
+    transcript = []
+    t = 0
+    node_id = rng.choices(profile.node_ids, profile.node_weights)[0]
+    while len(transcript) < n_entries:
+        transcript.append({
+            "role": "user",
+            "time_in_call_secs": t,
+            "message": "word " * rng.randint(1, 25),
+        })
+        t += rng.randint(1, 6)
+
+        if rng.random() < 0.15:
+            # Workflow transitions are sticky: most turns stay on the current node
+            node_id = rng.choices(profile.node_ids, profile.node_weights)[0]
+        metadata = {"workflow_node_id": node_id}
+
+        chance = prep_start
+        while rng.random() < chance:
+            tool = rng.choices(profile.tool_names, profile.tool_weights)[0]
+            transcript.append({
+                "role": "agent",
+                "time_in_call_secs": t,
+                "message": None,
+                "tool_calls": [{"tool_name": tool, "params_as_json": "{}", "tool_has_been_called": True}],
+                "agent_metadata": metadata,
+                "conversation_turn_metrics": {"metrics": llm_metrics()},
+            })
+            transcript.append({
+                "role": "agent",
+                "time_in_call_secs": t,
+                "message": "",
+                "tool_calls": [],
+                "agent_metadata": metadata,
+            })
+            # The tool runs before the next LLM call: whole seconds, mostly 2–4
+            t += max(1, round(rng.lognormvariate(math.log(3), 0.6)))
+            chance = profile.tool_chain_rate
+
+        metrics = llm_metrics()
+        if metrics:
+            metrics["convai_tts_service_ttfb"] = {"elapsed_time": rng.lognormvariate(*profile.tts_ttfb_log)}
+            metrics["convai_llm_service_ttf_sentence"] = {
+                "elapsed_time": metrics["convai_llm_service_ttfb"]["elapsed_time"] + rng.uniform(0.1, 1.5),
+            }
+        transcript.append({
+            "role": "agent",
+            "time_in_call_secs": t,
+            "message": "reply " * rng.randint(3, 60),
+            "tool_calls": [],
+            "interrupted": rng.random() < profile.interrupt_rate,
+            "agent_metadata": metadata,
+            "conversation_turn_metrics": {"metrics": metrics},
+        })
+        t += rng.randint(2, 12)
+    return transcript
+
+
+def synthetic_conversations(
+    seed: int,
+    total_entries: int,
+    profile: TranscriptProfile,
+    per_conversation: int = TURNS_PER_CONVERSATION,
+) -> Iterator[tuple[dict, list[dict]]]:
+    """Yield (raw conversation entry, transcript) until `total_entries` transcript entries exist."""
+    rng = random.Random(seed)
+    produced = 0
+    i = 0
+    while produced < total_entries:
+        n = min(per_conversation, total_entries - produced)
+        transcript = synthetic_transcript(rng, profile, n)[:n]
+        produced += len(transcript)
+        yield {
+            "conversation_id": f"conv_synthetic_{seed}_{i:07d}",
+            "start_time": SYNTHETIC_START + i * 3600,
+            "duration_seconds": max(jrvs.MIN_DURATION_SECS, transcript[-1]["time_in_call_secs"]),
+            "status": "done",
+            "call_successful": "success",
+            "message_count": len(transcript),
+        }, transcript
+        i += 1
+
+
+# ---------------------------------------------------------------------------
+# Stage timing
+# ---------------------------------------------------------------------------
+
+class StageClock:
+    """
+    Accumulates wall/CPU seconds per stage and, when tracing, two peaks:
+
+      peak     — the largest single call's own allocations (for the
+                 per-conversation stages, one conversation's working set);
+      run_peak — the most traced memory held during the stage, counted from
+                 the start of the run, so it includes everything accumulated
+                 so far (aggregate, conversation list): the whole-dataset
+                 figure a scheduled run actually needs.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self.wall = {s: 0.0 for s in STAGES}
+        self.cpu = {s: 0.0 for s in STAGES}
+        self.peak = {s: 0 for s in STAGES}
+        self.run_peak = {s: 0 for s in STAGES}
+        self.extra: dict[str, dict] = {s: {} for s in STAGES}
+        self._run_base = tracemalloc.get_traced_memory()[0] if trace else 0
+
+    def run(self, stage: str, fn, *args):
+        if self.trace:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        w0, c0 = time.perf_counter(), time.process_time()
+        result = fn(*args)
+        self.wall[stage] += time.perf_counter() - w0
+        self.cpu[stage] += time.process_time() - c0
+        if self.trace:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peak[stage] = max(self.peak[stage], peak - base)
+            self.run_peak[stage] = max(self.run_peak[stage], peak - self._run_base)
+        return result
+
+
+def run_size(seed: int, n_entries: int, profile: TranscriptProfile, trace: bool = False) -> tuple[StageClock, dict]:
+    """
+    One pass over `n_entries` synthetic transcript entries. Transcripts are
+    generated and dropped one conversation at a time; only the extracted
+    turns' aggregate (and a flat array of TTFB values) outlive a conversation,
+    mirroring the analyzer's streaming path so 10M-turn runs fit in memory.
+    Generation time is excluded from every stage.
+    """
+    clock = StageClock(trace)
+    conversations = []
+    agg = jrvs.LatencyAggregator()
+    ttfb = array("d")
+    counts = {"transcript_turns": 0, "agent_turns": 0, "tool_turns": 0}
+
+    def aggregate(conv, turns):
+        agg.add_conversation(conv)
+        agg.extend(turns)
+
+    for conv, transcript in synthetic_conversations(seed, n_entries, profile):
+        counts["transcript_turns"] += len(transcript)
+        clock.run("deduplicate_turns", jrvs.deduplicate_turns, transcript)
+        turns = clock.run(
+            "extract_turns", jrvs.extract_turns, conv["conversation_id"], transcript,
+            profile.node_map, profile.root_llm,
+        )
+        # build_summary_md = aggregate_turns + render_summary_md; the aggregation
+        # half is timed here so the turns never need to be held all at once
+        clock.run("build_summary_md", aggregate, conv, turns)
+        counts["agent_turns"] += len(turns)
+        counts["tool_turns"] += sum(1 for t in turns if t["has_tool_calls"])
+        ttfb.extend(t["llm_ttfb_ms"] for t in turns if t["llm_ttfb_ms"] is not None)
+        conversations.append(conv)
+
+    values = ttfb.tolist()
+    del ttfb
+    clock.run("stats", jrvs.stats, values)
+    values.sort()
+    clock.run("percentile", lambda v: [jrvs.percentile(v, p) for p in range(101)], values)
+    clock.extra["percentile"]["calls"] = 101
+    del values
+    md = clock.run("build_summary_md", jrvs.render_summary_md, agg, conversations, profile.root_llm, profile.node_map)
+    clock.extra["build_summary_md"]["summary_bytes"] = len(md.encode())
+    counts["conversations"] = len(conversations)
+    counts["llm_ttfb_values"] = agg.table.column_stats("llm_ttfb_ms")["count"]
+    return clock, counts
+
+
+def peak_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024  # Linux reports KiB
+
+
+def benchmark_size(
+    seed: int,
+    n_entries: int,
+    profile: TranscriptProfile,
+    repeat: int,
+    measure_memory: bool,
+) -> dict:
+    runs = repeat if n_entries <= REPEAT_MAX_TURNS else 1
+    best: Optional[StageClock] = None
+    for _ in range(runs):
+        clock, counts = run_size(seed, n_entries, profile)
+        if best is None:
+            best = clock
+        else:
+            for s in STAGES:
+                if clock.wall[s] < best.wall[s]:
+                    best.wall[s], best.cpu[s] = clock.wall[s], clock.cpu[s]
+
+    traced = None
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            traced, _ = run_size(seed, n_entries, profile, trace=True)
+        finally:
+            tracemalloc.stop()
+
+    stages = {}
+    for s in STAGES:
+        wall = best.wall[s]
+        stages[s] = {
+            "seconds": round(wall, 6),
+            "cpu_seconds": round(best.cpu[s], 6),
+            "turns_per_sec": round(counts["transcript_turns"] / wall) if wall > 0 and s != "percentile" else None,
+            "peak_bytes": traced.peak[s] if traced else None,
+            "run_peak_bytes": traced.run_peak[s] if traced else None,
+            **best.extra[s],
+        }
+    return {"turns": n_entries, **counts, "runs": runs, "peak_rss_bytes": peak_rss_bytes(), "stages": stages}
+
+
+def scaling_fit(results: list[dict]) -> dict:
+    """Least-squares slope of log(seconds) on log(turns) per stage, plus pairwise slopes."""
+    fits = {}
+    for s in STAGES:
+        points = [
+            (math.log(r["transcript_turns"]), math.log(r["stages"][s]["seconds"]))
+            for r in results if r["stages"][s]["seconds"] > 0
+        ]
+        pairwise = [round((y1 - y0) / (x1 - x0), 3) for (x0, y0), (x1, y1) in zip(points, points[1:]) if x1 > x0]
+        exponent = None
+        if len(points) >= 2:
+            mx = sum(x for x, _ in points) / len(points)
+            my = sum(y for _, y in points) / len(points)
+            sxx = sum((x - mx) ** 2 for x, _ in points)
+            if sxx:
+                exponent = round(sum((x - mx) * (y - my) for x, y in points) / sxx, 3)
+        fits[s] = {"exponent": exponent, "pairwise": pairwise}
+    return fits
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Stages that slowed by more than `tolerance` at a size both runs cover.
+    Baseline timings under MIN_COMPARABLE_SECS are skipped as noise.
+    """
+    base_by_size = {r["turns"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for r in current["results"]:
+        base = base_by_size.get(r["turns"])
+        if not base:
+            continue
+        for s in STAGES:
+            new, old = r["stages"][s]["seconds"], base["stages"].get(s, {}).get("seconds")
+            if old and old >= MIN_COMPARABLE_SECS and new > old * (1 + tolerance):
+                regressions.append(f"{s} @ {r['turns']:,} turns: {old:.4f}s → {new:.4f}s (+{100 * (new / old - 1):.0f}%)")
+    return regressions
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def parse_size(text: str) -> int:
+    """Accept 1000, 1k, 2.5M, 1e6."""
+    suffixes = {"k": 1_000, "m": 1_000_000}
+    text = text.strip().lower()
+    mult = suffixes.get(text[-1:], 1)
+    value = float(text[:-1] if mult > 1 else text) * mult
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"size must be >= 0: {text}")
+    return int(value)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="JRVS V3 latency analysis scaling benchmarks")
+    parser.add_argument(
+        "--sizes", nargs="+", type=parse_size, default=DEFAULT_SIZES,
+        help="transcript turns per run, e.g. 1k 10k 1M 10M (default 1k 10k 100k 1M)",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"generator seed (default {DEFAULT_SEED})")
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT,
+        help=f"timed runs per size up to {REPEAT_MAX_TURNS:,} turns, best kept (default {DEFAULT_REPEAT})",
+    )
+    parser.add_argument(
+        "--memory-max-turns", type=parse_size, default=MEMORY_MAX_TURNS,
+        help=f"skip the tracemalloc pass above this size (default {MEMORY_MAX_TURNS:,}; 0 = never trace)",
+    )
+    parser.add_argument(
+        "--raw", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "jrvs_v3_latency_raw.json"),
+        help="raw JSON used to calibrate node/tool/latency distributions (default: committed dataset)",
+    )
+    parser.add_argument("--out", default=BENCH_OUTPUT, help=f"results JSON (default {BENCH_OUTPUT})")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="exit 1 if any stage regressed against this file")
+    parser.add_argument(
+        "--tolerance", type=float, default=REGRESSION_TOLERANCE,
+        help=f"allowed slowdown before a stage counts as regressed (default {REGRESSION_TOLERANCE})",
+    )
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be >= 1")
+    if min(args.sizes) < 1:
+        parser.error("--sizes must be >= 1")
+    args.sizes = sorted(set(args.sizes))
+    return args
+
+
+def main(argv: Optional[list[str]] = None):
+    args = parse_args(argv)
+    profile = TranscriptProfile.from_raw(args.raw) if os.path.exists(args.raw) else TranscriptProfile.default()
+    print(f"[Bench] seed={args.seed}, {len(profile.node_ids)} nodes, tool rate {profile.tool_rate:.0%}, "
+          f"sizes: {', '.join(f'{n:,}' for n in args.sizes)}")
+
+    results = []
+    for n in args.sizes:
+        trace = 0 < n <= args.memory_max_turns
+        t0 = time.perf_counter()
+        r = benchmark_size(args.seed, n, profile, args.repeat, trace)
+        results.append(r)
+        print(f"\n  {n:,} transcript turns → {r['agent_turns']:,} agent turns, {r['conversations']:,} conversations "
+              f"({time.perf_counter() - t0:.1f}s incl. generation, peak RSS {r['peak_rss_bytes'] / 2**20:.0f} MiB)")
+        for s in STAGES:
+            st = r["stages"][s]
+            mem = ""
+            if st["peak_bytes"] is not None:
+                mem = f"  peak/call {st['peak_bytes'] / 2**20:.1f} MiB  run {st['run_peak_bytes'] / 2**20:.1f} MiB"
+            rate = f"{st['turns_per_sec']:>12,} turns/s" if st["turns_per_sec"] else f"{'—':>20}"
+            print(f"    {s:<18} {st['seconds']:>10.4f}s  {rate}{mem}")
+        share = r["tool_turns"] / r["agent_turns"] if r["agent_turns"] else 0.0
+        print(f"    tool-call turns    {share:>10.1%}  (profile {profile.tool_rate:.1%})")
+        if n >= TOOL_SHARE_MIN_TURNS and abs(share - profile.tool_rate) > TOOL_SHARE_TOLERANCE:
+            print(f"    WARNING: extracted tool-call share is off the calibrated rate by more than "
+                  f"{TOOL_SHARE_TOLERANCE:.0%}; the synthetic mix no longer resembles the raw data", file=sys.stderr)
+
+    output = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "turns_per_conversation": TURNS_PER_CONVERSATION,
+        "results": results,
+        "scaling": scaling_fit(results),
+    }
+    with open(args.out, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"\n  Scaling exponents (1.0 = linear): " + ", ".join(
+        f"{s}={fit['exponent']}" for s, fit in output["scaling"].items()
+    ))
+    print(f"  Wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(output, baseline, args.tolerance)
+        if regressions:
+            print(f"\nREGRESSIONS vs {args.compare} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"  No regressions vs {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+JRVS V3 Latency Analysis — Local Mock ConvAI Server
+===================================================
+Serves the three ElevenLabs ConvAI endpoints the analyzer uses, entirely
+offline, so the full pipeline can be exercised and load-tested:
+
+  GET /v1/convai/agents/{id}            agent config with the workflow node map
+  GET /v1/convai/conversations          newest first, page_size / cursor,
+                                        has_more / next_cursor
+  GET /v1/convai/conversations/{id}     detail payload: transcript, metadata
+                                        (start time, duration), analysis
+  GET /__stats                          request counts, status mix, peak in-flight
+
+Data sources:
+  --source raw        rebuild transcripts from jrvs_v3_latency_raw.json (default).
+                      Each stored agent turn becomes a user turn plus an agent
+                      turn carrying its original metrics, node and tool calls,
+                      so extraction reproduces the stored TTFB values.
+                      --scale N replays the dataset N times under new ids.
+  --source synthetic  --conversations N seeded synthetic transcripts from
+                      jrvs_v3_latency_bench (tool-call prep turns with their
+                      same-second duplicates and a later reply, turn metrics,
+                      calibrated node/tool/latency mix).
+
+Transcripts are generated on request from a per-conversation seed, so memory
+stays flat at 10–100× real volume.
+
+Fault injection: --latency-ms / --jitter-ms delay every response,
+--error-rate returns 503s, --throttle-rate returns 429s with Retry-After, and
+--rate-limit RPS enforces a hard per-second budget (429 beyond it).
+
+Live calls: --live N restarts the N newest conversations at server start as
+"in-progress"; their transcripts grow with wall time (× --live-speed) and
+they turn "done" once fully revealed — the feed for the analyzer's --tail.
+Every 200 carries an ETag, and a matching If-None-Match gets a 304.
+
+Several agents: --agents N deals the conversations round-robin to
+agent_mock_0 … agent_mock_{N-1} (the list endpoint filters by agent_id);
+--agent-llms gives each agent its own root LLM, for --agents corpus runs.
+
+Usage:
+  python jrvs_v3_latency_mock_server.py --scale 50 --latency-ms 120 --jitter-ms 60 --rate-limit 40
+  ELEVENLABS_API_BASE_URL=http://127.0.0.1:8787/v1/convai ELEVENLABS_API_KEY=mock \\
+      MJRVS_ELEVENLABS_AGENT_ID=agent_mock python jrvs_v3_latency_analysis.py \\
+      --max-conversations 500 --no-cache --metrics-out /tmp/metrics.json
+  python jrvs_v3_latency_mock_server.py --live 4 --live-speed 10   # then: analyzer --tail
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import jrvs_v3_latency_analysis as jrvs
+import jrvs_v3_latency_bench as bench
+
+DEFAULT_PORT = 8787
+API_PREFIX = "/v1/convai"
+MAX_PAGE_SIZE = 100
+GZIP_MIN_BYTES = 1024
+RETRY_AFTER_SECS = 1
+SHORT_CALL_SHARE = 0.1  # synthetic conversations under MIN_DURATION_SECS, exercised by the filter
+
+
+# ---------------------------------------------------------------------------
+# Data: conversation list and on-demand transcripts
+# ---------------------------------------------------------------------------
+
+def transcript_from_turns(turns: list[dict]) -> list[dict]:
+    """
+    Rebuild a detail-payload transcript from stored turn records. The user
+    turn before each agent turn is placed response_latency_secs_coarse
+    earlier (once: consecutive agent turns answering the same user turn,
+    such as tool-call prep chains, share it); tool-using turns get a
+    same-second empty artifact, as in the live payload, which
+    deduplicate_turns drops again. Same-second prep turns (a zero
+    tool_round_trip_ms) are re-emitted ahead of the reply.
+    """
+    transcript = []
+    last_user = None
+    for t in turns:
+        at = t["time_in_call_secs"]
+        gap = t.get("response_latency_secs_coarse")
+        if gap is not None and at - gap != last_user:
+            last_user = at - gap
+            transcript.append({"role": "user", "time_in_call_secs": last_user, "message": "..."})
+        metrics = {}
+        for field, metric in (
+            ("llm_ttfb_ms", "convai_llm_service_ttfb"),
+            ("tts_ttfb_ms", "convai_tts_service_ttfb"),
+            ("ttf_first_sentence_ms", "convai_llm_service_ttf_sentence"),
+        ):
+            if t.get(field) is not None:
+                metrics[metric] = {"elapsed_time": t[field] / 1000}
+        metadata = {"workflow_node_id": t["active_node_id"]}
+        if t.get("prep_tool_names") and t.get("tool_round_trip_ms") == 0:
+            prep_metrics = {}
+            if t.get("prep_llm_ttfb_ms") is not None:
+                prep_metrics["convai_llm_service_ttfb"] = {"elapsed_time": t["prep_llm_ttfb_ms"] / 1000}
+            prep = {
+                "role": "agent",
+                "time_in_call_secs": at,
+                "message": None,
+                "tool_calls": [{"tool_name": name} for name in t["prep_tool_names"]],
+                "agent_metadata": metadata,
+                "conversation_turn_metrics": {"metrics": prep_metrics},
+            }
+            transcript.append(prep)
+        transcript.append({
+            "role": "agent",
+            "time_in_call_secs": at,
+            "message": " ".join(["word"] * t.get("response_word_count", 0)),
+            "tool_calls": [{"tool_name": name} for name in t.get("tool_names", [])],
+            "interrupted": t.get("interrupted", False),
+            "agent_metadata": metadata,
+            "conversation_turn_metrics": {"metrics": metrics},
+        })
+        if t.get("has_tool_calls"):
+            transcript.append({
+                "role": "agent", "time_in_call_secs": at, "message": "", "tool_calls": [],
+                "agent_metadata": metadata,
+            })
+    return transcript
+
+
+class MockDataset:
+    """
+    The conversation list (newest first) plus a transcript factory. List
+    items use the field names of the real /conversations response.
+    """
+
+    def __init__(self, node_map: dict, root_llm: str):
+        self.node_map = node_map
+        self.root_llm = root_llm
+        self.conversations: list[dict] = []
+        self._factories: dict[str, tuple] = {}
+        self._items: dict[str, dict] = {}  # conversation_id -> list item
+        self._live: dict[str, float] = {}  # conversation_id -> call duration (secs)
+        self._live_started = 0.0
+        self._live_speed = 1.0
+        self._by_agent: dict[str, list[dict]] = {}
+        self._agent_llm: dict[str, str] = {}
+
+    @classmethod
+    def from_raw(cls, path: str, scale: int = 1) -> "MockDataset":
+        data = jrvs.load_raw_output(path)
+        if not data or not data.get("conversations"):
+            sys.exit(f"ERROR: no conversations in {path}")
+        ds = cls(data.get("node_llm_map") or {}, data.get("root_llm") or "unknown")
+        by_conv: dict[str, list[dict]] = {}
+        for t in data.get("turns", []):
+            by_conv.setdefault(t["conversation_id"], []).append(t)
+        starts = [c["start_time"] for c in data["conversations"] if c.get("start_time")]
+        span = (max(starts) - min(starts) + 86400) if starts else 86400
+        for r in range(scale):
+            for c in data["conversations"]:
+                cid = c["conversation_id"] if r == 0 else f"{c['conversation_id']}_r{r}"
+                ds._add({
+                    "conversation_id": cid,
+                    "start_time_unix_secs": (c.get("start_time") or 0) - r * span,
+                    "call_duration_secs": c.get("duration_seconds", 0),
+                    "status": c.get("status", "done"),
+                    "call_successful": c.get("call_successful"),
+                    "message_count": c.get("message_count", 0),
+                }, ("raw", c["conversation_id"], by_conv))
+        ds._sort()
+        return ds
+
+    @classmethod
+    def synthetic(cls, n: int, seed: int, raw_path: Optional[str] = None) -> "MockDataset":
+        profile = (
+            bench.TranscriptProfile.from_raw(raw_path)
+            if raw_path and os.path.exists(raw_path) else bench.TranscriptProfile.default()
+        )
+        ds = cls(profile.node_map, profile.root_llm)
+        rng = random.Random(seed)
+        start = bench.SYNTHETIC_START
+        for i in range(n):
+            short = rng.random() < SHORT_CALL_SHARE
+            entries = rng.randint(20, 60) if short else rng.randint(150, 500)
+            conv_seed = rng.getrandbits(32)
+            ds._add({
+                "conversation_id": f"conv_mock_{seed}_{i:06d}",
+                "start_time_unix_secs": start - i * 1800,
+                # Durations are approximate until the transcript is generated: ~5.5s per entry
+                "call_duration_secs": entries * 11 // 2,
+                "status": "done",
+                "call_successful": "success",
+                "message_count": entries,
+            }, ("synthetic", conv_seed, entries, profile))
+        ds._sort()
+        return ds
+
+    def _add(self, item: dict, factory: tuple) -> None:
+        self.conversations.append(item)
+        self._factories[item["conversation_id"]] = factory
+        self._items[item["conversation_id"]] = item
+
+    def _sort(self) -> None:
+        self.conversations.sort(key=lambda c: -(c["start_time_unix_secs"] or 0))
+
+    def set_agents(self, n: int, llms: Optional[list[str]] = None) -> list[str]:
+        """Deal conversations round-robin to n agents; returns their ids."""
+        ids = [f"agent_mock_{i}" for i in range(n)]
+        for i, agent_id in enumerate(ids):
+            self._by_agent[agent_id] = self.conversations[i::n]
+            self._agent_llm[agent_id] = llms[i % len(llms)] if llms else self.root_llm
+        return ids
+
+    def has_agent(self, agent_id: str) -> bool:
+        return not self._by_agent or agent_id in self._by_agent
+
+    def agent_config(self, agent_id: Optional[str] = None) -> dict:
+        root_llm = self._agent_llm.get(agent_id, self.root_llm)
+        nodes = {"start_node": {"type": "start", "label": "Start"}}
+        for nid, info in self.node_map.items():
+            node = {"type": "override_agent", "label": info.get("label", nid)}
+            if not info.get("is_inherited", True):
+                node["config"] = {"agent": {"prompt": {"llm": info.get("llm_model")}}}
+            nodes[nid] = node
+        return {
+            "conversation_config": {"agent": {"prompt": {"llm": root_llm}}},
+            "workflow": {"nodes": nodes},
+        }
+
+    def set_live(self, n: int, speed: float) -> None:
+        """Restart the n newest conversations now, as calls in progress."""
+        self._live_started = time.monotonic()
+        self._live_speed = speed
+        now = int(time.time())
+        for item in self.conversations[:n]:
+            transcript = self._transcript(item["conversation_id"])
+            duration = transcript[-1].get("time_in_call_secs", 0) if transcript else 0
+            item.update(start_time_unix_secs=now, call_duration_secs=duration)
+            self._live[item["conversation_id"]] = duration
+
+    def _call_clock(self, cid: str) -> Optional[float]:
+        """Seconds into a live call, or None once it has ended (or was never live)."""
+        duration = self._live.get(cid)
+        if duration is None:
+            return None
+        elapsed = (time.monotonic() - self._live_started) * self._live_speed
+        return elapsed if elapsed < duration else None
+
+    def page(self, cursor: Optional[str], page_size: int, agent_id: Optional[str] = None) -> dict:
+        start = int(cursor) if cursor and cursor.isdigit() else 0
+        conversations = self._by_agent.get(agent_id, []) if self._by_agent else self.conversations
+        items = conversations[start:start + page_size]
+        if self._live:
+            items = [
+                {**c, "status": "in-progress"} if self._call_clock(c["conversation_id"]) is not None else c
+                for c in items
+            ]
+        more = start + page_size < len(conversations)
+        return {"conversations": items, "has_more": more, "next_cursor": str(start + page_size) if more else None}
+
+    def _transcript(self, cid: str) -> list[dict]:
+        factory = self._factories[cid]
+        if factory[0] == "raw":
+            _, source_id, by_conv = factory
+            return transcript_from_turns(by_conv.get(source_id, []))
+        _, conv_seed, entries, profile = factory
+        return bench.synthetic_transcript(random.Random(conv_seed), profile, entries)[:entries]
+
+    def detail(self, cid: str) -> Optional[dict]:
+        if cid not in self._factories:
+            return None
+        item = self._items[cid]
+        transcript = self._transcript(cid)
+        status = "done"
+        duration = item["call_duration_secs"]
+        clock = self._call_clock(cid)
+        if clock is not None:
+            # A live transcript only grows at the end: reveal the prefix up to the clock
+            shown = 0
+            while shown < len(transcript) and transcript[shown].get("time_in_call_secs", 0) <= clock:
+                shown += 1
+            transcript = transcript[:shown]
+            status = "in-progress"
+            duration = int(clock)
+        return {
+            "agent_id": "agent_mock",
+            "conversation_id": cid,
+            "status": status,
+            "transcript": transcript,
+            "metadata": {"start_time_unix_secs": item["start_time_unix_secs"], "call_duration_secs": duration},
+            "analysis": {"call_successful": item.get("call_successful")},
+        }
+
+
+# ---------------------------------------------------------------------------
+# HTTP server
+# ---------------------------------------------------------------------------
+
+class FaultInjector:
+    """Latency, jitter, random 503/429 and a hard requests-per-second budget."""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, throttle_rate: float,
+                 rate_limit: Optional[float], seed: int):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window: list[float] = []
+
+    def delay(self) -> None:
+        with self._lock:
+            ms = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def fault(self) -> Optional[int]:
+        """Status code to fail this request with, or None."""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate_limit:
+                cutoff = now - 1.0
+                while self._window and self._window[0] < cutoff:
+                    self._window.pop(0)
+                if len(self._window) >= self.rate_limit:
+                    return 429
+                self._window.append(now)
+            roll = self._rng.random()
+        if roll < self.error_rate:
+            return 503
+        if roll < self.error_rate + self.throttle_rate:
+            return 429
+        return None
+
+
+class MockStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.by_endpoint: dict[str, int] = {}
+        self.status: dict[str, int] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.bytes_sent = 0
+
+    def enter(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests += 1
+            self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def leave(self, status: int, sent: int) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.status[str(status)] = self.status.get(str(status), 0) + 1
+            self.bytes_sent += sent
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests, "by_endpoint": dict(self.by_endpoint), "status": dict(self.status),
+                "peak_in_flight": self.peak_in_flight, "bytes_sent": self.bytes_sent,
+            }
+
+
+def make_handler(dataset: MockDataset, faults: FaultInjector, stats: MockStats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> tuple[int, int]:
+            """Return (status sent, body bytes); a matching If-None-Match turns a 200 into a 304."""
+            body = json.dumps(payload, separators=(",", ":")).encode()
+            if status == 200:
+                etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                headers = {**(headers or {}), "ETag": etag}
+            gzipped = len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", "")
+            if gzipped:
+                body = gzip.compress(body, compresslevel=5)
+            self.send_response(status)
+            if body:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if gzipped:
+                self.send_header("Content-Encoding", "gzip")
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+            return status, len(body)
+
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            if url.path == "/__stats":
+                self.send_json(200, stats.to_dict())
+                return
+            path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else None
+            endpoint = jrvs.endpoint_name(path) if path else url.path
+            stats.enter(endpoint)
+            status, sent = 500, 0
+            try:
+                status, payload, headers = self.route(path, parse_qs(url.query))
+                status, sent = self.send_json(status, payload, headers)
+            finally:
+                stats.leave(status, sent)
+
+        def route(self, path: Optional[str], query: dict) -> tuple[int, dict, Optional[dict]]:
+            if path is None:
+                return 404, {"detail": "Not Found"}, None
+            if not self.headers.get("xi-api-key"):
+                return 401, {"detail": "Missing xi-api-key"}, None
+            faults.delay()
+            fault = faults.fault()
+            if fault == 429:
+                return 429, {"detail": "Too many requests"}, {"Retry-After": str(RETRY_AFTER_SECS)}
+            if fault:
+                return fault, {"detail": "Service temporarily unavailable"}, None
+
+            parts = path.strip("/").split("/")
+            if parts[0] == "agents" and len(parts) == 2:
+                if not dataset.has_agent(parts[1]):
+                    return 404, {"detail": f"Agent {parts[1]} not found"}, None
+                return 200, dataset.agent_config(parts[1]), None
+            if parts == ["conversations"]:
+                size = min(int(query.get("page_size", [MAX_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+                agent_id = query.get("agent_id", [None])[0]
+                return 200, dataset.page(query.get("cursor", [None])[0], size, agent_id), None
+            if parts[0] == "conversations" and len(parts) == 2:
+                detail = dataset.detail(parts[1])
+                if detail is None:
+                    return 404, {"detail": f"Conversation {parts[1]} not found"}, None
+                return 200, detail, None
+            return 404, {"detail": "Not Found"}, None
+
+    return Handler
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local mock ElevenLabs ConvAI server for the latency analyzer")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"(default {DEFAULT_PORT})")
+    parser.add_argument("--source", choices=("raw", "synthetic"), default="raw", help="conversation data (default raw)")
+    parser.add_argument(
+        "--raw", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "jrvs_v3_latency_raw.json"),
+        help="raw JSON to serve (--source raw) or to calibrate synthetic data from",
+    )
+    parser.add_argument("--scale", type=int, default=1, help="with --source raw: serve the dataset N times")
+    parser.add_argument("--conversations", type=int, default=1000, help="with --source synthetic (default 1000)")
+    parser.add_argument("--seed", type=int, default=bench.DEFAULT_SEED, help="synthetic data and fault seed")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every API response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform ± jitter around --latency-ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--rate-limit", type=float, help="hard requests/second budget; excess requests get 429")
+    parser.add_argument("--live", type=int, default=0, metavar="N",
+                        help="serve the N newest conversations as calls in progress from server start")
+    parser.add_argument("--live-speed", type=float, default=1.0,
+                        help="with --live: call seconds revealed per wall-clock second (default 1)")
+    parser.add_argument("--agents", type=int, default=1, metavar="N",
+                        help="split the conversations round-robin between N agents agent_mock_0..N-1")
+    parser.add_argument("--agent-llms", nargs="+", metavar="LLM", help="with --agents: root LLM per agent (cycled)")
+    args = parser.parse_args(argv)
+    if args.scale < 1 or args.conversations < 1:
+        parser.error("--scale and --conversations must be >= 1")
+    if args.agents < 1:
+        parser.error("--agents must be >= 1")
+    if args.live < 0 or args.live_speed <= 0:
+        parser.error("--live must be >= 0 and --live-speed > 0")
+    if not 0 <= args.error_rate + args.throttle_rate <= 1:
+        parser.error("--error-rate + --throttle-rate must be within [0, 1]")
+    return args
+
+
+def main(argv: Optional[list[str]] = None):
+    args = parse_args(argv)
+    if args.source == "raw":
+        dataset = MockDataset.from_raw(args.raw, args.scale)
+    else:
+        dataset = MockDataset.synthetic(args.conversations, args.seed, args.raw)
+    if args.live:
+        dataset.set_live(args.live, args.live_speed)
+    agent_ids = dataset.set_agents(args.agents, args.agent_llms) if args.agents > 1 else ["agent_mock"]
+    faults = FaultInjector(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate,
+                           args.rate_limit, args.seed)
+    stats = MockStats()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(dataset, faults, stats))
+    server.daemon_threads = True
+    base_url = f"http://{args.host}:{server.server_port}{API_PREFIX}"
+    print(f"[Mock] Serving {len(dataset.conversations)} conversations ({args.source}) on {base_url}")
+    if args.live:
+        print(f"  {args.live} live calls at {args.live_speed:g}x speed")
+    print(f"  export ELEVENLABS_API_BASE_URL={base_url} ELEVENLABS_API_KEY=mock MJRVS_ELEVENLABS_AGENT_ID={agent_ids[0]}")
+    if len(agent_ids) > 1:
+        print(f"  agents: {' '.join(agent_ids)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n[Mock] {json.dumps(stats.to_dict())}")
+
+
+if __name__ == "__main__":
+    main()
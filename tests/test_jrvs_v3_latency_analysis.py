@@ -0,0 +1,602 @@
+"""
+Unit tests for the numerical helpers and incremental-mode bookkeeping in
+jrvs_v3_latency_analysis.py, plus an offline replay round trip of the
+committed raw dataset.
+
+Stdlib unittest, no API access; run from the repository root with
+`python -m unittest discover -s tests` (pytest collects them too).
+"""
+
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import jrvs_v3_latency_analysis as jla  # noqa: E402
+
+
+class NextLaterTimesTest(unittest.TestCase):
+    @staticmethod
+    def forward_scan(cleaned):
+        """The quadratic definition next_later_times replaces."""
+        out = []
+        for idx, turn in enumerate(cleaned):
+            t = turn.get("time_in_call_secs", 0)
+            if t is None:
+                out.append(None)
+                continue
+            later = (
+                other["time_in_call_secs"] for other in cleaned[idx + 1:]
+                if other.get("time_in_call_secs") is not None and other["time_in_call_secs"] > t
+            )
+            out.append(next(later, None))
+        return out
+
+    def test_same_second_turns_share_the_next_later_time(self):
+        times = [0, 3, 3, 3, 7, 7, 12]
+        cleaned = [{"time_in_call_secs": t} for t in times]
+        self.assertEqual(jla.next_later_times(cleaned), [3, 7, 7, 7, 12, 12, None])
+
+    def test_turns_without_a_time_are_skipped(self):
+        cleaned = [{"time_in_call_secs": 1}, {}, {"time_in_call_secs": None}, {"time_in_call_secs": 4}]
+        # A missing key reads as 0 but is never "the next time"; None gets no answer
+        self.assertEqual(jla.next_later_times(cleaned), [4, 4, None, None])
+
+    def test_matches_forward_scan(self):
+        rng = random.Random(5)
+        for _ in range(200):
+            cleaned = []
+            for _ in range(rng.randint(0, 40)):
+                r = rng.random()
+                if r < 0.05:
+                    cleaned.append({})
+                elif r < 0.1:
+                    cleaned.append({"time_in_call_secs": None})
+                else:
+                    # Mostly rising with repeats and the odd step back, like real transcripts
+                    cleaned.append({"time_in_call_secs": rng.randint(0, 30)})
+            self.assertEqual(jla.next_later_times(cleaned), self.forward_scan(cleaned))
+
+
+class QuantileSketchTest(unittest.TestCase):
+    @staticmethod
+    def latencies(rng, n):
+        # Log-normal around ~800 ms with a few zeros, like LLM TTFB
+        return [0.0 if rng.random() < 0.02 else rng.lognormvariate(6.7, 0.6) for _ in range(n)]
+
+    @staticmethod
+    def sketch(values, relative_accuracy=jla.SKETCH_RELATIVE_ACCURACY):
+        sk = jla.QuantileSketch(relative_accuracy)
+        for v in values:
+            sk.add(v)
+        return sk
+
+    def test_quantile_within_relative_accuracy_of_the_value_at_that_rank(self):
+        rng = random.Random(8)
+        for a in (0.01, 0.05):
+            values = self.latencies(rng, 5000)
+            ordered = sorted(values)
+            sk = self.sketch(values, a)
+            for p in range(101):
+                exact = ordered[int((len(ordered) - 1) * p / 100)]
+                self.assertLessEqual(abs(sk.quantile(p) - exact), a * exact + 1e-9, (a, p))
+
+    def test_quantile_tracks_percentile(self):
+        values = self.latencies(random.Random(9), 20000)
+        ordered = sorted(values)
+        sk = self.sketch(values)
+        for p in (50, 75, 90, 95, 99):
+            exact = jla.percentile(ordered, p)
+            self.assertAlmostEqual(sk.quantile(p), exact, delta=2 * jla.SKETCH_RELATIVE_ACCURACY * exact)
+
+    def test_merge_equals_sketch_of_the_union(self):
+        rng = random.Random(10)
+        parts = [self.latencies(rng, rng.randint(1, 3000)) for _ in range(4)]
+        merged = jla.QuantileSketch()
+        for part in parts:
+            merged.merge(self.sketch(part))
+        whole = self.sketch([v for part in parts for v in part])
+        self.assertEqual(merged.bins, whole.bins)
+        self.assertEqual((merged.count, merged.zero_count, merged.min, merged.max),
+                         (whole.count, whole.zero_count, whole.min, whole.max))
+        self.assertAlmostEqual(merged.sum, whole.sum, places=3)
+        for p in (0, 50, 95, 100):
+            self.assertEqual(merged.quantile(p), whole.quantile(p))
+
+    def test_merge_with_empty_and_round_trip(self):
+        sk = self.sketch(self.latencies(random.Random(11), 500))
+        before = sk.to_dict()
+        sk.merge(jla.QuantileSketch())
+        self.assertEqual(sk.to_dict(), before)
+        self.assertEqual(jla.QuantileSketch.from_dict(before).to_dict(), before)
+        self.assertIsNone(jla.QuantileSketch().quantile(50))
+
+    def test_merge_rejects_different_accuracy(self):
+        with self.assertRaises(ValueError):
+            jla.QuantileSketch(0.01).merge(jla.QuantileSketch(0.02))
+
+
+class TurnIndexPercentileTest(unittest.TestCase):
+    NODES = {f"node_{k}": {"label": f"Node {k}", "llm_model": "claude-sonnet-4-5" if k % 2 else "gpt-4o"} for k in range(6)}
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.index = jla.TurnIndex(os.path.join(tmp.name, "turns.sqlite"))
+        self.addCleanup(self.index.close)
+        self.index.upsert_nodes(self.NODES)
+        rng = random.Random(12)
+        # Group sizes from 1 up, so the two-row straddle hits both ends of the ranking
+        sizes = {"node_0": 1, "node_1": 2, "node_2": 3, "node_3": 21, "node_4": 97, "node_5": 400}
+        self.turns = []
+        for c in range(20):
+            cid = f"conv_{c}"
+            turns = []
+            for node_id, size in sizes.items():
+                for _ in range(rng.randint(0, size // 10) if c else size):
+                    turns.append({
+                        "conversation_id": cid,
+                        "turn_index": len(turns),
+                        "time_in_call_secs": len(turns) * 7,
+                        "active_node_id": node_id,
+                        "active_node": self.NODES[node_id]["label"],
+                        "active_llm": self.NODES[node_id]["llm_model"],
+                        "llm_ttfb_ms": None if rng.random() < 0.1 else rng.randint(200, 6000),
+                        "has_tool_calls": rng.random() < 0.2,
+                        "interrupted": rng.random() < 0.1,
+                    })
+            self.index.upsert_conversation({"conversation_id": cid, "start_time": 1767225600 + c * 6 * 3600}, turns)
+            self.turns.extend(turns)
+
+    def expected(self, key, keep=lambda t: True):
+        groups = {}
+        for t in self.turns:
+            if keep(t):
+                groups.setdefault(t[key], []).append(t)
+        out = {}
+        for k, turns in groups.items():
+            s = jla.stats([t["llm_ttfb_ms"] for t in turns if t["llm_ttfb_ms"] is not None])
+            out[k] = {
+                "turns": len(turns),
+                "interrupted": sum(t["interrupted"] for t in turns),
+                **{name: s[name] for name in ("count", "mean", "median", "min", "max", "p75", "p95")},
+            }
+        return out
+
+    def actual(self, by, where="1", params=()):
+        return {
+            g["key"]: {name: g[name] for name in ("turns", "interrupted", "count", "mean", "median", "min", "max", "p75", "p95")}
+            for g in self.index.group_stats(by, where, params)
+        }
+
+    def test_group_percentiles_match_percentile(self):
+        self.assertEqual(self.actual("node"), self.expected("active_node_id"))
+        self.assertEqual(self.actual("llm"), self.expected("active_llm"))
+
+    def test_filtered_group_percentiles_match_percentile(self):
+        where, params = jla.TurnIndex.where_clause(node="Node 5", tools_only=True)
+        self.assertEqual(
+            self.actual("node", where, params),
+            self.expected("active_node_id", lambda t: t["active_node_id"] == "node_5" and t["has_tool_calls"]),
+        )
+        where, params = jla.TurnIndex.where_clause(since="2026-01-01", until="2026-01-01")
+        first_day = {f"conv_{c}" for c in range(4)}  # conversations start 6 h apart from 2026-01-01T00:00Z
+        self.assertEqual(self.actual("llm", where, params), self.expected("active_llm", lambda t: t["conversation_id"] in first_day))
+
+    def test_reindexing_a_shorter_conversation_drops_its_tail(self):
+        conv_turns = [t for t in self.turns if t["conversation_id"] == "conv_0"][:5]
+        self.index.upsert_conversation({"conversation_id": "conv_0", "start_time": 1767225600}, conv_turns)
+        self.turns = [t for t in self.turns if t["conversation_id"] != "conv_0"] + conv_turns
+        self.assertEqual(self.actual("node"), self.expected("active_node_id"))
+
+
+class TurnRecordFromDictTest(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(REPO_DIR, "jrvs_v3_latency_raw.json")) as f:
+            self.turns = json.load(f)["turns"]
+
+    def test_key_order_does_not_matter(self):
+        for turn in self.turns:
+            shuffled = dict(sorted(turn.items()))
+            record = jla.TurnRecord.from_dict(shuffled)
+            self.assertIsInstance(record, jla.TurnRecord)
+            self.assertEqual(record.to_dict(), turn)
+
+    def test_extra_keys_are_ignored_and_budget_recomputed(self):
+        turn = dict(self.turns[0], llm_to_sentence_ms=-1, tool_latency_ms=5, note="hand-edited")
+        record = jla.TurnRecord.from_dict(turn)
+        self.assertEqual(record.to_dict(), self.turns[0])
+        self.assertEqual(record.llm_to_sentence_ms, jla.TurnRecord.from_dict(self.turns[0]).llm_to_sentence_ms)
+
+    def test_prep_fields_are_kept(self):
+        turn = dict(self.turns[0], prep_tool_names=["search"], prep_llm_ttfb_ms=640, tool_round_trip_ms=2000)
+        record = jla.TurnRecord.from_dict(turn)
+        self.assertEqual(record.prep_tool_names, ("search",))
+        self.assertEqual(record.to_dict()["tool_round_trip_ms"], 2000)
+
+    def test_missing_base_field_raises(self):
+        turn = {k: v for k, v in self.turns[0].items() if k != "node_attribution_method"}
+        with self.assertRaisesRegex(ValueError, f"{turn['conversation_id']}.*node_attribution_method"):
+            jla.TurnRecord.from_dict(turn)
+
+    def test_sorted_key_raw_file_loads_as_records(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "raw.json")
+            with open(os.path.join(REPO_DIR, "jrvs_v3_latency_raw.json")) as f, open(path, "w") as out:
+                json.dump(json.load(f), out, sort_keys=True)  # what `jq -S` does
+            data = jla.load_raw_output(path)
+        self.assertEqual(len(data["turns"]), len(self.turns))
+        self.assertTrue(all(isinstance(t, jla.TurnRecord) for t in data["turns"]))
+
+
+class IncrementalFetchTest(unittest.TestCase):
+    class FakeClient:
+        """Serves /conversations in pages of PAGE_SIZE, newest first, and /conversations/{id} details."""
+        PAGE_SIZE = 3
+
+        def __init__(self, conversations):
+            self.conversations = conversations
+
+        def get(self, path, params=None):
+            if path != "/conversations":
+                conv = next(c for c in self.conversations if path == f"/conversations/{c['conversation_id']}")
+                return {"status": conv["status"], "transcript": [],
+                        "metadata": {"start_time_unix_secs": conv["start_time_unix_secs"],
+                                     "call_duration_secs": conv["call_duration_secs"]}}
+            start = int((params or {}).get("cursor") or 0)
+            end = start + self.PAGE_SIZE
+            more = end < len(self.conversations)
+            return {"conversations": self.conversations[start:end], "has_more": more,
+                    "next_cursor": str(end) if more else None}
+
+    @staticmethod
+    def listing(statuses, short=()):
+        """c9 … c0 newest first, started 100 s apart; ids in `short` fall under MIN_DURATION_SECS."""
+        return [
+            {"conversation_id": f"c{i}", "start_time_unix_secs": 100 * i, "status": statuses.get(f"c{i}", "done"),
+             "call_duration_secs": 60 if f"c{i}" in short else jla.MIN_DURATION_SECS, "message_count": 10}
+            for i in range(9, -1, -1)
+        ]
+
+    def fetch(self, client, watermark, limit):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return jla.fetch_new_conversations(client, watermark, limit)
+
+    def ids(self, conversations):
+        return [c["conversation_id"] for c in conversations]
+
+    def test_truncated_runs_take_the_oldest_and_leave_no_gap(self):
+        client = self.FakeClient(self.listing({}, short={"c5"}))
+        wm = jla.update_watermark(None, [{"conversation_id": "c2", "start_time": 200, "status": "done"}], [])
+        seen = []
+        for expected in (["c6", "c4", "c3"], ["c9", "c8", "c7"], []):
+            new, pending = self.fetch(client, wm, limit=3)
+            self.assertEqual(self.ids(new), expected)
+            self.assertEqual(pending, [])
+            seen.extend(self.ids(new))
+            wm = jla.update_watermark(wm, new, pending)
+        self.assertEqual(sorted(seen), ["c3", "c4", "c6", "c7", "c8", "c9"])
+        self.assertEqual(wm["newest_start_time"], 900)
+
+    def test_in_progress_conversation_is_pending_then_processed(self):
+        client = self.FakeClient(self.listing({"c4": "in-progress"}))
+        wm = jla.update_watermark(None, [{"conversation_id": "c2", "start_time": 200, "status": "done"}], [])
+        new, pending = self.fetch(client, wm, limit=3)
+        self.assertEqual((self.ids(new), pending), (["c6", "c5", "c3"], ["c4"]))
+        wm = jla.update_watermark(wm, new, pending)
+        self.assertEqual(wm["pending_ids"], ["c4"])
+        self.assertNotIn("c4", wm["processed_ids"])
+
+        # The watermark has moved past c4; only the pending re-check still reaches it.
+        client.conversations[5]["status"] = "done"
+        new, pending = self.fetch(client, wm, limit=10)
+        self.assertEqual((self.ids(new), pending), (["c9", "c8", "c7"], []))
+        with contextlib.redirect_stdout(io.StringIO()):
+            ready, still_pending = jla.recheck_pending(client, wm["pending_ids"])
+        self.assertEqual((self.ids(ready), still_pending), (["c4"], []))
+        wm = jla.update_watermark(wm, new + ready, pending + still_pending)
+        self.assertEqual(wm["pending_ids"], [])
+        self.assertEqual(wm["processed_ids"], ["c2", "c3", "c4", "c5", "c6", "c7", "c8", "c9"])
+
+    def test_merge_replaces_reanalyzed_turns_and_orders_newest_first(self):
+        existing = {
+            "conversations": [{"conversation_id": "b", "start_time": 200}, {"conversation_id": "a", "start_time": 100}],
+            "turns": [{"conversation_id": "b", "tag": "old b0"}, {"conversation_id": "b", "tag": "old b1"},
+                      {"conversation_id": "a", "tag": "old a0"}],
+        }
+        conversations = [{"conversation_id": "c", "start_time": 300}, {"conversation_id": "b", "start_time": 200}]
+        turns = [{"conversation_id": "c", "tag": "c0"}, {"conversation_id": "b", "tag": "new b0"}]
+        merged_convs, merged_turns = jla.merge_raw_turns(existing, conversations, turns)
+        self.assertEqual(self.ids(merged_convs), ["c", "b", "a"])
+        self.assertEqual([t["tag"] for t in merged_turns], ["c0", "new b0", "old a0"])
+        self.assertEqual(jla.merge_raw_turns(None, conversations, turns), (conversations, turns))
+
+
+class MannWhitneyUTest(unittest.TestCase):
+    @staticmethod
+    def pairwise(a, b):
+        """(effect size, p-value) from the pairwise definition of U and the tie-corrected variance."""
+        u_b = sum(1.0 if y > x else 0.5 if y == x else 0.0 for x in a for y in b)
+        n1, n2 = len(a), len(b)
+        n = n1 + n2
+        counts = {}
+        for v in a + b:
+            counts[v] = counts.get(v, 0) + 1
+        tie_term = sum(t ** 3 - t for t in counts.values())
+        sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+        if sigma == 0:
+            return u_b / (n1 * n2), 1.0
+        z = max(abs(u_b - n1 * n2 / 2) - 0.5, 0.0) / sigma
+        return u_b / (n1 * n2), min(1.0, math.erfc(z / math.sqrt(2)))
+
+    def test_separated_samples(self):
+        effect, p = jla.mann_whitney_u([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+        self.assertEqual(effect, 1.0)
+        # z = (12.5 - 0.5) / sqrt(25 · 11 / 12)
+        self.assertAlmostEqual(p, 0.01219, places=5)
+
+    def test_matches_pairwise_definition_with_ties(self):
+        rng = random.Random(21)
+        for _ in range(100):
+            a = [rng.randint(0, 12) * 50 for _ in range(rng.randint(1, 30))]
+            b = [rng.randint(0, 12) * 50 + rng.choice((0, 0, 50)) for _ in range(rng.randint(1, 30))]
+            effect, p = jla.mann_whitney_u(a, b)
+            ref_effect, ref_p = self.pairwise(a, b)
+            self.assertAlmostEqual(effect, ref_effect, places=12)
+            self.assertAlmostEqual(p, ref_p, places=12)
+
+    def test_symmetric_in_its_arguments(self):
+        rng = random.Random(22)
+        a = [rng.gauss(900, 200) for _ in range(60)]
+        b = [rng.gauss(1000, 200) for _ in range(45)]
+        effect_ab, p_ab = jla.mann_whitney_u(a, b)
+        effect_ba, p_ba = jla.mann_whitney_u(b, a)
+        self.assertAlmostEqual(effect_ab + effect_ba, 1.0, places=12)
+        self.assertAlmostEqual(p_ab, p_ba, places=12)
+
+    def test_no_shift(self):
+        self.assertEqual(jla.mann_whitney_u([800, 900, 1000], [800, 900, 1000]), (0.5, 1.0))
+        self.assertEqual(jla.mann_whitney_u([700] * 5, [700] * 8), (0.5, 1.0))
+
+    def test_detects_a_shift_only_when_there_is_one(self):
+        rng = random.Random(23)
+        base = [rng.lognormvariate(6.7, 0.5) for _ in range(400)]
+        same = [rng.lognormvariate(6.7, 0.5) for _ in range(400)]
+        slower = [v * 1.2 for v in (rng.lognormvariate(6.7, 0.5) for _ in range(400))]
+        self.assertGreater(jla.mann_whitney_u(base, same)[1], 0.05)
+        effect, p = jla.mann_whitney_u(base, slower)
+        self.assertGreater(effect, 0.5)
+        self.assertLess(p, 1e-3)
+
+
+class SolveNormalEquationsTest(unittest.TestCase):
+    @staticmethod
+    def normal_equations(rows, y):
+        p = len(rows[0])
+        xtx = [[sum(r[a] * r[b] for r in rows) for b in range(p)] for a in range(p)]
+        xty = [sum(r[a] * v for r, v in zip(rows, y)) for a in range(p)]
+        return xtx, xty
+
+    def test_small_system_and_inverse(self):
+        beta, inverse = jla.solve_normal_equations([[4.0, 2.0], [2.0, 3.0]], [10.0, 11.0])
+        self.assertAlmostEqual(beta[0], 1.0)
+        self.assertAlmostEqual(beta[1], 3.0)
+        # inverse of [[4, 2], [2, 3]] is [[3, -2], [-2, 4]] / 8
+        for got, want in zip(inverse, [[0.375, -0.25], [-0.25, 0.5]]):
+            for g, w in zip(got, want):
+                self.assertAlmostEqual(g, w)
+
+    def test_zero_leading_pivot(self):
+        beta, inverse = jla.solve_normal_equations([[0.0, 1.0], [1.0, 0.0]], [2.0, 5.0])
+        self.assertEqual(beta, [5.0, 2.0])
+        self.assertEqual(inverse, [[0.0, 1.0], [1.0, 0.0]])
+
+    def test_recovers_exact_coefficients(self):
+        rng = random.Random(24)
+        true_beta = [850.0, 120.0, -40.0, 300.0, 15.5]
+        rows = [
+            # intercept, a continuous regressor, two indicators, a positive trend
+            [1.0, rng.uniform(0, 5), float(rng.random() < 0.3), float(rng.random() < 0.5), rng.uniform(0, 6)]
+            for _ in range(300)
+        ]
+        y = [sum(b * x for b, x in zip(true_beta, r)) for r in rows]
+        xtx, xty = self.normal_equations(rows, y)
+        beta, inverse = jla.solve_normal_equations(xtx, xty)
+        for got, want in zip(beta, true_beta):
+            self.assertAlmostEqual(got, want, places=6)
+        for a in range(len(xtx)):
+            for b in range(len(xtx)):
+                identity = sum(xtx[a][k] * inverse[k][b] for k in range(len(xtx)))
+                self.assertAlmostEqual(identity, 1.0 if a == b else 0.0, places=9)
+
+    def test_singular_design_returns_none(self):
+        rng = random.Random(25)
+        rows = []
+        for _ in range(50):
+            x = rng.uniform(0, 10)
+            rows.append([1.0, x, 2 * x + 1])  # third column = 2·second + intercept
+        xtx, xty = self.normal_equations(rows, [rng.gauss(0, 1) for _ in rows])
+        self.assertIsNone(jla.solve_normal_equations(xtx, xty))
+        self.assertIsNone(jla.solve_normal_equations([[1.0, 1.0], [1.0, 1.0]], [1.0, 1.0]))
+
+
+class TtfbContextSizeTest(unittest.TestCase):
+    NODE_MAP = {"node_a": {"label": "A", "llm_model": "claude-sonnet-4-5", "llm_type": "native"}}
+
+    def agent(self, t, message, **extra):
+        return {"role": "agent", "time_in_call_secs": t, "message": message,
+                "agent_metadata": {"workflow_node_id": "node_a"}, **extra}
+
+    def test_prior_transcript_chars_counts_user_and_agent_messages(self):
+        transcript = [
+            {"role": "user", "time_in_call_secs": 0, "message": "hello"},
+            self.agent(2, "hi there"),
+            {"role": "user", "time_in_call_secs": 5, "message": "abc"},
+            self.agent(7, None, tool_calls=[{"tool_name": "search"}]),
+            self.agent(7, "found it"),
+            {"role": "user", "time_in_call_secs": 12, "message": "ok"},
+            self.agent(13, "bye"),
+        ]
+        turns = jla.extract_turns("conv", transcript, self.NODE_MAP, "claude-sonnet-4-5")
+        self.assertEqual([t["prior_transcript_chars"] for t in turns], [5, 16, 26])
+        self.assertEqual(turns[1]["prep_tool_names"], ("search",))
+        exported = turns[2].to_dict()
+        self.assertEqual(exported["prior_transcript_chars"], 26)
+        self.assertEqual(jla.TurnRecord.from_dict(exported).prior_transcript_chars, 26)
+
+    def test_model_uses_transcript_context_and_falls_back_for_old_records(self):
+        rng = random.Random(24)
+        fresh = []
+        for c in range(6):
+            transcript, t = [], 0
+            for _ in range(30):
+                transcript.append({"role": "user", "time_in_call_secs": t, "message": "word " * rng.randint(1, 30)})
+                t += rng.randint(1, 4)
+                ttfb = {"convai_llm_service_ttfb": {"elapsed_time": rng.lognormvariate(0.5, 0.4)}}
+                transcript.append(self.agent(t, "reply " * rng.randint(3, 40),
+                                             conversation_turn_metrics={"metrics": ttfb}))
+                t += rng.randint(5, 30)
+            fresh.extend(jla.extract_turns(f"conv_{c}", transcript, self.NODE_MAP, "claude-sonnet-4-5"))
+        model = jla.fit_ttfb_model(jla.TurnTable.from_turns(fresh))
+        self.assertEqual((model["context"], model["context_term"]), ("transcript", "Context size"))
+        self.assertIn("Context size", [term["name"] for term in model["terms"]])
+
+        old = [jla.TurnRecord.from_dict({k: v for k, v in t.to_dict().items() if k != "prior_transcript_chars"})
+               for t in fresh]
+        model = jla.fit_ttfb_model(jla.TurnTable.from_turns(old))
+        self.assertEqual((model["context"], model["context_term"]), ("agent speech", "Prior agent speech"))
+
+
+class LiveConversationTest(unittest.TestCase):
+    NODE_MAP = {"node_a": {"label": "A", "llm_model": "claude-sonnet-4-5", "llm_type": "native"},
+                "node_b": {"label": "B", "llm_model": "gpt-4o", "llm_type": "native"}}
+
+    @staticmethod
+    def transcript(rng, exchanges):
+        """
+        User/agent exchanges with the payload's quirks: chained tool prep turns
+        with same-second empty artifacts, replies landing in the prep's second,
+        back-to-back user messages and same-second user interjections.
+        """
+        out, t = [], 0
+        for _ in range(exchanges):
+            for _ in range(1 + (rng.random() < 0.15)):
+                out.append({"role": "user", "time_in_call_secs": t, "message": "word " * rng.randint(1, 20)})
+                t += rng.randint(0, 3)
+            meta = {"workflow_node_id": rng.choice(list(LiveConversationTest.NODE_MAP))}
+            while rng.random() < 0.35:
+                out.append({"role": "agent", "time_in_call_secs": t, "message": None, "agent_metadata": meta,
+                            "tool_calls": [{"tool_name": rng.choice(["search", "lookup"])}]})
+                out.append({"role": "agent", "time_in_call_secs": t, "message": "", "agent_metadata": meta})
+                t += rng.randint(0, 4)
+            metrics = {"convai_llm_service_ttfb": {"elapsed_time": rng.lognormvariate(0.3, 0.5)}}
+            out.append({"role": "agent", "time_in_call_secs": t, "message": "reply " * rng.randint(1, 40),
+                        "interrupted": rng.random() < 0.1, "agent_metadata": meta,
+                        "conversation_turn_metrics": {"metrics": metrics}})
+            t += rng.randint(0, 8)
+        return out
+
+    def test_growing_prefixes_emit_the_full_extraction(self):
+        rng = random.Random(22)
+        for seed in range(5):
+            transcript = self.transcript(random.Random(seed), 60)
+            expected = jla.extract_turns("live", transcript, self.NODE_MAP, "claude-sonnet-4-5")
+            live = jla.LiveConversation("live", None)
+            emitted = []
+            k = 0
+            while k < len(transcript):
+                k = min(len(transcript), k + rng.randint(1, 4))
+                emitted.extend(live.new_turns(transcript[:k], False, self.NODE_MAP, "claude-sonnet-4-5"))
+            self.assertLess(len(emitted), len(expected))
+            emitted.extend(live.new_turns(transcript, True, self.NODE_MAP, "claude-sonnet-4-5"))
+            with self.subTest(seed=seed):
+                self.assertEqual([t.to_dict() for t in emitted], [t.to_dict() for t in expected])
+
+
+class ReplayRoundTripTest(unittest.TestCase):
+    RAW_PATH = os.path.join(REPO_DIR, "jrvs_v3_latency_raw.json")
+    SUMMARY_PATH = os.path.join(REPO_DIR, "jrvs_v3_latency_summary.md")
+
+    @staticmethod
+    def replay_summary(raw_path):
+        """What --replay --no-cache writes as the summary."""
+        agg, conversations, header, failures, counts = jla.replay(raw_path)
+        md = jla.render_summary_md(
+            agg, conversations, header.get("root_llm", "unknown"), header.get("node_llm_map") or {},
+            failures, agent_id=header.get("agent_id"),
+        )
+        return md, counts
+
+    @staticmethod
+    def sections(md):
+        """Preamble under "" and each "## " section's body under its heading."""
+        out = {"": []}
+        body = out[""]
+        for line in md.split("\n"):
+            if line.startswith("## "):
+                body = out[line] = []
+            else:
+                body.append(line)
+        return {heading: "\n".join(lines) for heading, lines in out.items()}
+
+    def test_committed_raw_reproduces_baseline_sections(self):
+        md, counts = self.replay_summary(self.RAW_PATH)
+        self.assertEqual(counts, {"reextracted": 0, "stored": 10})
+        with open(self.SUMMARY_PATH) as f:
+            baseline = self.sections(f.read())
+        replayed = self.sections(md)
+        self.assertGreater(len(baseline), 5)
+        for heading, body in baseline.items():
+            with self.subTest(section=heading or "preamble"):
+                self.assertIn(heading, replayed)
+                self.assertEqual(replayed[heading], body)
+
+    def test_jsonl_copy_replays_to_the_same_summary(self):
+        expected, _ = self.replay_summary(self.RAW_PATH)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "raw.jsonl")
+            reader = jla.RawReader(self.RAW_PATH)
+            groups = list(reader.conversations())
+            writer = jla.RawJsonlWriter(path, reader.header)
+            for conv, turns in groups:
+                writer.write_conversation(conv, turns)
+            for failure in reader.failures:
+                writer.write_failure(failure)
+            writer.close(reader.footer["watermark"])
+
+            self.assertEqual(jla.RawReader(path).read_footer(), reader.footer)
+            actual, _ = self.replay_summary(path)
+        self.assertEqual(actual, expected)
+
+    def test_merged_partial_aggregates_render_the_single_pass_summary(self):
+        expected, _ = self.replay_summary(self.RAW_PATH)
+        reader = jla.RawReader(self.RAW_PATH)
+        groups = list(reader.conversations())
+        header = reader.header
+        for cuts in ([5], [1, 4, 9], list(range(1, len(groups)))):
+            bounds = [0, *cuts, len(groups)]
+            merged = None
+            for lo, hi in zip(bounds, bounds[1:]):
+                part = jla.LatencyAggregator()
+                for conv, turns in groups[lo:hi]:
+                    part.add_conversation(conv)
+                    part.extend(list(turns))
+                merged = part if merged is None else merged.merge(part)
+            md = jla.render_summary_md(
+                merged, [conv for conv, _ in groups], header.get("root_llm", "unknown"),
+                header.get("node_llm_map") or {}, reader.failures, agent_id=header.get("agent_id"),
+            )
+            with self.subTest(cuts=cuts):
+                self.assertEqual(md, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
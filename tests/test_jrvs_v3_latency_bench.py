@@ -0,0 +1,59 @@
+"""
+Tests for the synthetic transcript generator in jrvs_v3_latency_bench.py:
+the extracted turn mix must match the profile it was calibrated to.
+
+Stdlib unittest, no API access; run from the repository root with
+`python -m unittest discover -s tests` (pytest collects them too).
+"""
+
+import os
+import random
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import jrvs_v3_latency_analysis as jla  # noqa: E402
+import jrvs_v3_latency_bench as bench  # noqa: E402
+
+
+class SyntheticTranscriptTest(unittest.TestCase):
+    @staticmethod
+    def extracted(profile, entries=30_000, seed=13):
+        turns = []
+        for conv, transcript in bench.synthetic_conversations(seed, entries, profile):
+            turns.extend(jla.extract_turns(conv["conversation_id"], transcript, profile.node_map, profile.root_llm))
+        return turns
+
+    def test_tool_share_matches_calibrated_rate(self):
+        for profile in (bench.TranscriptProfile.from_raw(os.path.join(REPO_DIR, "jrvs_v3_latency_raw.json")),
+                        bench.TranscriptProfile.default()):
+            turns = self.extracted(profile)
+            share = sum(1 for t in turns if t["has_tool_calls"]) / len(turns)
+            self.assertAlmostEqual(share, profile.tool_rate, delta=0.03)
+
+    def test_prep_turns_are_standalone_records_paired_with_a_later_reply(self):
+        turns = self.extracted(bench.TranscriptProfile.default())
+        prep = [t for t in turns if t["has_tool_calls"]]
+        self.assertTrue(prep)
+        self.assertTrue(all(t["response_word_count"] == 0 for t in prep))
+        replies = [t for t in turns if t["prep_tool_names"]]
+        self.assertTrue(replies)
+        self.assertTrue(all(t["tool_round_trip_ms"] >= 1000 for t in replies))
+        # Every prep turn pairs with its reply, except where truncation cut the reply off
+        paired = sum(len(t["prep_tool_names"]) for t in replies)
+        self.assertLessEqual(paired, len(prep))
+        self.assertGreater(paired, 0.95 * len(prep))
+
+    def test_same_second_artifacts_are_deduplicated(self):
+        profile = bench.TranscriptProfile.default()
+        transcript = bench.synthetic_transcript(random.Random(3), profile, 500)
+        empty = sum(1 for t in transcript if t["role"] == "agent" and t["message"] == "")
+        cleaned = jla.deduplicate_turns(transcript)
+        self.assertGreater(empty, 0)
+        self.assertEqual(len(cleaned), len(transcript) - empty)
+
+
+if __name__ == "__main__":
+    unittest.main()